@@ -0,0 +1,167 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from logging import getLogger
+from typing import AsyncIterator, Callable, Deque, Dict, Optional
+
+from spoon_ai.agents.base import BaseAgent
+
+from session_store import NO_VERSION, SessionStore
+
+logger = getLogger(__name__)
+
+
+def _drain_output(agent: BaseAgent) -> None:
+    """Drop queued output events nobody streamed, so idle agents don't accumulate them"""
+    queue = getattr(agent, "output_queue", None)
+    while queue is not None and not queue.empty():
+        queue.get_nowait()
+
+
+class _PoolEntry:
+    def __init__(self, agent: BaseAgent):
+        self.agent = agent
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        # Session store version the agent's memory reflects
+        self.version = NO_VERSION
+
+
+class AgentPool:
+    """Per-session pool of agents of a single type.
+
+    Each session key owns its own agent (and therefore its own memory). Requests
+    for the same session are serialized on a per-session lock, while different
+    sessions run concurrently. Idle sessions are evicted least-recently-used
+    first once the pool grows beyond ``max_size`` or sits idle past ``idle_ttl``.
+    Requests without a session key get a scratch agent that is cleared before
+    and after use and recycled through a small spare list. Output events left
+    in an agent's queue (only streaming requests consume it) are dropped when
+    it is checked out and returned.
+
+    With a shared ``store`` (multi-worker deployments), a session's memory is
+    loaded from the store when it is checked out (unless this process already
+    holds the latest version) and saved back afterwards, under a lock that
+    spans every worker, so a session can resume on any worker. Evicting a
+    local agent then only drops a cached copy.
+    """
+
+    def __init__(self, factory: Callable[[], BaseAgent], max_size: int = 256,
+                 idle_ttl: Optional[float] = 3600.0, max_spare: int = 8,
+                 store: Optional[SessionStore] = None, namespace: str = "default"):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.max_spare = max_spare
+        self.store = store
+        self.namespace = namespace
+        self._entries: "OrderedDict[str, _PoolEntry]" = OrderedDict()
+        self._spare: Deque[BaseAgent] = deque()
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def _new_agent(self) -> BaseAgent:
+        self.created += 1
+        return self.factory()
+
+    def _get_entry(self, key: str) -> _PoolEntry:
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _PoolEntry(self._new_agent())
+            self._entries[key] = entry
+        self._entries.move_to_end(key)
+        return entry
+
+    def _evict(self) -> None:
+        """Drop idle sessions that are expired or beyond the size cap, oldest first"""
+        now = time.monotonic()
+        for key in list(self._entries.keys()):
+            entry = self._entries[key]
+            over_capacity = len(self._entries) > self.max_size
+            expired = self.idle_ttl is not None and now - entry.last_used > self.idle_ttl
+            if not (over_capacity or expired):
+                # Entries are kept in LRU order, so nothing newer can be expired either
+                break
+            if entry.lock.locked():
+                continue
+            del self._entries[key]
+            self.evicted += 1
+            logger.info(f"Evicted idle agent session {key}")
+
+    @asynccontextmanager
+    async def checkout(self, key: Optional[str] = None) -> AsyncIterator[BaseAgent]:
+        """Check out the agent for ``key``, or a scratch agent when ``key`` is None"""
+        if key is None:
+            agent = self._spare.pop() if self._spare else self._new_agent()
+            agent.clear()
+            _drain_output(agent)
+            try:
+                yield agent
+            finally:
+                agent.clear()
+                _drain_output(agent)
+                if len(self._spare) < self.max_spare:
+                    self._spare.append(agent)
+            return
+
+        entry = self._get_entry(key)
+        async with entry.lock:
+            _drain_output(entry.agent)
+            try:
+                if self.store is None:
+                    yield entry.agent
+                    return
+                async with self.store.lock(self.namespace, key):
+                    await self._load(entry, key)
+                    try:
+                        yield entry.agent
+                    finally:
+                        entry.version = await self.store.save(
+                            self.namespace, key, entry.agent.memory.get_messages(), self.idle_ttl
+                        )
+            finally:
+                _drain_output(entry.agent)
+                entry.last_used = time.monotonic()
+                self._evict()
+
+    async def _load(self, entry: _PoolEntry, key: str) -> None:
+        """Bring the agent's memory up to the stored version of the session"""
+        version, messages = await self.store.load(self.namespace, key, entry.version)
+        if messages is not None:
+            memory = entry.agent.memory
+            memory.clear()
+            for message in messages:
+                memory.add_message(message)
+        entry.version = version
+
+    async def discard(self, key: str) -> bool:
+        """Forget a session; an in-flight request keeps its agent until it returns"""
+        found = self._entries.pop(key, None) is not None
+        if self.store is not None:
+            found = await self.store.delete(self.namespace, key) or found
+        return found
+
+    async def clear(self, shared: bool = True) -> None:
+        """Forget every session, including the shared copies unless ``shared`` is False"""
+        self._entries.clear()
+        self._spare.clear()
+        if shared and self.store is not None:
+            await self.store.clear(self.namespace)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "sessions": len(self._entries),
+            "active": sum(1 for entry in self._entries.values() if entry.lock.locked()),
+            "spare": len(self._spare),
+            "max_size": self.max_size,
+            "created": self.created,
+            "evicted": self.evicted,
+            "shared_store": type(self.store).__name__ if self.store is not None else None,
+        }
@@ -10,6 +10,7 @@ import asyncio
 import re
 import random
 from dotenv import load_dotenv
+from leaderboard import WORKOUTS, ChallengeLeaderboard, community_leaderboards
 import json
 import random
 import asyncio
@@ -60,6 +61,15 @@ class CommunityInsightsTool(BaseTool):
                 "type": "object",
                 "description": "Community information including members, activity type, and statistics"
             },
+            "community_id": {
+                "type": "string",
+                "description": "ID of a tracked community; its live leaderboards are used instead of 'community'"
+            },
+            "metric": {
+                "type": "string",
+                "description": "Metric to rank performers by for a tracked community (e.g. 'workouts', 'distance')",
+                "default": WORKOUTS
+            },
             "insight_type": {
                 "type": "string",
                 "description": "Type of insight to generate: 'performers', 'injury_advice', 'achievements', 'trends'",
@@ -71,14 +81,19 @@ class CommunityInsightsTool(BaseTool):
                 "default": "week"
             }
         },
-        "required": ["community", "insight_type"]
+        "required": ["insight_type"]
     }
 
-    async def execute(self, community: Dict[str, Any], insight_type: str, time_period: str = "week") -> str:
+    async def execute(self, community: Dict[str, Any] = None, insight_type: str = "performers", time_period: str = "week",
+                      community_id: str = None, metric: str = WORKOUTS) -> str:
         """
         Generate community insights based on the requested type
         """
         try:
+            community = self._resolve_community(community, community_id, metric)
+            if community is None:
+                return f"❌ Unknown community: {community_id}" if community_id else "❌ Provide a community or community_id"
+
             if insight_type == "performers":
                 return self._highlight_top_performers(community, time_period)
             elif insight_type == "injury_advice":
@@ -93,10 +108,19 @@ class CommunityInsightsTool(BaseTool):
         except Exception as e:
             return f"❌ Error generating community insights: {str(e)}"
 
+    def _resolve_community(self, community: Optional[Dict[str, Any]], community_id: Optional[str], metric: str) -> Optional[Dict[str, Any]]:
+        """Community dict to render; a tracked community contributes its live member count and top 5 by ``metric``"""
+        boards = community_leaderboards.community(community_id) if community_id else None
+        if boards is None:
+            return community
+        # Leaderboards hold running totals, so their standings cover all time whatever period was asked for
+        return {**(community or {}), **boards.as_community(metric, k=5), "standings_period": "all time"}
+
     def _highlight_top_performers(self, community: Dict[str, Any], time_period: str) -> str:
         """Highlight top performing community members"""
         
-        response = f"🏆 **Top Performers in {community['name']} ({time_period.title()})**\n\n"
+        period = community.get("standings_period", time_period)
+        response = f"🏆 **Top Performers in {community['name']} ({period.title()})**\n\n"
         
         top_performers = community.get("top_performers", [])
         
@@ -562,31 +586,39 @@ class ChallengeManagerTool(BaseTool):
                 "type": "string",
                 "description": "Activity type for the challenge",
                 "default": "general"
+            },
+            "challenge_id": {
+                "type": "string",
+                "description": "ID of a tracked challenge (also read from challenge_data['id']); "
+                               "creating one also needs challenge_data['community_id']"
             }
         },
         "required": ["action"]
     }
 
-    async def execute(self, action: str, challenge_data: Dict[str, Any] = None, activity_type: str = "general") -> str:
+    async def execute(self, action: str, challenge_data: Dict[str, Any] = None, activity_type: str = "general",
+                      challenge_id: str = None) -> str:
         """
         Manage community challenges
         """
         try:
+            challenge_data = challenge_data or {}
+            challenge_id = challenge_id or challenge_data.get("id")
             if action == "create":
-                return self._create_challenge(challenge_data, activity_type)
+                return self._create_challenge(challenge_data, activity_type, challenge_id)
             elif action == "join":
-                return self._join_challenge(challenge_data)
+                return self._join_challenge(challenge_data, challenge_id)
             elif action == "progress":
-                return self._show_progress(challenge_data)
+                return self._show_progress(challenge_data, community_leaderboards.challenges.get(challenge_id))
             elif action == "leaderboard":
-                return self._show_leaderboard(challenge_data)
+                return self._show_leaderboard(challenge_data, community_leaderboards.challenges.get(challenge_id))
             else:
                 return f"❌ Unknown action: {action}"
                 
         except Exception as e:
             return f"❌ Error managing challenge: {str(e)}"
 
-    def _create_challenge(self, challenge_data: Dict[str, Any], activity_type: str) -> str:
+    def _create_challenge(self, challenge_data: Dict[str, Any], activity_type: str, challenge_id: Optional[str] = None) -> str:
         """Create a new community challenge"""
         
         # Generate challenge suggestions if no specific data provided
@@ -594,6 +626,17 @@ class ChallengeManagerTool(BaseTool):
             suggestions = self._generate_challenge_suggestions(activity_type)
             return suggestions
         
+        # Track the challenge so logged activities update its leaderboard
+        if challenge_id and challenge_data.get("community_id"):
+            community_leaderboards.create_challenge(
+                challenge_id, challenge_data["community_id"],
+                name=challenge_data.get("name"),
+                target_metric=challenge_data.get("target_metric"),
+                target_value=challenge_data.get("target_value"),
+                start_date=challenge_data.get("start_date"),
+                end_date=challenge_data.get("end_date"),
+            )
+        
         response = "🏆 **New Community Challenge Created!**\n\n"
         response += f"📋 **Challenge Name:** {challenge_data.get('name', 'Fitness Challenge')}\n"
         response += f"📝 **Description:** {challenge_data.get('description', 'Complete your fitness goals!')}\n"
@@ -663,9 +706,14 @@ class ChallengeManagerTool(BaseTool):
         
         return response
 
-    def _join_challenge(self, challenge_data: Dict[str, Any]) -> str:
+    def _join_challenge(self, challenge_data: Dict[str, Any], challenge_id: Optional[str] = None) -> str:
         """Handle joining a challenge"""
         
+        member_id = challenge_data.get("user_id") or challenge_data.get("member_id")
+        if challenge_id in community_leaderboards.challenges and member_id:
+            challenge = community_leaderboards.join_challenge(challenge_id, member_id, challenge_data.get("member_name"))
+            challenge_data = {**challenge.info, **challenge_data}
+        
         response = "🎉 **Welcome to the Challenge!**\n\n"
         response += f"✅ You've successfully joined: **{challenge_data.get('name', 'Community Challenge')}**\n\n"
         response += "🎯 **Next Steps:**\n"
@@ -678,9 +726,12 @@ class ChallengeManagerTool(BaseTool):
         
         return response
 
-    def _show_progress(self, challenge_data: Dict[str, Any]) -> str:
+    def _show_progress(self, challenge_data: Dict[str, Any], challenge: Optional[ChallengeLeaderboard] = None) -> str:
         """Show challenge progress"""
         
+        if challenge is not None:
+            return self._show_tracked_progress(challenge)
+        
         response = f"📈 **Challenge Progress Update**\n\n"
         response += f"🏆 **Challenge:** {challenge_data.get('name', 'Community Challenge')}\n"
         
@@ -706,35 +757,65 @@ class ChallengeManagerTool(BaseTool):
         
         return response
 
-    def _show_leaderboard(self, challenge_data: Dict[str, Any]) -> str:
+    def _show_tracked_progress(self, challenge: ChallengeLeaderboard) -> str:
+        """Progress of a tracked challenge from its leaderboard"""
+        
+        board = challenge.board(challenge.target_metric)
+        response = f"📈 **Challenge Progress Update**\n\n"
+        response += f"🏆 **Challenge:** {challenge.info['name']}\n"
+        response += f"👥 **Participants:** {len(board)}\n"
+        if challenge.end_date:
+            days_remaining = (date.fromisoformat(challenge.end_date) - date.today()).days
+            response += f"📅 **Days Remaining:** {max(days_remaining, 0)}\n"
+        
+        progress = [challenge.progress(score) for _, score in board.top(len(board))]
+        if progress and progress[0] is not None:
+            average = sum(progress) / len(progress)
+            completed = sum(1 for p in progress if p >= 100)
+            response += f"📊 **Average Progress:** {average:.1f}% of {challenge.target_value:g} {challenge.target_metric}\n"
+            response += f"[{'█' * int(average // 10)}{'░' * (10 - int(average // 10))}] {average:.1f}%\n"
+            response += f"✅ **Completed:** {completed} of {len(progress)}\n\n"
+        else:
+            response += "\n"
+        
+        response += "💪 **Keep pushing!** You're closer to your goal than you think!"
+        
+        return response
+
+    def _show_leaderboard(self, challenge_data: Dict[str, Any], challenge: Optional[ChallengeLeaderboard] = None) -> str:
         """Show challenge leaderboard"""
         
-        participants = challenge_data.get('participants', [])
+        if challenge is not None:
+            participants = [
+                (entry["name"], f"{entry['score']:g} {challenge.target_metric}" +
+                 (f" ({entry['progress']}% complete)" if entry["progress"] is not None else ""))
+                for entry in challenge.standings(10)
+            ]
+            total = len(challenge.board(challenge.target_metric))
+            name = challenge.info["name"]
+        else:
+            # Untracked challenges have names but no logged progress
+            participants = [(participant, "no progress logged yet") for participant in challenge_data.get('participants', [])[:10]]
+            total = len(challenge_data.get('participants', []))
+            name = challenge_data.get('name', 'Community Challenge')
         
         response = f"🏆 **Challenge Leaderboard**\n\n"
-        response += f"📋 **Challenge:** {challenge_data.get('name', 'Community Challenge')}\n\n"
+        response += f"📋 **Challenge:** {name}\n\n"
         
         if not participants:
             response += "📊 No participants yet! Be the first to join!\n\n"
             response += "🚀 **Join now and start making progress!**"
             return response
         
-        # Simulated leaderboard data
-        for i, participant in enumerate(participants[:10], 1):
+        for i, (participant, progress) in enumerate(participants, 1):
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            
-            # Simulated progress for each participant
-            progress = random.randint(50, 100) if i <= 3 else random.randint(20, 80)
-            
-            response += f"{medal} **{participant}** - {progress}% complete\n"
+            response += f"{medal} **{participant}** - {progress}\n"
         
         response += "\n"
         
         # Additional stats
         response += "📊 **Challenge Stats:**\n"
-        response += f"  • Total participants: {len(participants)}\n"
-        response += f"  • Average completion: {random.randint(60, 75)}%\n"
-        response += f"  • Community spirit: 💯%\n\n"
+        response += f"  • Total participants: {total}\n\n"
         
         response += "🎯 **Not on the leaderboard yet?** Start logging your activities to climb the ranks!\n"
         response += "🤝 **Remember:** This is about personal growth and community support!"
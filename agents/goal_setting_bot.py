@@ -3,11 +3,11 @@ from spoon_ai.tools import ToolManager
 from spoon_ai.tools.base import BaseTool
 from spoon_ai.chat import ChatBot
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 import json
 import asyncio
-import re
 from dotenv import load_dotenv
+from metric_extractor import goal_extractor
 import json
 import asyncio
 
@@ -39,6 +39,17 @@ class UserGoal(BaseModel):
     nutrition: Optional[NutritionGoal] = Field(default=None, description="Nutrition goals")
 
 # ---------------------------- Goal Setting Tool ----------------------------
+SPORT_KEYWORDS = [
+    ("cycling", ['cycle', 'cycling', 'bike', 'biking']),
+    ("running", ['run', 'running', 'jog', 'jogging']),
+    ("swimming", ['swim', 'swimming']),
+    ("walking", ['walk', 'walking']),
+]
+NUTRITION_KEYWORDS = ['nutrition', 'eat', 'food', 'protein', 'carbs', 'calories', 'water']
+
+SPORTS_METRICS = ["distance", "time", "speed", "calories", "frequency", "duration"]
+NUTRITION_METRICS = ["protein", "carbs", "fats", "calories_consumed", "water_consumed"]
+
 class GoalSettingTool(BaseTool):
     """Goal Setting Tool for fitness and nutrition goals"""
     name: str = "goal_setting"
@@ -59,178 +70,32 @@ class GoalSettingTool(BaseTool):
         Parse user input and extract structured goal information
         """
         try:
-            # Initialize empty goal structure
-            goals = UserGoal()
-            
-            # Convert to lowercase for easier parsing
-            text = user_input.lower()
-            
-            # Parse cycling goals
-            if any(word in text for word in ['cycle', 'cycling', 'bike', 'biking']):
-                cycling_goal = SportsGoal()
-                cycling_goal = self._extract_sports_metrics(text, cycling_goal)
-                goals.cycling = cycling_goal
-            
-            # Parse running goals
-            if any(word in text for word in ['run', 'running', 'jog', 'jogging']):
-                running_goal = SportsGoal()
-                running_goal = self._extract_sports_metrics(text, running_goal)
-                goals.running = running_goal
-            
-            # Parse swimming goals
-            if any(word in text for word in ['swim', 'swimming']):
-                swimming_goal = SportsGoal()
-                swimming_goal = self._extract_sports_metrics(text, swimming_goal)
-                goals.swimming = swimming_goal
-            
-            # Parse walking goals
-            if any(word in text for word in ['walk', 'walking']):
-                walking_goal = SportsGoal()
-                walking_goal = self._extract_sports_metrics(text, walking_goal)
-                goals.walking = walking_goal
-            
-            # Parse nutrition goals
-            if any(word in text for word in ['nutrition', 'eat', 'food', 'protein', 'carbs', 'calories', 'water']):
-                nutrition_goal = NutritionGoal()
-                nutrition_goal = self._extract_nutrition_metrics(text, nutrition_goal)
-                goals.nutrition = nutrition_goal
-            
-            # Format the response
-            return self._format_goals_response(goals)
-            
+            return self._format_goals_response(self.parse_goals(user_input))
         except Exception as e:
             return f"Error parsing goals: {str(e)}"
-    
-    def _extract_sports_metrics(self, text: str, goal: SportsGoal) -> SportsGoal:
-        """Extract sports-related metrics from text"""
-        import re
-        
-        # Extract distance (km, kilometers, miles)
-        distance_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:km|kilometers?)',
-            r'(\d+(?:\.\d+)?)\s*(?:miles?)',
-        ]
-        for pattern in distance_patterns:
-            match = re.search(pattern, text)
-            if match:
-                distance = float(match.group(1))
-                if 'mile' in pattern:
-                    distance *= 1.60934  # Convert miles to km
-                goal.distance = distance
-                break
-        
-        # Extract time (minutes, hours)
-        time_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:minutes?|mins?)',
-            r'(\d+(?:\.\d+)?)\s*(?:hours?|hrs?)',
-        ]
-        for pattern in time_patterns:
-            match = re.search(pattern, text)
-            if match:
-                time = float(match.group(1))
-                if 'hour' in pattern or 'hr' in pattern:
-                    time *= 60  # Convert hours to minutes
-                goal.time = time
-                break
-        
-        # Extract speed (kmph, mph)
-        speed_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:kmph|km/h|kilometers? per hour)',
-            r'(\d+(?:\.\d+)?)\s*(?:mph|miles? per hour)',
-        ]
-        for pattern in speed_patterns:
-            match = re.search(pattern, text)
-            if match:
-                speed = float(match.group(1))
-                if 'mph' in pattern or 'miles per hour' in pattern:
-                    speed *= 1.60934  # Convert mph to kmph
-                goal.speed = speed
-                break
-        
-        # Extract calories
-        calories_match = re.search(r'(\d+(?:\.\d+)?)\s*calories?', text)
-        if calories_match:
-            goal.calories = float(calories_match.group(1))
-        
-        # Extract frequency (times per week, daily, etc.)
-        frequency_patterns = [
-            r'(\d+)\s*times?\s*(?:per|a)\s*week',
-            r'(\d+)\s*times?\s*weekly',
-            r'daily|every day',
-        ]
-        for pattern in frequency_patterns:
-            match = re.search(pattern, text)
-            if match:
-                if 'daily' in pattern or 'every day' in pattern:
-                    goal.frequency = 1.0  # Daily = every 1 day
-                else:
-                    times_per_week = int(match.group(1))
-                    goal.frequency = 7.0 / times_per_week  # Convert to days between sessions
-                break
-        
-        # Extract duration (weeks, months, days)
-        duration_patterns = [
-            r'(?:for|over)\s*(\d+)\s*(?:weeks?)',
-            r'(?:for|over)\s*(\d+)\s*(?:months?)',
-            r'(?:for|over)\s*(\d+)\s*(?:days?)',
-        ]
-        for pattern in duration_patterns:
-            match = re.search(pattern, text)
-            if match:
-                duration = int(match.group(1))
-                if 'week' in pattern:
-                    duration *= 7  # Convert weeks to days
-                elif 'month' in pattern:
-                    duration *= 30  # Convert months to days
-                goal.duration = float(duration)
-                break
-        
-        return goal
-    
-    def _extract_nutrition_metrics(self, text: str, goal: NutritionGoal) -> NutritionGoal:
-        """Extract nutrition-related metrics from text"""
-        import re
-        
-        # Extract protein
-        protein_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:g|grams?)\s*(?:of\s*)?protein', text)
-        if protein_match:
-            goal.protein = float(protein_match.group(1))
-        
-        # Extract carbs
-        carbs_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:g|grams?)\s*(?:of\s*)?(?:carbs|carbohydrates?)',
-        ]
-        for pattern in carbs_patterns:
-            match = re.search(pattern, text)
-            if match:
-                goal.carbs = float(match.group(1))
-                break
-        
-        # Extract fats
-        fats_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:g|grams?)\s*(?:of\s*)?fats?', text)
-        if fats_match:
-            goal.fats = float(fats_match.group(1))
-        
-        # Extract calories consumed
-        calories_consumed_match = re.search(r'(\d+(?:\.\d+)?)\s*calories?\s*(?:per day|daily|consumed?)', text)
-        if calories_consumed_match:
-            goal.calories_consumed = float(calories_consumed_match.group(1))
-        
-        # Extract water consumption
-        water_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:ml|milliliters?)\s*(?:of\s*)?water',
-            r'(\d+(?:\.\d+)?)\s*(?:l|liters?)\s*(?:of\s*)?water',
-        ]
-        for pattern in water_patterns:
-            match = re.search(pattern, text)
-            if match:
-                water = float(match.group(1))
-                if 'l' in pattern and 'ml' not in pattern:
-                    water *= 1000  # Convert liters to milliliters
-                goal.water_consumed = water
-                break
-        
-        return goal
+
+    def parse_goals(self, user_input: str) -> UserGoal:
+        """Parse one goal description into structured goals"""
+        return self._build_goals(user_input.lower(), goal_extractor.extract(user_input))
+
+    def parse_goals_batch(self, user_inputs: List[str]) -> List[UserGoal]:
+        """Parse many goal descriptions with a single extraction pass"""
+        metrics = goal_extractor.extract_batch(user_inputs)
+        return [self._build_goals(text.lower(), found) for text, found in zip(user_inputs, metrics)]
+
+    def _build_goals(self, text: str, metrics: Dict[str, float]) -> UserGoal:
+        """Assign extracted metrics to the sports and nutrition goals mentioned in the text"""
+        goals = UserGoal()
+
+        # Every mentioned sport gets the activity metrics found in the text
+        for sport, keywords in SPORT_KEYWORDS:
+            if any(word in text for word in keywords):
+                setattr(goals, sport, SportsGoal(**{field: metrics.get(field) for field in SPORTS_METRICS}))
+
+        if any(word in text for word in NUTRITION_KEYWORDS):
+            goals.nutrition = NutritionGoal(**{field: metrics.get(field) for field in NUTRITION_METRICS})
+
+        return goals
     
     def _format_goals_response(self, goals: UserGoal) -> str:
         """Format the parsed goals into a readable response"""
@@ -0,0 +1,14 @@
+# gunicorn -c gunicorn.conf.py server:app
+# Several workers need SESSION_STORE set in server.py so sessions can resume on any worker.
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# Lets server.py disable the endpoints whose state is per worker
+raw_env = [f"SERVER_WORKERS={workers}"]
+# Agent runs can span several LLM calls
+timeout = 300
+graceful_timeout = 30
+keepalive = 5
@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, FrozenSet, Generic, Iterable, Mapping, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class TermMatcher:
+    """Finds which of a fixed set of terms occur as substrings of a text with a single regex scan.
+
+    The terms are compiled into one lookahead alternation, so every position
+    of the text is tested once against all terms and overlapping occurrences
+    are still reported. Since no term may be a prefix of another, at most one
+    term can start at a given position and the scan finds exactly the terms
+    that ``term in text`` would.
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms: FrozenSet[str] = frozenset(terms)
+        for term in self.terms:
+            for other in self.terms:
+                if term != other and other.startswith(term):
+                    raise ValueError(f"Term '{term}' is a prefix of '{other}'")
+        alternation = "|".join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+        self._pattern = re.compile(f"(?=({alternation}))")
+
+    def find(self, text: str) -> FrozenSet[str]:
+        return frozenset(self._pattern.findall(text))
+
+
+class RuleTable(Generic[T]):
+    """Ordered rules mapping the terms found in a text to a result.
+
+    Each rule is ``(result, groups)``: it matches when the text contains at
+    least one term from every group (``(("ankle",), ("sprain",))`` needs both
+    words, ``(("knee", "acl"),)`` either). Texts are lowercased first, and
+    lookups are memoized since the same injury names and activities recur.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[T, Sequence[Sequence[str]]]], default: Optional[T] = None, cache_size: int = 4096):
+        self.rules: Tuple[Tuple[T, Tuple[FrozenSet[str], ...]], ...] = tuple(
+            (result, tuple(frozenset(group) for group in groups)) for result, groups in rules
+        )
+        self.default = default
+        self.matcher = TermMatcher(term for _, groups in self.rules for group in groups for term in group)
+        self.first_match = lru_cache(maxsize=cache_size)(self._first)
+        self.all_matches = lru_cache(maxsize=cache_size)(self._all)
+
+    def _matches(self, text: str) -> Iterable[T]:
+        found = self.matcher.find(text.lower())
+        if not found:
+            return
+        for result, groups in self.rules:
+            if all(found & group for group in groups):
+                yield result
+
+    def _first(self, text: str) -> Optional[T]:
+        """Result of the first matching rule, or the default"""
+        return next(iter(self._matches(text)), self.default)
+
+    def _all(self, text: str) -> Tuple[T, ...]:
+        """Results of every matching rule, in rule order"""
+        return tuple(self._matches(text))
+
+
+def _frozen(table: Mapping[str, Any]) -> Mapping[str, Any]:
+    return MappingProxyType(dict(table))
+
+
+# InjuryPreventionTool risk analysis: injury history -> body area (first match wins)
+HIGH_RISK_AREAS: RuleTable[str] = RuleTable([
+    ("knee", [("knee", "acl", "mcl", "meniscus")]),
+    ("ankle", [("ankle", "sprain")]),
+    ("lower back", [("back", "spine", "disc")]),
+    ("shoulder", [("shoulder", "rotator")]),
+])
+
+# Personal info -> risk factors (every match applies)
+PERSONAL_RISK_FACTORS: RuleTable[str] = RuleTable([
+    ("prolonged sitting", [("desk job", "sedentary", "sitting")]),
+    ("foot mechanics issues", [("flat feet", "overpronation")]),
+    ("excess weight", [("overweight", "obesity")]),
+])
+
+HIGH_IMPACT_ACTIVITIES: FrozenSet[str] = frozenset(["running", "basketball", "soccer", "tennis", "volleyball"])
+
+INJURY_PREVENTION: RuleTable[str] = RuleTable([
+    ("Focus on leg strength, proper landing mechanics, and balance training", [("knee", "acl")]),
+    ("Improve proprioception with balance exercises and strengthen peroneals", [("ankle", "sprain")]),
+    ("Strengthen core muscles and improve hip flexibility", [("back", "spine")]),
+    ("Strengthen rotator cuff and improve shoulder blade stability", [("shoulder", "rotator")]),
+    ("Maintain hamstring flexibility and strengthen glutes", [("hamstring",)]),
+    ("Gradual mileage increase and proper footwear selection", [("shin", "splint")]),
+], default="Maintain proper form, adequate warm-up, and progressive training")
+
+ACTIVITY_PREVENTION: RuleTable[str] = RuleTable([
+    ("  • Follow 10% rule for weekly mileage increases\n"
+     "  • Replace shoes every 300-500 miles\n"
+     "  • Incorporate cross-training and strength work\n"
+     "  • Pay attention to running surface variety", [("running",)]),
+    ("  • Ensure proper bike fit and positioning\n"
+     "  • Gradually increase distance and intensity\n"
+     "  • Strengthen core and glutes for stability\n"
+     "  • Use appropriate gear ratios", [("cycling",)]),
+    ("  • Focus on proper stroke technique\n"
+     "  • Strengthen shoulder stabilizers\n"
+     "  • Gradually increase yardage\n"
+     "  • Include dryland training", [("swimming",)]),
+    ("  • Prioritize proper form over heavy weight\n"
+     "  • Use spotters for heavy lifts\n"
+     "  • Allow adequate recovery between sessions\n"
+     "  • Progress gradually with weight increases", [("weight", "lifting")]),
+])
+
+INJURY_RECOVERY: RuleTable[str] = RuleTable([
+    ("RICE initially, then progressive weight-bearing and balance exercises", [("ankle",), ("sprain",)]),
+    ("Protect from further stress, strengthen surrounding muscles, gradual loading", [("knee",)]),
+    ("Maintain gentle movement, core strengthening, avoid bed rest", [("back",)]),
+    ("Maintain pain-free range of motion, progressive strengthening", [("shoulder",)]),
+    ("Gentle stretching, eccentric strengthening, gradual return to sprinting", [("hamstring",)]),
+    ("Rest from impact activities, address biomechanical factors", [("shin",)]),
+], default="Follow RICE protocol initially, then progressive rehabilitation")
+
+# Strength work recommended for each high-risk area in the prevention guide
+AREA_STRENGTH_ADVICE: Mapping[str, str] = _frozen({
+    "knee": "  • **Knee Protection**: Strengthen quadriceps, hamstrings, and glutes\n",
+    "ankle": "  • **Ankle Stability**: Balance exercises, calf strengthening\n",
+    "lower back": "  • **Core Strength**: Planks, bird dogs, dead bugs for spinal stability\n",
+})
@@ -12,6 +12,11 @@ from dotenv import load_dotenv
 import json
 import asyncio
 
+from injury_advice import (
+    ACTIVITY_PREVENTION, AREA_STRENGTH_ADVICE, HIGH_IMPACT_ACTIVITIES, HIGH_RISK_AREAS,
+    INJURY_PREVENTION, INJURY_RECOVERY, PERSONAL_RISK_FACTORS,
+)
+
 load_dotenv(override=True)
 
 # ---------------------------- Health Profile Models ----------------------------
@@ -74,42 +79,21 @@ class InjuryPreventionTool(BaseTool):
 
     def _analyze_injury_risks(self, profile: Dict[str, Any]) -> Dict[str, List[str]]:
         """Analyze user profile to identify injury risk factors"""
-        risks = {
-            "high_risk_areas": [],
-            "risk_factors": [],
+        # Injury history: one high-risk area per injury (repeats kept, as they weigh the history)
+        high_risk_areas = [area for area in map(HIGH_RISK_AREAS.first_match, profile.get("injuries", [])) if area]
+        risk_factors = list(PERSONAL_RISK_FACTORS.all_matches(profile.get("personal_info", "")))
+        if not HIGH_IMPACT_ACTIVITIES.isdisjoint(activity.lower() for activity in profile.get("activities", [])):
+            risk_factors.append("high-impact activities")
+
+        return {
+            "high_risk_areas": high_risk_areas,
+            "risk_factors": risk_factors,
             "protective_factors": []
         }
-        
-        injuries = profile.get("injuries", [])
-        personal_info = profile.get("personal_info", "").lower()
-        activities = profile.get("activities", [])
-        
-        # Analyze injury history for patterns
-        for injury in injuries:
-            injury_lower = injury.lower()
-            if any(knee_term in injury_lower for knee_term in ["knee", "acl", "mcl", "meniscus"]):
-                risks["high_risk_areas"].append("knee")
-            elif any(ankle_term in injury_lower for ankle_term in ["ankle", "sprain"]):
-                risks["high_risk_areas"].append("ankle")
-            elif any(back_term in injury_lower for back_term in ["back", "spine", "disc"]):
-                risks["high_risk_areas"].append("lower back")
-            elif any(shoulder_term in injury_lower for shoulder_term in ["shoulder", "rotator"]):
-                risks["high_risk_areas"].append("shoulder")
-        
-        # Analyze personal info for risk factors
-        if any(term in personal_info for term in ["desk job", "sedentary", "sitting"]):
-            risks["risk_factors"].append("prolonged sitting")
-        if any(term in personal_info for term in ["flat feet", "overpronation"]):
-            risks["risk_factors"].append("foot mechanics issues")
-        if any(term in personal_info for term in ["overweight", "obesity"]):
-            risks["risk_factors"].append("excess weight")
-        
-        # Analyze activities for specific risks
-        high_impact_activities = ["running", "basketball", "soccer", "tennis", "volleyball"]
-        if any(activity.lower() in [act.lower() for act in activities] for activity in high_impact_activities):
-            risks["risk_factors"].append("high-impact activities")
-        
-        return risks
+
+    def analyze_risks_batch(self, profiles: List[Dict[str, Any]]) -> List[Dict[str, List[str]]]:
+        """Risk analysis of many profiles; injuries and activities shared between profiles are matched once"""
+        return [self._analyze_injury_risks(profile) for profile in profiles]
 
     def _generate_prevention_advice(self, profile: Dict[str, Any], question: str, activity: str, risks: Dict[str, List[str]]) -> str:
         """Generate comprehensive prevention advice"""
@@ -143,12 +127,9 @@ class InjuryPreventionTool(BaseTool):
         response += "  • **Cool-down (5-10 min)**: Static stretching, gradual activity reduction\n"
         
         # Strength and conditioning
-        if "knee" in risks["high_risk_areas"]:
-            response += "  • **Knee Protection**: Strengthen quadriceps, hamstrings, and glutes\n"
-        if "ankle" in risks["high_risk_areas"]:
-            response += "  • **Ankle Stability**: Balance exercises, calf strengthening\n"
-        if "lower back" in risks["high_risk_areas"]:
-            response += "  • **Core Strength**: Planks, bird dogs, dead bugs for spinal stability\n"
+        for area, advice in AREA_STRENGTH_ADVICE.items():
+            if area in risks["high_risk_areas"]:
+                response += advice
         
         # General recommendations
         response += "  • **Progressive Loading**: Gradually increase intensity, duration, and frequency\n"
@@ -175,49 +156,11 @@ class InjuryPreventionTool(BaseTool):
 
     def _get_injury_specific_prevention(self, injury: str) -> str:
         """Get specific prevention advice for common injuries"""
-        injury_lower = injury.lower()
-        
-        if "knee" in injury_lower or "acl" in injury_lower:
-            return "Focus on leg strength, proper landing mechanics, and balance training"
-        elif "ankle" in injury_lower or "sprain" in injury_lower:
-            return "Improve proprioception with balance exercises and strengthen peroneals"
-        elif "back" in injury_lower or "spine" in injury_lower:
-            return "Strengthen core muscles and improve hip flexibility"
-        elif "shoulder" in injury_lower or "rotator" in injury_lower:
-            return "Strengthen rotator cuff and improve shoulder blade stability"
-        elif "hamstring" in injury_lower:
-            return "Maintain hamstring flexibility and strengthen glutes"
-        elif "shin" in injury_lower or "splint" in injury_lower:
-            return "Gradual mileage increase and proper footwear selection"
-        else:
-            return "Maintain proper form, adequate warm-up, and progressive training"
+        return INJURY_PREVENTION.first_match(injury)
 
-    def _get_activity_specific_prevention(self, activity: str, risks: Dict[str, List[str]]) -> str:
+    def _get_activity_specific_prevention(self, activity: str, risks: Dict[str, List[str]]) -> Optional[str]:
         """Get prevention advice specific to activities"""
-        activity_lower = activity.lower()
-        
-        if "running" in activity_lower:
-            return ("  • Follow 10% rule for weekly mileage increases\n"
-                   "  • Replace shoes every 300-500 miles\n"
-                   "  • Incorporate cross-training and strength work\n"
-                   "  • Pay attention to running surface variety")
-        elif "cycling" in activity_lower:
-            return ("  • Ensure proper bike fit and positioning\n"
-                   "  • Gradually increase distance and intensity\n"
-                   "  • Strengthen core and glutes for stability\n"
-                   "  • Use appropriate gear ratios")
-        elif "swimming" in activity_lower:
-            return ("  • Focus on proper stroke technique\n"
-                   "  • Strengthen shoulder stabilizers\n"
-                   "  • Gradually increase yardage\n"
-                   "  • Include dryland training")
-        elif "weight" in activity_lower or "lifting" in activity_lower:
-            return ("  • Prioritize proper form over heavy weight\n"
-                   "  • Use spotters for heavy lifts\n"
-                   "  • Allow adequate recovery between sessions\n"
-                   "  • Progress gradually with weight increases")
-        else:
-            return None
+        return ACTIVITY_PREVENTION.first_match(activity)
 
 # ---------------------------- Injury Recovery Tool ----------------------------
 class InjuryRecoveryTool(BaseTool):
@@ -329,22 +272,7 @@ class InjuryRecoveryTool(BaseTool):
 
     def _get_injury_specific_recovery(self, injury: str) -> str:
         """Get specific recovery advice for common injuries"""
-        injury_lower = injury.lower()
-        
-        if "ankle" in injury_lower and "sprain" in injury_lower:
-            return "RICE initially, then progressive weight-bearing and balance exercises"
-        elif "knee" in injury_lower:
-            return "Protect from further stress, strengthen surrounding muscles, gradual loading"
-        elif "back" in injury_lower:
-            return "Maintain gentle movement, core strengthening, avoid bed rest"
-        elif "shoulder" in injury_lower:
-            return "Maintain pain-free range of motion, progressive strengthening"
-        elif "hamstring" in injury_lower:
-            return "Gentle stretching, eccentric strengthening, gradual return to sprinting"
-        elif "shin" in injury_lower:
-            return "Rest from impact activities, address biomechanical factors"
-        else:
-            return "Follow RICE protocol initially, then progressive rehabilitation"
+        return INJURY_RECOVERY.first_match(injury)
 
 # ---------------------------- Agent Definition ----------------------------
 class InjuryAgent(ToolCallAgent):
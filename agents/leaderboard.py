@@ -0,0 +1,260 @@
+from datetime import date as date_type
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+from sortedcontainers import SortedList
+
+# Synthetic metric counting logged activities
+WORKOUTS = "workouts"
+
+
+class Leaderboard:
+    """Members ranked by one metric, highest first.
+
+    Scores live in a dict and, as ``(-score, member_id)``, in a sorted list, so
+    updates, rank lookups and top-k queries are O(log n) (ties rank by member id).
+    """
+
+    def __init__(self):
+        self._scores: Dict[str, float] = {}
+        self._ranked = SortedList()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def __contains__(self, member_id: str) -> bool:
+        return member_id in self._scores
+
+    def set(self, member_id: str, score: float) -> None:
+        previous = self._scores.get(member_id)
+        if previous is not None:
+            self._ranked.remove((-previous, member_id))
+        self._scores[member_id] = score
+        self._ranked.add((-score, member_id))
+
+    def add(self, member_id: str, amount: float) -> float:
+        """Increase a member's score (starting from 0) and return the new score"""
+        score = self._scores.get(member_id, 0.0) + amount
+        self.set(member_id, score)
+        return score
+
+    def remove(self, member_id: str) -> None:
+        score = self._scores.pop(member_id, None)
+        if score is not None:
+            self._ranked.remove((-score, member_id))
+
+    def score(self, member_id: str) -> Optional[float]:
+        return self._scores.get(member_id)
+
+    def rank(self, member_id: str) -> Optional[int]:
+        """1-based rank of a member, or None if they are not on the board"""
+        score = self._scores.get(member_id)
+        if score is None:
+            return None
+        return self._ranked.bisect_left((-score, member_id)) + 1
+
+    def top(self, k: int = 10, offset: int = 0) -> List[Tuple[str, float]]:
+        """``k`` highest (member_id, score) pairs, skipping the first ``offset``"""
+        return [(member_id, -negative) for negative, member_id in self._ranked.islice(offset, offset + k)]
+
+
+class MemberStats(BaseModel):
+    """Running totals of one member within a community or challenge"""
+    member_id: str
+    name: str
+    totals: Dict[str, float] = {}
+    workouts: int = 0
+    current_streak: int = 0
+    last_active: Optional[str] = None
+
+    def record(self, metrics: Dict[str, float], day: str) -> None:
+        for metric, value in metrics.items():
+            self.totals[metric] = self.totals.get(metric, 0.0) + value
+        self.workouts += 1
+        # Streaks only move forward; backfilled days count towards totals but not the streak
+        if self.last_active is None or day > self.last_active:
+            gap = (date_type.fromisoformat(day) - date_type.fromisoformat(self.last_active)).days if self.last_active else None
+            self.current_streak = self.current_streak + 1 if gap == 1 else 1
+            self.last_active = day
+
+    def as_performer(self) -> Dict[str, Any]:
+        """Shape of a CommunityMember, as rendered by CommunityInsightsTool"""
+        return {
+            "name": self.name,
+            "user_id": self.member_id,
+            "activity_stats": {metric: round(value, 2) for metric, value in self.totals.items()},
+            "current_streak": self.current_streak,
+            "total_workouts": self.workouts,
+        }
+
+
+class _RankedGroup:
+    """Members of a community or challenge with one leaderboard per metric"""
+
+    def __init__(self):
+        self.members: Dict[str, MemberStats] = {}
+        self.boards: Dict[str, Leaderboard] = {WORKOUTS: Leaderboard()}
+
+    def _member(self, member_id: str, name: Optional[str]) -> MemberStats:
+        member = self.members.get(member_id)
+        if member is None:
+            member = self.members[member_id] = MemberStats(member_id=member_id, name=name or member_id)
+        elif name:
+            member.name = name
+        return member
+
+    def record(self, member_id: str, metrics: Dict[str, float], day: str, name: Optional[str]) -> None:
+        self._member(member_id, name).record(metrics, day)
+        for metric, value in metrics.items():
+            self.boards.setdefault(metric, Leaderboard()).add(member_id, value)
+        self.boards[WORKOUTS].add(member_id, 1)
+
+    def board(self, metric: str) -> Leaderboard:
+        board = self.boards.get(metric)
+        return board if board is not None else Leaderboard()
+
+    def top(self, metric: str = WORKOUTS, k: int = 10, offset: int = 0) -> List[Tuple[MemberStats, float]]:
+        return [(self.members[member_id], score) for member_id, score in self.board(metric).top(k, offset)]
+
+    def rank(self, member_id: str, metric: str = WORKOUTS) -> Optional[int]:
+        return self.board(metric).rank(member_id)
+
+
+class CommunityLeaderboards(_RankedGroup):
+    """Leaderboards of one community; ``info`` holds its descriptive fields (name, activity_type, ...)"""
+
+    def __init__(self, community_id: str, **info: Any):
+        super().__init__()
+        self.community_id = community_id
+        self.info: Dict[str, Any] = {"name": community_id, "activity_type": "general", **info}
+        # member -> challenges of this community they joined
+        self.member_challenges: Dict[str, Set[str]] = {}
+
+    def as_community(self, metric: str = WORKOUTS, k: int = 5) -> Dict[str, Any]:
+        """Shape of a Community with its current top-k performers"""
+        return {
+            **self.info,
+            "member_count": len(self.members),
+            "top_performers": [member.as_performer() for member, _ in self.top(metric, k)],
+        }
+
+
+class ChallengeLeaderboard(_RankedGroup):
+    """Standings of one challenge, ranked by its target metric within its date range"""
+
+    def __init__(self, challenge_id: str, community_id: str, target_metric: str = WORKOUTS,
+                 target_value: Optional[float] = None, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, **info: Any):
+        super().__init__()
+        self.challenge_id = challenge_id
+        self.community_id = community_id
+        self.target_metric = target_metric
+        self.target_value = target_value
+        self.start_date = start_date
+        self.end_date = end_date
+        self.info: Dict[str, Any] = {"name": challenge_id, **info}
+
+    def join(self, member_id: str, name: Optional[str] = None) -> None:
+        self._member(member_id, name)
+        board = self.boards.setdefault(self.target_metric, Leaderboard())
+        if member_id not in board:
+            board.set(member_id, 0.0)
+
+    def covers(self, day: str) -> bool:
+        return (not self.start_date or day >= self.start_date) and (not self.end_date or day <= self.end_date)
+
+    def progress(self, score: float) -> Optional[float]:
+        """Percentage of the target reached"""
+        if not self.target_value:
+            return None
+        return round(min(score / self.target_value, 1.0) * 100, 1)
+
+    def standings(self, k: int = 10, offset: int = 0) -> List[Dict[str, Any]]:
+        return [
+            {"rank": offset + i, "member_id": member.member_id, "name": member.name, "score": score, "progress": self.progress(score)}
+            for i, (member, score) in enumerate(self.top(self.target_metric, k, offset), 1)
+        ]
+
+
+class LeaderboardRegistry:
+    """Process-wide community and challenge leaderboards, updated as activities are logged"""
+
+    def __init__(self):
+        self.communities: Dict[str, CommunityLeaderboards] = {}
+        self.challenges: Dict[str, ChallengeLeaderboard] = {}
+
+    def community(self, community_id: str, create: bool = False) -> Optional[CommunityLeaderboards]:
+        boards = self.communities.get(community_id)
+        if boards is None and create:
+            boards = self.communities[community_id] = CommunityLeaderboards(community_id)
+        return boards
+
+    def register_community(self, community_id: str, **info: Any) -> CommunityLeaderboards:
+        """Create a community or update its descriptive fields"""
+        boards = self.community(community_id, create=True)
+        boards.info.update({key: value for key, value in info.items() if value is not None})
+        return boards
+
+    def create_challenge(self, challenge_id: str, community_id: str, **fields: Any) -> ChallengeLeaderboard:
+        """Create (or replace the settings of) a challenge; existing standings are kept"""
+        self.community(community_id, create=True)
+        fields = {key: value for key, value in fields.items() if value is not None}
+        challenge = self.challenges.get(challenge_id)
+        if challenge is not None and challenge.community_id != community_id:
+            # Moving to another community starts over; members of the old one no longer count towards it
+            previous = self.communities.get(challenge.community_id)
+            if previous is not None:
+                for member_id in list(previous.member_challenges):
+                    joined = previous.member_challenges[member_id]
+                    joined.discard(challenge_id)
+                    if not joined:
+                        del previous.member_challenges[member_id]
+            challenge = None
+        if challenge is None:
+            challenge = self.challenges[challenge_id] = ChallengeLeaderboard(challenge_id, community_id, **fields)
+        else:
+            previous_metric = challenge.target_metric
+            for key in ("target_metric", "target_value", "start_date", "end_date"):
+                if key in fields:
+                    setattr(challenge, key, fields.pop(key))
+            challenge.info.update(fields)
+            if challenge.target_metric != previous_metric:
+                # Members who joined stay listed on the new metric's board, at 0 until they log it
+                for member_id in list(challenge.members):
+                    challenge.join(member_id)
+        return challenge
+
+    def join_challenge(self, challenge_id: str, member_id: str, name: Optional[str] = None) -> ChallengeLeaderboard:
+        challenge = self.challenges.get(challenge_id)
+        if challenge is None:
+            raise KeyError(f"Unknown challenge '{challenge_id}'")
+        challenge.join(member_id, name)
+        self.community(challenge.community_id, create=True).member_challenges.setdefault(member_id, set()).add(challenge_id)
+        return challenge
+
+    def record_activity(self, community_id: str, member_id: str, metrics: Dict[str, float],
+                        name: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Dict[str, Optional[int]]]:
+        """Add an activity to the community's boards and to every joined challenge whose dates cover it
+
+        Returns:
+            The member's new ranks, ``{"community": {metric: rank}, <challenge_id>: {target_metric: rank}}``
+        """
+        day = day or date_type.today().isoformat()
+        date_type.fromisoformat(day)  # raises ValueError on malformed dates
+        metrics = {metric: float(value) for metric, value in metrics.items() if metric != WORKOUTS}
+
+        community = self.community(community_id, create=True)
+        community.record(member_id, metrics, day, name)
+        ranks = {"community": {metric: community.rank(member_id, metric) for metric in (WORKOUTS, *metrics)}}
+
+        for challenge_id in community.member_challenges.get(member_id, ()):
+            challenge = self.challenges.get(challenge_id)
+            if challenge is None or not challenge.covers(day):
+                continue
+            challenge.record(member_id, metrics, day, name)
+            ranks[challenge_id] = {challenge.target_metric: challenge.rank(member_id, challenge.target_metric)}
+        return ranks
+
+
+# Shared by the community tools and the server
+community_leaderboards = LeaderboardRegistry()
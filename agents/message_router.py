@@ -0,0 +1,287 @@
+import math
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+# Agent pool name -> agent_type reported in responses
+ROUTES: Dict[str, str] = {
+    "goal": "goal_setting",
+    "nutrition": "nutrition",
+    "injury": "injury",
+    "community": "community",
+}
+
+DEFAULT_ROUTE = "goal"
+
+# Labelled utterances the classifier is trained on, alongside each agent's description
+ROUTE_EXAMPLES: Dict[str, List[str]] = {
+    "goal": [
+        "I want to run 5k three times a week for the next month",
+        "set a goal to cycle 100 km every week",
+        "help me plan to swim 2 km in under 45 minutes",
+        "my target is to walk 10000 steps every day",
+        "I want to train for a marathon in 12 weeks",
+        "I'd like to improve my running pace to 5 minutes per km",
+        "make me a training plan to ride a century",
+        "I aim to burn 500 calories per workout five days a week",
+        "set my weekly running distance target to 30 km",
+        "my objective is to finish a half marathon under two hours",
+        "I want to get faster on the bike and average 30 kmh",
+        "create a fitness goal to swim four times a week",
+        "how should I structure my training for a triathlon",
+        "I want to increase my mileage gradually over 8 weeks",
+    ],
+    "nutrition": [
+        "I had oatmeal with banana for breakfast and a chicken salad for lunch",
+        "log 2000 calories, 150g protein, 200g carbs and 60g fat for today",
+        "how much protein should I eat per day to build muscle",
+        "what should I eat before a long run",
+        "I drank 3 liters of water today",
+        "analyze my diet from this week",
+        "am I getting enough carbs for my training",
+        "what is a good post workout meal",
+        "how many calories are in a bowl of pasta",
+        "I ate a burger and fries for dinner",
+        "give me healthy snack ideas for recovery",
+        "track my macros for today",
+        "is my hydration good enough on training days",
+        "suggest a meal plan with more vegetables and fiber",
+        "breakfast lunch dinner food intake today",
+    ],
+    "injury": [
+        "my knee hurts after running",
+        "I have shin splints, how do I recover",
+        "how can I prevent injuries when increasing mileage",
+        "I sprained my ankle yesterday, what should I do",
+        "lower back pain after cycling",
+        "what stretches help with tight hamstrings",
+        "my shoulder aches after swimming",
+        "how long should I rest after a calf strain",
+        "I think I have plantar fasciitis",
+        "exercises to strengthen my knees and avoid runner's knee",
+        "sore achilles tendon when I wake up",
+        "rehab plan for a pulled hamstring",
+        "is it safe to train through this pain",
+        "how do I warm up properly to avoid getting hurt",
+        "physiotherapy and rehabilitation after tendonitis",
+    ],
+    "community": [
+        "who is at the top of the leaderboard this week",
+        "create a 30 day running challenge for our club",
+        "give me some motivation to keep going",
+        "how is our community doing this month",
+        "I need encouragement, I skipped training all week",
+        "start a group cycling challenge",
+        "who are the top performers in the club",
+        "send a motivational message to the running group",
+        "what challenges can I join with other members",
+        "show community trends and engagement",
+        "celebrate the achievements of our members",
+        "I feel unmotivated and want to quit",
+        "organize a team swimming competition",
+        "compare my progress with friends in the group",
+    ],
+}
+
+
+class RouteDecision(BaseModel):
+    """Routing result for one message"""
+    route: str
+    agent_type: str
+    confidence: float
+    scores: Dict[str, float] = {}
+
+
+def _decision(route: str, confidence: float, scores: Optional[Dict[str, float]] = None) -> RouteDecision:
+    return RouteDecision(route=route, agent_type=ROUTES[route], confidence=confidence, scores=scores or {})
+
+
+class BaseRouter(ABC):
+    """Maps free-form messages to an agent pool"""
+
+    def __init__(self, default_route: str = DEFAULT_ROUTE, min_confidence: float = 0.0):
+        self.default_route = default_route
+        self.min_confidence = min_confidence
+
+    @abstractmethod
+    def classify_batch(self, messages: Sequence[str]) -> List[RouteDecision]:
+        """Route several messages at once"""
+
+    def classify(self, message: str) -> RouteDecision:
+        return self.classify_batch([message])[0]
+
+
+class KeywordRouter(BaseRouter):
+    """First-match keyword scan (the original /api/chat routing)"""
+
+    KEYWORDS: List[Tuple[str, List[str]]] = [
+        ("goal", ['goal', 'target', 'aim', 'plan', 'objective']),
+        ("nutrition", ['nutrition', 'food', 'eat', 'calories', 'protein', 'diet']),
+        ("injury", ['injury', 'pain', 'hurt', 'recovery', 'prevention', 'heal']),
+        ("community", ['community', 'challenge', 'motivation', 'encourage', 'leaderboard']),
+    ]
+
+    def match(self, message: str) -> Optional[str]:
+        """Route of the first keyword group found in the message, or None"""
+        message_lower = message.lower()
+        for route, words in self.KEYWORDS:
+            if any(word in message_lower for word in words):
+                return route
+        return None
+
+    def classify_batch(self, messages: Sequence[str]) -> List[RouteDecision]:
+        decisions = []
+        for message in messages:
+            route = self.match(message)
+            if route is None:
+                decisions.append(_decision(self.default_route, 0.0))
+            else:
+                decisions.append(_decision(route, 1.0))
+        return decisions
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def extract_features(text: str) -> List[str]:
+    """Word unigrams and bigrams plus character 4-grams, so inflections ("hurts", "hurting") still overlap"""
+    tokens = _TOKEN_RE.findall(text.lower())
+    features = [f"w:{token}" for token in tokens]
+    features.extend(f"b:{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    for token in tokens:
+        if len(token) > 3:
+            padded = f"^{token}$"
+            features.extend(f"c:{padded[i:i + 4]}" for i in range(len(padded) - 3))
+    return features
+
+
+class TfidfRouter(BaseRouter):
+    """Nearest-centroid TF-IDF classifier.
+
+    Every route is represented by the normalized mean TF-IDF vector of its
+    training texts; a message is scored by cosine similarity against each
+    centroid and the softmax of those scores is reported as the confidence.
+    Fitting happens once at startup, and classification is a sparse gather
+    over the centroid matrix.
+    """
+
+    def __init__(self, examples: Optional[Dict[str, List[str]]] = None, temperature: float = 0.05,
+                 default_route: str = DEFAULT_ROUTE, min_confidence: float = 0.0):
+        super().__init__(default_route=default_route, min_confidence=min_confidence)
+        self.temperature = temperature
+        self.routes: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.fit(examples or ROUTE_EXAMPLES)
+
+    def fit(self, examples: Dict[str, List[str]]) -> "TfidfRouter":
+        """Train on ``{route: [texts]}``"""
+        unknown = set(examples) - set(ROUTES)
+        if unknown:
+            raise ValueError(f"Unknown routes: {sorted(unknown)}")
+
+        documents = [(route, extract_features(text)) for route, texts in examples.items() for text in texts]
+        document_frequency: Dict[str, int] = {}
+        for _, features in documents:
+            for feature in set(features):
+                document_frequency[feature] = document_frequency.get(feature, 0) + 1
+
+        self.routes = list(examples)
+        self.vocabulary = {feature: i for i, feature in enumerate(sorted(document_frequency))}
+        self.idf = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for feature, i in self.vocabulary.items():
+            self.idf[i] = math.log((1 + len(documents)) / (1 + document_frequency[feature])) + 1.0
+
+        self.centroids = np.zeros((len(self.routes), len(self.vocabulary)), dtype=np.float32)
+        route_index = {route: i for i, route in enumerate(self.routes)}
+        for route, features in documents:
+            indices, weights = self._vectorize(features)
+            if len(indices):
+                self.centroids[route_index[route], indices] += weights
+        norms = np.linalg.norm(self.centroids, axis=1, keepdims=True)
+        self.centroids /= np.where(norms == 0, 1.0, norms)
+        return self
+
+    def _vectorize(self, features: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse L2-normalized TF-IDF vector as (indices, weights); unseen features are dropped"""
+        counts: Dict[int, int] = {}
+        for feature in features:
+            i = self.vocabulary.get(feature)
+            if i is not None:
+                counts[i] = counts.get(i, 0) + 1
+        if not counts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = (1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))) * self.idf[indices]
+        return indices, weights / np.linalg.norm(weights)
+
+    def classify_batch(self, messages: Sequence[str]) -> List[RouteDecision]:
+        vectors = [self._vectorize(extract_features(message)) for message in messages]
+        nonempty = [i for i, (indices, _) in enumerate(vectors) if len(indices)]
+        decisions = [_decision(self.default_route, 0.0) for _ in messages]
+        if not nonempty:
+            return decisions
+
+        # Gather every message's centroid columns in one pass, then sum each message's segment
+        indices = np.concatenate([vectors[i][0] for i in nonempty])
+        weights = np.concatenate([vectors[i][1] for i in nonempty])
+        offsets = np.cumsum([0] + [len(vectors[i][0]) for i in nonempty[:-1]])
+        scores = np.add.reduceat(self.centroids[:, indices] * weights, offsets, axis=1).T
+
+        logits = scores / self.temperature
+        probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+
+        for row, i in enumerate(nonempty):
+            confidence = float(probabilities[row, best[row]])
+            route = self.routes[best[row]] if confidence >= self.min_confidence else self.default_route
+            decisions[i] = _decision(route, confidence, {r: float(s) for r, s in zip(self.routes, scores[row])})
+        return decisions
+
+
+class HybridRouter(BaseRouter):
+    """Keyword scan first, TF-IDF classifier for the messages it misses.
+
+    Keyword hits keep confidence 1.0; only misses are classified, and those
+    below ``min_confidence`` still fall back to the default route.
+    """
+
+    def __init__(self, examples: Optional[Dict[str, List[str]]] = None, temperature: float = 0.05,
+                 default_route: str = DEFAULT_ROUTE, min_confidence: float = 0.0):
+        super().__init__(default_route=default_route, min_confidence=min_confidence)
+        self.keyword = KeywordRouter(default_route=default_route)
+        self.tfidf = TfidfRouter(examples, temperature=temperature, default_route=default_route,
+                                 min_confidence=min_confidence)
+
+    def classify_batch(self, messages: Sequence[str]) -> List[RouteDecision]:
+        decisions: List[Optional[RouteDecision]] = []
+        misses = []
+        for i, message in enumerate(messages):
+            route = self.keyword.match(message)
+            if route is None:
+                misses.append(i)
+                decisions.append(None)
+            else:
+                decisions.append(_decision(route, 1.0))
+        if misses:
+            for i, decision in zip(misses, self.tfidf.classify_batch([messages[i] for i in misses])):
+                decisions[i] = decision
+        return decisions
+
+
+# Factory for message routers
+ROUTERS = {
+    'keyword': KeywordRouter,
+    'tfidf': TfidfRouter,
+    'hybrid': HybridRouter,
+}
+
+def get_router(kind: str = 'hybrid', **kwargs) -> BaseRouter:
+    if kind not in ROUTERS:
+        raise ValueError(f"Message router '{kind}' is not available.")
+    return ROUTERS[kind](**kwargs)
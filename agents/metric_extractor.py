@@ -0,0 +1,189 @@
+import re
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# A pattern's value: multiply its first group by a unit scale, a constant, or a custom function of the match
+# (which may return None to discard the match)
+ValueSpec = Union[float, Callable[["re.Match"], Optional[float]]]
+
+# Shared prefix of patterns that start with an amount, e.g. "150 g protein", "2.5 l water"
+AMOUNT = r'(\d+(?:\.\d+)?)\s*'
+NUMBER = r'(\d+(?:\.\d+)?)'
+
+# Separator for batch scans; no metric pattern can match across it
+_BATCH_SEPARATOR = "\x00"
+
+
+class MetricExtractor:
+    """Extracts numeric metrics from free text with a few precompiled regex passes.
+
+    ``patterns`` maps each metric to an ordered list of ``(pass, regex, value)``
+    entries. As with calling ``re.search`` once per pattern, a metric takes the
+    leftmost match of its first pattern that matches anywhere, falling back to
+    later patterns only when earlier ones never match.
+
+    Each pass compiles its patterns (after the pass's shared ``prefix``) into
+    one alternation of named groups, so a pass is a single ``finditer`` over
+    the text. Matches within a pass never overlap; patterns whose matches can
+    overlap ("25 kmph" is both a distance and a speed) belong in different passes.
+    """
+
+    def __init__(self, passes: Dict[str, str], patterns: Dict[str, List[Tuple[str, str, ValueSpec]]]):
+        self.metrics = list(patterns)
+        # branch name -> (metric, priority, full pattern, value converter)
+        self._branches: Dict[str, Tuple[str, int, "re.Pattern", Callable[["re.Match"], Optional[float]]]] = {}
+        alternatives: Dict[str, List[str]] = {name: [] for name in passes}
+        for metric, metric_patterns in patterns.items():
+            for priority, (pass_name, pattern, value) in enumerate(metric_patterns):
+                branch = f"b{len(self._branches)}"
+                self._branches[branch] = (metric, priority, re.compile(passes[pass_name] + pattern), self._converter(value))
+                alternatives[pass_name].append(f"(?P<{branch}>{pattern})")
+
+        self._scanners = [
+            re.compile(f"{passes[name]}(?:{'|'.join(branches)})")
+            for name, branches in alternatives.items() if branches
+        ]
+
+    @staticmethod
+    def _converter(value: ValueSpec) -> Callable[["re.Match"], Optional[float]]:
+        if callable(value):
+            return value
+        return lambda match: float(match.group(1)) * value if match.re.groups else float(value)
+
+    def _scan(self, text: str, offsets: Sequence[int]) -> List[Dict[str, Tuple[int, int, str]]]:
+        """Best match per metric as (priority, position, branch), for each segment starting at ``offsets``"""
+        found: List[Dict[str, Tuple[int, int, str]]] = [{} for _ in offsets]
+        branches = self._branches
+        last = len(offsets) - 1
+        for scanner in self._scanners:
+            # Hits arrive in text order, so the segment index only moves forward
+            index, segment = 0, found[0]
+            for hit in scanner.finditer(text):
+                position = hit.start()
+                if index < last and position >= offsets[index + 1]:
+                    index = bisect_right(offsets, position, index) - 1
+                    segment = found[index]
+                branch = hit.lastgroup
+                metric, priority = branches[branch][:2]
+                best = segment.get(metric)
+                # Lowest priority wins, then the leftmost match
+                if best is None or (priority, position) < best[:2]:
+                    segment[metric] = (priority, position, branch)
+        return found
+
+    def _resolve(self, text: str, matches: Dict[str, Tuple[int, int, str]]) -> Dict[str, float]:
+        result = {}
+        for metric, (_, position, branch) in matches.items():
+            _, _, regex, convert = self._branches[branch]
+            value = convert(regex.match(text, position))
+            if value is not None:
+                result[metric] = value
+        return result
+
+    def extract(self, text: str) -> Dict[str, float]:
+        """Metrics found in ``text`` (lowercased before matching); missing metrics are omitted"""
+        text = text.lower()
+        return self._resolve(text, self._scan(text, [0])[0])
+
+    def extract_batch(self, texts: Sequence[str]) -> List[Dict[str, float]]:
+        """Extract metrics from many texts with one scan per pass over their concatenation"""
+        if not texts:
+            return []
+        offsets: List[int] = []
+        parts: List[str] = []
+        position = 0
+        for text in texts:
+            part = text.lower().replace(_BATCH_SEPARATOR, " ")
+            offsets.append(position)
+            parts.append(part)
+            position += len(part) + len(_BATCH_SEPARATOR)
+        joined = _BATCH_SEPARATOR.join(parts)
+        return [self._resolve(joined, matches) for matches in self._scan(joined, offsets)]
+
+
+MILES_TO_KM = 1.60934
+
+
+def _days_between(times_per_week: int) -> Optional[float]:
+    """Convert sessions per week to days between sessions ("0 times a week" is ignored)"""
+    return 7.0 / times_per_week if times_per_week else None
+
+
+# GoalSettingTool: activity metrics shared by every sport, plus nutrition targets.
+# Speeds and daily calorie targets extend amounts of the first pass ("25 km" in "25 kmph",
+# "2000 calories" in "2000 calories per day"), and the latter can also contain "daily".
+GOAL_PASSES = {"amounts": AMOUNT, "rates": AMOUNT, "phrases": ""}
+
+GOAL_PATTERNS: Dict[str, List[Tuple[str, str, ValueSpec]]] = {
+    "distance": [
+        ("amounts", r'(?:km|kilometers?)', 1.0),
+        ("amounts", r'(?:miles?)', MILES_TO_KM),
+    ],
+    "time": [
+        ("amounts", r'(?:minutes?|mins?)', 1.0),
+        ("amounts", r'(?:hours?|hrs?)', 60.0),
+    ],
+    "speed": [
+        ("rates", r'(?:kmph|km/h|kilometers? per hour)', 1.0),
+        ("rates", r'(?:mph|miles? per hour)', MILES_TO_KM),
+    ],
+    "calories": [
+        ("amounts", r'calories?', 1.0),
+    ],
+    "frequency": [
+        ("phrases", r'(\d+)\s*times?\s*(?:per|a)\s*week', lambda m: _days_between(int(m.group(1)))),
+        ("phrases", r'(\d+)\s*times?\s*weekly', lambda m: _days_between(int(m.group(1)))),
+        ("phrases", r'daily|every day', 1.0),
+    ],
+    "duration": [
+        ("phrases", r'(?:for|over)\s*(\d+)\s*(?:weeks?)', 7.0),
+        ("phrases", r'(?:for|over)\s*(\d+)\s*(?:months?)', 30.0),
+        ("phrases", r'(?:for|over)\s*(\d+)\s*(?:days?)', 1.0),
+    ],
+    "protein": [
+        ("amounts", r'(?:g|grams?)\s*(?:of\s*)?protein', 1.0),
+    ],
+    "carbs": [
+        ("amounts", r'(?:g|grams?)\s*(?:of\s*)?(?:carbs|carbohydrates?)', 1.0),
+    ],
+    "fats": [
+        ("amounts", r'(?:g|grams?)\s*(?:of\s*)?fats?', 1.0),
+    ],
+    "calories_consumed": [
+        ("rates", r'calories?\s*(?:per day|daily|consumed?)', 1.0),
+    ],
+    "water_consumed": [
+        ("amounts", r'(?:ml|milliliters?)\s*(?:of\s*)?water', 1.0),
+        ("amounts", r'(?:l|liters?)\s*(?:of\s*)?water', 1000.0),
+    ],
+}
+
+# NutritionLoggingTool: intake amounts, either "150g protein" or "protein: 150g".
+# A labelled amount can run into an unlabelled one ("protein 150g carbs"), so they are separate passes.
+NUTRITION_LOG_PASSES = {"amounts": AMOUNT, "labels": ""}
+
+NUTRITION_LOG_PATTERNS: Dict[str, List[Tuple[str, str, ValueSpec]]] = {
+    "calories_consumed": [
+        ("amounts", r'(?:calories|kcal|cal)', 1.0),
+    ],
+    "protein": [
+        ("amounts", r'(?:g|grams?)\s*(?:of\s*)?protein', 1.0),
+        ("labels", rf'protein[:\s]*{NUMBER}\s*(?:g|grams?)?', 1.0),
+    ],
+    "carbs": [
+        ("amounts", r'(?:g|grams?)\s*(?:of\s*)?(?:carbs|carbohydrates?)', 1.0),
+        ("labels", rf'(?:carbs|carbohydrates?)[:\s]*{NUMBER}\s*(?:g|grams?)?', 1.0),
+    ],
+    "fats": [
+        ("amounts", r'(?:g|grams?)\s*(?:of\s*)?fats?', 1.0),
+        ("labels", rf'fats?[:\s]*{NUMBER}\s*(?:g|grams?)?', 1.0),
+    ],
+    "water_consumed": [
+        ("amounts", r'(?:ml|milliliters?)\s*(?:of\s*)?water', 1.0),
+        ("amounts", r'(?:l|liters?)\s*(?:of\s*)?water', 1000.0),
+        ("labels", rf'water[:\s]*{NUMBER}\s*(?:ml|milliliters?|l|liters?)?', 1.0),
+    ],
+}
+
+goal_extractor = MetricExtractor(GOAL_PASSES, GOAL_PATTERNS)
+nutrition_log_extractor = MetricExtractor(NUTRITION_LOG_PASSES, NUTRITION_LOG_PATTERNS)
@@ -3,12 +3,13 @@ from spoon_ai.tools import ToolManager
 from spoon_ai.tools.base import BaseTool
 from spoon_ai.chat import ChatBot
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, date
 import json
 import asyncio
-import re
+import numpy as np
 from dotenv import load_dotenv
+from metric_extractor import nutrition_log_extractor
 import json
 import asyncio
 
@@ -42,6 +43,76 @@ class NutritionAnalysis(BaseModel):
     average_water: float
     goal_completion_rate: Dict[str, float]
     recommendations: List[str]
+    variance: Dict[str, float] = Field(default_factory=dict, description="Population variance of each nutrient across logs")
+    rolling_averages: Dict[str, Dict[str, float]] = Field(default_factory=dict, description="Daily averages over the last 7/30 days of dated logs")
+    streaks: Dict[str, Dict[str, int]] = Field(default_factory=dict, description="Current and longest runs of consecutive days logged / on target")
+    days_on_target: Dict[str, float] = Field(default_factory=dict, description="Percentage of logged days within 90-110% of each goal")
+
+# Report name -> log field, in report order
+NUTRIENT_FIELDS = {
+    "calories": "calories_consumed",
+    "protein": "protein",
+    "carbs": "carbs",
+    "fats": "fats",
+    "water": "water_consumed",
+}
+ROLLING_WINDOWS = {"7d": 7, "30d": 30}
+
+class NutritionLogColumns:
+    """Nutrition logs converted once into columns: one float row per log, plus its date (NaT when missing/invalid)
+
+    Missing nutrient values (absent, None or NaN) count as 0, so no NaN reaches the totals or the report.
+    """
+
+    def __init__(self, logs: List[Dict[str, Any]]):
+        fields = list(NUTRIENT_FIELDS.values())
+        self.values = np.fromiter(
+            (self._amount(log.get(field)) for log in logs for field in fields), dtype=np.float64, count=len(logs) * len(fields)
+        ).reshape(len(logs), len(fields))
+        self.values[np.isnan(self.values)] = 0.0
+        dates = [log.get("date") for log in logs]
+        try:
+            self.dates = np.array(dates, dtype="datetime64[D]")
+        except (TypeError, ValueError):
+            self.dates = np.array([self._parse_date(value) for value in dates], dtype="datetime64[D]")
+
+    @staticmethod
+    def _amount(value: Any) -> Any:
+        return 0.0 if value is None else value
+
+    @staticmethod
+    def _parse_date(value: Any) -> np.datetime64:
+        try:
+            return np.datetime64(str(value)[:10], "D")
+        except ValueError:
+            return np.datetime64("NaT")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def totals(self) -> np.ndarray:
+        # Left-to-right accumulation adds in the same order as sum() over the logs, so averages match it exactly
+        return np.add.accumulate(self.values, axis=0)[-1]
+
+    def daily(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(sorted unique days as integers, per-day totals) of the dated logs"""
+        dated = ~np.isnat(self.dates)
+        days = self.dates[dated].astype(np.int64)
+        order = np.argsort(days, kind="stable")
+        days, values = days[order], self.values[dated][order]
+        if not len(days):
+            return days, values
+        starts = np.flatnonzero(np.r_[True, np.diff(days) != 0])
+        return days[starts], np.add.reduceat(values, starts, axis=0)
+
+def _runs(days: np.ndarray, mask: np.ndarray) -> Dict[str, int]:
+    """Current (ending at the last logged day) and longest run of consecutive calendar days where ``mask`` holds"""
+    if not mask.any():
+        return {"current": 0, "longest": 0}
+    continues = np.r_[False, mask[:-1] & (np.diff(days) == 1)]
+    run_ids = np.cumsum(mask & ~continues)[mask]
+    lengths = np.bincount(run_ids)[1:]
+    return {"current": int(lengths[-1]) if mask[-1] else 0, "longest": int(lengths.max())}
 
 # ---------------------------- Nutrition Analysis Tool ----------------------------
 class NutritionAnalysisTool(BaseTool):
@@ -80,7 +151,7 @@ class NutritionAnalysisTool(BaseTool):
                 return "❌ No nutrition logs provided for analysis. Please log your daily nutrition intake first."
 
             # Analyze the logs
-            analysis = self._analyze_logs(nutrition_logs)
+            analysis = self._analyze_logs(nutrition_logs, nutrition_goal)
             
             # Calculate goal completion if goals are provided
             if nutrition_goal:
@@ -92,19 +163,16 @@ class NutritionAnalysisTool(BaseTool):
         except Exception as e:
             return f"❌ Error analyzing nutrition data: {str(e)}"
 
-    def _analyze_logs(self, logs: List[Dict[str, Any]]) -> NutritionAnalysis:
+    def _analyze_logs(self, logs: List[Dict[str, Any]], goal: Optional[Dict[str, Any]] = None) -> NutritionAnalysis:
         """Analyze nutrition logs and generate statistical summary"""
         if not logs:
             return None
-            
-        total_days = len(logs)
+
+        columns = NutritionLogColumns(logs)
+        total_days = len(columns)
         
         # Calculate averages
-        avg_calories = sum(log.get("calories_consumed", 0) for log in logs) / total_days
-        avg_protein = sum(log.get("protein", 0) for log in logs) / total_days
-        avg_carbs = sum(log.get("carbs", 0) for log in logs) / total_days
-        avg_fats = sum(log.get("fats", 0) for log in logs) / total_days
-        avg_water = sum(log.get("water_consumed", 0) for log in logs) / total_days
+        avg_calories, avg_protein, avg_carbs, avg_fats, avg_water = (columns.totals() / total_days).tolist()
         
         # Generate basic recommendations
         recommendations = []
@@ -125,32 +193,57 @@ class NutritionAnalysisTool(BaseTool):
         elif avg_calories > 3000:
             recommendations.append("Monitor calorie intake if weight management is a goal")
         
-        return NutritionAnalysis(
+        analysis = NutritionAnalysis(
             average_calories=avg_calories,
             average_protein=avg_protein,
             average_carbs=avg_carbs,
             average_fats=avg_fats,
             average_water=avg_water,
             goal_completion_rate={},
-            recommendations=recommendations
+            recommendations=recommendations,
+            variance=dict(zip(NUTRIENT_FIELDS, columns.values.var(axis=0).tolist())),
         )
+        self._analyze_trends(columns, goal, analysis)
+        return analysis
+
+    def _analyze_trends(self, columns: NutritionLogColumns, goal: Optional[Dict[str, Any]], analysis: NutritionAnalysis) -> None:
+        """Rolling windows, streaks and per-day goal hit rates over the dated logs (several logs on one date are summed)"""
+        days, daily = columns.daily()
+        if not len(days):
+            return
+
+        # Windows end at the most recent logged day and average over the days that have logs
+        cumulative = np.vstack([np.zeros(len(NUTRIENT_FIELDS)), np.cumsum(daily, axis=0)])
+        for name, length in ROLLING_WINDOWS.items():
+            start = np.searchsorted(days, days[-1] - length + 1)
+            window = (cumulative[-1] - cumulative[start]) / (len(days) - start)
+            analysis.rolling_averages[name] = dict(zip(NUTRIENT_FIELDS, window.tolist()))
+
+        analysis.streaks["logging"] = _runs(days, np.ones(len(days), dtype=bool))
+        targets = self._goal_targets(goal or {})
+        for i, (nutrient, target) in enumerate(zip(NUTRIENT_FIELDS, targets)):
+            if target:
+                # Rounded as goal_completion_rate is, so a day shown as 110% counts as on target
+                ratio = np.array([round(rate, 1) for rate in (daily[:, i] / target * 100).tolist()])
+                on_target = (ratio >= 90) & (ratio <= 110)
+                analysis.streaks[nutrient] = _runs(days, on_target)
+                analysis.days_on_target[nutrient] = round(float(on_target.mean()) * 100, 1)
+
+    @staticmethod
+    def _goal_targets(goal: Dict[str, Any]) -> np.ndarray:
+        """Goal values in NUTRIENT_FIELDS order, 0 where no goal is set"""
+        return np.array([goal.get(field) or 0 for field in NUTRIENT_FIELDS.values()], dtype=np.float64)
 
     def _calculate_goal_completion(self, goal: Dict[str, Any], analysis: NutritionAnalysis) -> Dict[str, float]:
         """Calculate completion rates for each nutrition goal"""
-        completion_rates = {}
-        
-        if goal.get('calories_consumed'):
-            completion_rates['calories'] = round((analysis.average_calories / goal['calories_consumed']) * 100, 1)
-        if goal.get('protein'):
-            completion_rates['protein'] = round((analysis.average_protein / goal['protein']) * 100, 1)
-        if goal.get('carbs'):
-            completion_rates['carbs'] = round((analysis.average_carbs / goal['carbs']) * 100, 1)
-        if goal.get('fats'):
-            completion_rates['fats'] = round((analysis.average_fats / goal['fats']) * 100, 1)
-        if goal.get('water_consumed'):
-            completion_rates['water'] = round((analysis.average_water / goal['water_consumed']) * 100, 1)
-            
-        return completion_rates
+        targets = self._goal_targets(goal)
+        averages = np.array([analysis.average_calories, analysis.average_protein, analysis.average_carbs,
+                             analysis.average_fats, analysis.average_water])
+        has_goal = targets != 0
+        rates = averages[has_goal] / targets[has_goal] * 100
+        nutrients = [nutrient for nutrient, set_ in zip(NUTRIENT_FIELDS, has_goal) if set_]
+        # Python's round() (not np.round) so rates match the per-nutrient formula exactly
+        return {nutrient: round(rate, 1) for nutrient, rate in zip(nutrients, rates.tolist())}
 
     def _generate_feedback(self, goal: Dict[str, Any], logs: List[Dict[str, Any]], analysis: NutritionAnalysis, question: str) -> str:
         """Generate comprehensive nutrition feedback"""
@@ -183,6 +276,17 @@ class NutritionAnalysisTool(BaseTool):
             response += f"  • Carbs: {carbs_pct:.1f}% (recommended: 45-60%)\n"
             response += f"  • Fats: {fats_pct:.1f}% (recommended: 20-35%)\n\n"
         
+        # Trends over dated logs
+        logging_streak = analysis.streaks.get("logging")
+        if logging_streak and logging_streak["longest"] > 1:
+            recent = analysis.rolling_averages["7d"]
+            response += "📅 **Trends:**\n"
+            response += f"  • Last 7 days: {recent['calories']:.0f} kcal, {recent['protein']:.1f}g protein, {recent['water']:.0f}ml water per day\n"
+            response += f"  • Logging streak: {logging_streak['current']} days (longest {logging_streak['longest']})\n"
+            for nutrient, rate in analysis.days_on_target.items():
+                response += f"  • {nutrient.title()} on target {rate}% of days (current streak {analysis.streaks[nutrient]['current']})\n"
+            response += "\n"
+        
         # Recommendations
         if analysis.recommendations:
             response += "💡 **Recommendations:**\n"
@@ -245,37 +349,38 @@ class NutritionLoggingTool(BaseTool):
         Parse nutrition intake from natural language and create a log entry
         """
         try:
-            if not date:
-                date = datetime.now().strftime("%Y-%m-%d")
-            
-            # Parse nutrition information from user input
-            nutrition_data = self._parse_nutrition_input(user_input)
-            
-            # Create nutrition log
-            nutrition_log = {
-                "date": date,
-                **nutrition_data
-            }
-            
-            # Format response
-            response = f"📝 **Nutrition Log Created for {date}**\n\n"
-            response += f"🍽️ **Intake Summary:**\n"
-            response += f"  • Calories: {nutrition_data['calories_consumed']} kcal\n"
-            response += f"  • Protein: {nutrition_data['protein']}g\n"
-            response += f"  • Carbohydrates: {nutrition_data['carbs']}g\n"
-            response += f"  • Fats: {nutrition_data['fats']}g\n"
-            response += f"  • Water: {nutrition_data['water_consumed']}ml\n\n"
-            response += f"💾 **Log Data:**\n```json\n{json.dumps(nutrition_log, indent=2)}\n```"
-            
-            return response
-            
+            return self.format_log(self.create_log(user_input, date))
         except Exception as e:
             return f"❌ Error logging nutrition data: {str(e)}"
 
+    def format_log(self, nutrition_log: Dict[str, Any]) -> str:
+        """Reply describing a created log entry"""
+        response = f"📝 **Nutrition Log Created for {nutrition_log['date']}**\n\n"
+        response += f"🍽️ **Intake Summary:**\n"
+        response += f"  • Calories: {nutrition_log['calories_consumed']} kcal\n"
+        response += f"  • Protein: {nutrition_log['protein']}g\n"
+        response += f"  • Carbohydrates: {nutrition_log['carbs']}g\n"
+        response += f"  • Fats: {nutrition_log['fats']}g\n"
+        response += f"  • Water: {nutrition_log['water_consumed']}ml\n\n"
+        response += f"💾 **Log Data:**\n```json\n{json.dumps(nutrition_log, indent=2)}\n```"
+        return response
+
+    def create_log(self, user_input: str, date: str = None) -> Dict[str, Any]:
+        """Parse a natural-language entry into a nutrition log dict (date defaults to today)"""
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
+        return {"date": date, **self._parse_nutrition_input(user_input)}
+
     def _parse_nutrition_input(self, text: str) -> Dict[str, float]:
         """Parse nutrition information from natural language input"""
-        import re
-        
+        return self._complete_nutrition(text.lower(), nutrition_log_extractor.extract(text))
+
+    def parse_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Parse many nutrition descriptions (e.g. historical log lines) with a single extraction pass"""
+        extracted = nutrition_log_extractor.extract_batch(texts)
+        return [self._complete_nutrition(text.lower(), found) for text, found in zip(texts, extracted)]
+
+    def _complete_nutrition(self, text: str, found: Dict[str, float]) -> Dict[str, float]:
         # Initialize with default values
         nutrition = {
             "protein": 0.0,
@@ -284,66 +389,7 @@ class NutritionLoggingTool(BaseTool):
             "calories_consumed": 0.0,
             "water_consumed": 0.0
         }
-        
-        text = text.lower()
-        
-        # Parse calories
-        calories_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:calories|kcal|cal)',
-        ]
-        for pattern in calories_patterns:
-            match = re.search(pattern, text)
-            if match:
-                nutrition["calories_consumed"] = float(match.group(1))
-                break
-        
-        # Parse protein
-        protein_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:g|grams?)\s*(?:of\s*)?protein',
-            r'protein[:\s]*(\d+(?:\.\d+)?)\s*(?:g|grams?)?',
-        ]
-        for pattern in protein_patterns:
-            match = re.search(pattern, text)
-            if match:
-                nutrition["protein"] = float(match.group(1))
-                break
-        
-        # Parse carbs
-        carbs_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:g|grams?)\s*(?:of\s*)?(?:carbs|carbohydrates?)',
-            r'(?:carbs|carbohydrates?)[:\s]*(\d+(?:\.\d+)?)\s*(?:g|grams?)?',
-        ]
-        for pattern in carbs_patterns:
-            match = re.search(pattern, text)
-            if match:
-                nutrition["carbs"] = float(match.group(1))
-                break
-        
-        # Parse fats
-        fats_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:g|grams?)\s*(?:of\s*)?fats?',
-            r'fats?[:\s]*(\d+(?:\.\d+)?)\s*(?:g|grams?)?',
-        ]
-        for pattern in fats_patterns:
-            match = re.search(pattern, text)
-            if match:
-                nutrition["fats"] = float(match.group(1))
-                break
-        
-        # Parse water
-        water_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(?:ml|milliliters?)\s*(?:of\s*)?water',
-            r'(\d+(?:\.\d+)?)\s*(?:l|liters?)\s*(?:of\s*)?water',
-            r'water[:\s]*(\d+(?:\.\d+)?)\s*(?:ml|milliliters?|l|liters?)?',
-        ]
-        for pattern in water_patterns:
-            match = re.search(pattern, text)
-            if match:
-                water = float(match.group(1))
-                if 'l' in pattern and 'ml' not in pattern:
-                    water *= 1000  # Convert liters to milliliters
-                nutrition["water_consumed"] = water
-                break
+        nutrition.update(found)
         
         # If no explicit values found, try to estimate from food descriptions
         if all(v == 0.0 for v in nutrition.values()):
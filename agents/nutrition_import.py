@@ -0,0 +1,253 @@
+import asyncio
+import codecs
+import csv
+import json
+from collections import deque
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from nutrition_bot import NutritionLoggingTool
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# Column/field names accepted for the free-text entry and its date
+TEXT_FIELDS = ("user_input", "text", "entry", "description")
+DATE_FIELDS = ("date", "day")
+
+# Structured amounts in a record override what is parsed from its text
+NUMERIC_FIELDS = {
+    "calories_consumed": ("calories_consumed", "calories", "kcal"),
+    "protein": ("protein",),
+    "carbs": ("carbs", "carbohydrates"),
+    "fats": ("fats", "fat"),
+    "water_consumed": ("water_consumed", "water"),
+}
+
+_logging_tool = NutritionLoggingTool()
+
+
+class ImportLineError(ValueError):
+    """A line of an import that cannot be turned into a nutrition log"""
+
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> str:
+    """Guess the upload format from its content type or file name, defaulting to NDJSON"""
+    if (content_type and "csv" in content_type.lower()) or (filename and filename.lower().endswith(".csv")):
+        return "csv"
+    return "ndjson"
+
+
+async def iter_lines(chunks: AsyncIterable[bytes], encoding: str = "utf-8-sig") -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering the whole body (a leading BOM is dropped)"""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _first(record: Dict[str, Any], names: Tuple[str, ...]) -> Any:
+    for name in names:
+        value = record.get(name)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _normalize_record(record: Dict[str, Any]) -> Tuple[str, str, Dict[str, float]]:
+    """(text, date, structured amounts) of one record"""
+    record = {str(k).strip().lower(): v for k, v in record.items() if k is not None}
+    text = _first(record, TEXT_FIELDS)
+    text = "" if text is None else str(text)
+
+    date = _first(record, DATE_FIELDS)
+    if date is None:
+        date = datetime.now().strftime("%Y-%m-%d")
+    else:
+        date = str(date).strip()
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            raise ImportLineError(f"invalid date '{date}', expected YYYY-MM-DD")
+
+    amounts = {}
+    for metric, names in NUMERIC_FIELDS.items():
+        value = _first(record, names)
+        if value is not None:
+            try:
+                amounts[metric] = float(value)
+            except (TypeError, ValueError):
+                raise ImportLineError(f"invalid {metric} '{value}'")
+
+    if not text and not amounts:
+        raise ImportLineError(f"no entry text (one of {', '.join(TEXT_FIELDS)}) or amounts")
+    return text, date, amounts
+
+
+def _parse_ndjson(line: str) -> Tuple[str, str, Dict[str, float]]:
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ImportLineError(f"invalid JSON: {e.msg}")
+    if isinstance(record, str):
+        record = {"user_input": record}
+    if not isinstance(record, dict):
+        raise ImportLineError("expected a JSON object or string")
+    return _normalize_record(record)
+
+
+# Quote-tracking states of _CsvParser, mirroring those of the csv module's default dialect
+_START_FIELD, _IN_FIELD, _IN_QUOTED_FIELD, _QUOTE_IN_QUOTED_FIELD = range(4)
+
+
+class _CsvParser:
+    """Parses CSV lines as they arrive; the first non-empty record is the header
+
+    Lines are fed to one ``csv.reader``, so quoted fields may span lines. A line
+    that leaves a quoted field open returns None and sets ``pending`` until the
+    line closing it arrives.
+    """
+
+    def __init__(self):
+        self.header: Optional[List[str]] = None
+        self._lines: deque = deque()
+        self._state = _START_FIELD
+        self._reader = csv.reader(self)
+
+    @property
+    def pending(self) -> bool:
+        """Whether a record is waiting for the rest of a multi-line quoted field"""
+        return bool(self._lines)
+
+    def __iter__(self) -> "_CsvParser":
+        return self
+
+    def __next__(self) -> str:
+        # Input of the reader; it is only advanced once a whole record has been queued
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+    def _scan(self, line: str) -> None:
+        """Advance the quote state over a line, as csv.reader does
+
+        A quote opens a quoted field only at the start of a field; elsewhere it is
+        a literal character (6" sub). Inside a quoted field "" is an escaped quote.
+        """
+        state = self._state
+        if '"' not in line and state not in (_IN_QUOTED_FIELD, _QUOTE_IN_QUOTED_FIELD):
+            self._state = _START_FIELD
+            return
+        for char in line:
+            if state == _IN_QUOTED_FIELD:
+                if char == '"':
+                    state = _QUOTE_IN_QUOTED_FIELD
+            elif state == _QUOTE_IN_QUOTED_FIELD:
+                state = _IN_QUOTED_FIELD if char == '"' else _START_FIELD if char == ',' else _IN_FIELD
+            elif char == ',':
+                state = _START_FIELD
+            elif state == _START_FIELD and char == '"':
+                state = _IN_QUOTED_FIELD
+            else:
+                state = _IN_FIELD
+        self._state = state
+
+    def __call__(self, line: str) -> Optional[Tuple[str, str, Dict[str, float]]]:
+        self._lines.append(line + "\n")
+        self._scan(line)
+        if self._state == _IN_QUOTED_FIELD:
+            # The line break belongs to the open quoted field
+            return None
+        self._state = _START_FIELD
+        try:
+            row = next(self._reader)
+        finally:
+            self._lines.clear()
+        if self.header is None:
+            self.header = [column.strip().lower() for column in row]
+            return None
+        if len(row) > len(self.header):
+            raise ImportLineError(f"expected {len(self.header)} columns, got {len(row)}")
+        return _normalize_record(dict(zip(self.header, row)))
+
+
+async def _flush(batch: List[Tuple[int, str, str, Dict[str, float]]],
+                 on_batch: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]]) -> List[Dict[str, Any]]:
+    """Parse the texts of a batch in one extraction pass and build their logs"""
+    results = []
+    parsed = _logging_tool.parse_batch([text for _, text, _, _ in batch])
+    for (line_number, text, date, amounts), nutrition in zip(batch, parsed):
+        # Structured amounts win over the text; amounts-only rows skip the food-description estimate
+        if amounts:
+            nutrition = {**(nutrition if text else dict.fromkeys(NUMERIC_FIELDS, 0.0)), **amounts}
+        results.append({"line": line_number, "status": "ok", "log": {"date": date, **nutrition}})
+    if on_batch is not None:
+        await on_batch([result["log"] for result in results])
+    return results
+
+
+async def import_nutrition_logs(lines: AsyncIterable[str], fmt: str = "ndjson", batch_size: int = 500,
+                                on_batch: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Stream-parse uploaded nutrition entries without calling the LLM
+
+    Args:
+        lines: Lines of the upload
+        fmt: "ndjson" (objects with user_input/date and optional amounts, or bare strings)
+             or "csv" (header row naming the same fields)
+        batch_size: Entries parsed per extraction pass
+        on_batch: Called with the logs of each parsed batch before their results are yielded (e.g. to store them)
+
+    Yields:
+        One result per entry line ({"line", "status": "ok", "log"} or {"line", "status": "error", "error"}),
+        then a {"summary": {...}} record. Errors are reported as soon as a line is read and parsed
+        entries once their batch is, so results are not strictly in line order.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}', expected one of {', '.join(IMPORT_FORMATS)}")
+    parse_line = _parse_ndjson if fmt == "ndjson" else _CsvParser()
+
+    summary = {"lines": 0, "ok": 0, "errors": 0}
+    batch: List[Tuple[int, str, str, Dict[str, float]]] = []
+    line_number = 0
+    record_line = 0
+    async for line in lines:
+        line_number += 1
+        # Lines continuing a multi-line CSV record (blank ones included) belong to the line it started on
+        if not (fmt == "csv" and parse_line.pending):
+            record_line = line_number
+            if not line.strip():
+                continue
+        try:
+            parsed = parse_line(line)
+        except (ImportLineError, csv.Error) as e:
+            summary["lines"] += 1
+            summary["errors"] += 1
+            yield {"line": record_line, "status": "error", "error": str(e)}
+            continue
+        if parsed is None:
+            continue
+        summary["lines"] += 1
+        batch.append((record_line, *parsed))
+        if len(batch) >= batch_size:
+            for result in await _flush(batch, on_batch):
+                summary["ok"] += 1
+                yield result
+            batch = []
+            # Parsing is CPU-bound; let other requests run between batches
+            await asyncio.sleep(0)
+
+    if fmt == "csv" and parse_line.pending:
+        summary["lines"] += 1
+        summary["errors"] += 1
+        yield {"line": record_line, "status": "error", "error": "unterminated quoted field"}
+
+    if batch:
+        for result in await _flush(batch, on_batch):
+            summary["ok"] += 1
+            yield result
+    yield {"summary": summary}
@@ -0,0 +1,109 @@
+import sqlite3
+import threading
+import time
+from datetime import date as date_type, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+# Stored amounts, in NutritionLog field names
+NUTRIENTS = ("protein", "carbs", "fats", "calories_consumed", "water_consumed")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS nutrition_logs (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    {", ".join(f"{n} REAL NOT NULL DEFAULT 0" for n in NUTRIENTS)},
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_nutrition_logs_user_date ON nutrition_logs (user_id, date);
+CREATE TABLE IF NOT EXISTS nutrition_daily (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    entries INTEGER NOT NULL,
+    {", ".join(f"{n} REAL NOT NULL" for n in NUTRIENTS)},
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = ", ".join(NUTRIENTS)
+
+_INSERT_LOG = f"INSERT INTO nutrition_logs (user_id, date, {_COLUMNS}, created_at) VALUES (?, ?, {', '.join('?' for _ in NUTRIENTS)}, ?)"
+
+# Daily totals are maintained on write, so reads never re-aggregate raw entries
+_UPSERT_DAILY = (
+    f"INSERT INTO nutrition_daily (user_id, date, entries, {_COLUMNS}) VALUES (?, ?, 1, {', '.join('?' for _ in NUTRIENTS)}) "
+    f"ON CONFLICT (user_id, date) DO UPDATE SET entries = entries + 1, "
+    + ", ".join(f"{n} = {n} + excluded.{n}" for n in NUTRIENTS)
+)
+
+
+class NutritionLogStore:
+    """SQLite store of per-user nutrition logs.
+
+    Raw entries live in ``nutrition_logs`` (indexed on (user_id, date)) and
+    every write also folds the entry into ``nutrition_daily``, one row of
+    running totals per user and day. Range queries are served from either
+    table with an index range scan, so the cost of a query depends on the
+    window asked for, not on the length of the user's history.
+
+    Calls are blocking; async callers should run them in a thread
+    (``asyncio.to_thread``). A single connection is shared behind a lock.
+    """
+
+    def __init__(self, path: str = "nutrition_logs.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _row(user_id: str, log: Dict[str, Any]) -> tuple:
+        day = str(log.get("date") or date_type.today().isoformat())[:10]
+        date_type.fromisoformat(day)  # raises ValueError on malformed dates
+        return (user_id, day, *(float(log.get(n) or 0) for n in NUTRIENTS))
+
+    def add_many(self, user_id: str, logs: Iterable[Dict[str, Any]]) -> int:
+        """Store logs (``{"date": "YYYY-MM-DD", "protein": ..., ...}``) for a user in one transaction
+
+        Returns:
+            Number of logs stored
+        """
+        rows = [self._row(user_id, log) for log in logs]
+        if not rows:
+            return 0
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(_INSERT_LOG, [(*row, now) for row in rows])
+            self._conn.executemany(_UPSERT_DAILY, rows)
+        return len(rows)
+
+    def add(self, user_id: str, log: Dict[str, Any]) -> None:
+        self.add_many(user_id, [log])
+
+    def _query(self, table: str, columns: str, user_id: str, start: Optional[str], end: Optional[str]) -> List[Dict[str, Any]]:
+        sql = f"SELECT {columns} FROM {table} WHERE user_id = ? AND date >= ? AND date <= ? ORDER BY date"
+        with self._lock:
+            rows = self._conn.execute(sql, (user_id, start or "", end or "9999-12-31")).fetchall()
+        return [dict(row) for row in rows]
+
+    def logs(self, user_id: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Raw entries of a user between two dates (inclusive, YYYY-MM-DD), oldest first"""
+        return self._query("nutrition_logs", f"date, {_COLUMNS}", user_id, start, end)
+
+    def daily(self, user_id: str, start: Optional[str] = None, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-day totals of a user between two dates (inclusive), oldest first, as NutritionLog-shaped dicts"""
+        return self._query("nutrition_daily", f"date, entries, {_COLUMNS}", user_id, start, end)
+
+    def recent_daily(self, user_id: str, days: int, end: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Per-day totals over the ``days`` days ending at ``end`` (default today)"""
+        end_date = date_type.fromisoformat(end) if end else date_type.today()
+        start_date = end_date - timedelta(days=days - 1)
+        return self.daily(user_id, start_date.isoformat(), end_date.isoformat())
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,190 @@
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from logging import getLogger
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = getLogger(__name__)
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case-fold and collapse whitespace/trailing punctuation so trivial variants share a key"""
+    text = re.sub(r"\s+", " ", prompt.lower()).strip()
+    return text.rstrip(" .!?")
+
+
+def openai_embedder(model: str = "text-embedding-3-small", api_key: Optional[str] = None,
+                    base_url: Optional[str] = None) -> Embedder:
+    """Embedding function for the semantic tier backed by the OpenAI embeddings API
+
+    Requests go through the shared LLMClientRegistry client, so they reuse its
+    connection pool. The client is looked up per call because the registry is
+    configured, and closed, by the server lifespan after this is created.
+    """
+    from spoon_ai.llm.client_registry import LLMClientRegistry
+
+    async def embed(text: str) -> List[float]:
+        client = LLMClientRegistry.get("openai", api_key=api_key or os.getenv("OPENAI_API_KEY"), base_url=base_url)
+        response = await client.embeddings.create(model=model, input=text)
+        return response.data[0].embedding
+
+    return embed
+
+
+class _SemanticIndex:
+    """Unit-normalized embeddings of cached prompts for one (agent_type, model) namespace"""
+
+    def __init__(self, dim: int):
+        self.matrix = np.zeros((16, dim), dtype=np.float32)
+        self.keys: List[Optional[str]] = []
+        self.rows: Dict[str, int] = {}
+        self.free_rows: List[int] = []
+
+    def add(self, key: str, vector: np.ndarray) -> None:
+        if key in self.rows:
+            self.matrix[self.rows[key]] = vector
+            return
+        if self.free_rows:
+            row = self.free_rows.pop()
+            self.keys[row] = key
+        else:
+            if len(self.keys) == len(self.matrix):
+                self.matrix = np.vstack([self.matrix, np.zeros_like(self.matrix)])
+            row = len(self.keys)
+            self.keys.append(key)
+        self.rows[key] = row
+        self.matrix[row] = vector
+
+    def remove(self, key: str) -> None:
+        row = self.rows.pop(key, None)
+        if row is not None:
+            self.keys[row] = None
+            self.matrix[row] = 0.0
+            self.free_rows.append(row)
+
+    def nearest(self, vector: np.ndarray) -> Tuple[Optional[str], float]:
+        if not self.rows:
+            return None, 0.0
+        scores = self.matrix[:len(self.keys)] @ vector
+        row = int(np.argmax(scores))
+        return self.keys[row], float(scores[row])
+
+
+class ResponseCache:
+    """TTL + LRU cache of agent responses for stateless requests.
+
+    The exact tier is keyed on (agent type, model, normalized prompt). When an
+    ``embed`` function is given, a semantic tier also serves a cached response
+    whose prompt embedding has cosine similarity >= ``similarity_threshold``.
+    """
+
+    def __init__(self, ttl: float = 600.0, max_entries: int = 1024,
+                 embed: Optional[Embedder] = None, similarity_threshold: float = 0.95):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        # key -> (expires_at, namespace, response)
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[str, str], str]]" = OrderedDict()
+        self._semantic: Dict[Tuple[str, str], _SemanticIndex] = {}
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(agent_type: str, model: str, prompt: str) -> str:
+        raw = f"{agent_type}\x00{model}\x00{normalize_prompt(prompt)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[1] in self._semantic:
+            self._semantic[entry[1]].remove(key)
+
+    def _get_entry(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def get(self, agent_type: str, model: str, prompt: str) -> Optional[str]:
+        """Exact-tier lookup only"""
+        response = self._get_entry(self.make_key(agent_type, model, prompt))
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def set(self, agent_type: str, model: str, prompt: str, response: str,
+            embedding: Optional[np.ndarray] = None) -> None:
+        key = self.make_key(agent_type, model, prompt)
+        namespace = (agent_type, model)
+        self._entries[key] = (time.monotonic() + self.ttl, namespace, response)
+        self._entries.move_to_end(key)
+        if embedding is not None:
+            index = self._semantic.get(namespace)
+            if index is None:
+                index = self._semantic[namespace] = _SemanticIndex(len(embedding))
+            index.add(key, embedding)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    async def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await self.embed(normalize_prompt(prompt)), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed, using exact tier only: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    async def get_or_compute(self, agent_type: str, model: str, prompt: str,
+                             compute: Callable[[], Awaitable[str]]) -> str:
+        """Return a cached response or compute, cache and return a fresh one"""
+        key = self.make_key(agent_type, model, prompt)
+        response = self._get_entry(key)
+        if response is not None:
+            self.hits += 1
+            return response
+
+        embedding = None
+        if self.embed is not None:
+            embedding = await self._embed(prompt)
+            index = self._semantic.get((agent_type, model))
+            if embedding is not None and index is not None:
+                nearest_key, score = index.nearest(embedding)
+                if nearest_key is not None and score >= self.similarity_threshold:
+                    response = self._get_entry(nearest_key)
+                    if response is not None:
+                        self.semantic_hits += 1
+                        return response
+
+        self.misses += 1
+        response = await compute()
+        self.set(agent_type, model, prompt, response, embedding=embedding)
+        return response
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._semantic.clear()
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+        }
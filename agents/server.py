@@ -1,43 +1,260 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
 import asyncio
 import json
+import os
 from datetime import datetime
 
 # Import the bot agents
 from goal_setting_bot import GoalSettingAgent
 from nutrition_bot import NutritionAgent
-from injury_bot import InjuryAgent
+from injury_bot import InjuryAgent, InjuryPreventionTool
 from community_bot import CommunityAgent
-from spoon_ai.chat import ChatBot
+from spoon_ai.chat import ChatBot, Memory
+from spoon_ai.llm.client_registry import LLMClientRegistry
+from spoon_ai.llm.resilience import ResiliencePolicy, llm_metrics
+from agent_pool import AgentPool
+from session_store import SessionStore, get_session_store
+from response_cache import ResponseCache, openai_embedder
+from message_router import BaseRouter, KeywordRouter, RouteDecision, ROUTE_EXAMPLES, get_router
+from nutrition_import import IMPORT_FORMATS, detect_format, import_nutrition_logs, iter_lines
+from nutrition_store import NutritionLogStore
+from nutrition_bot import NutritionLoggingTool
+from leaderboard import WORKOUTS, community_leaderboards
+from single_flight import SingleFlight, make_flight_key
 
-# Initialize bot agents globally
-goal_agent = None
-nutrition_agent = None
-injury_agent = None
-community_agent = None
+LLM_PROVIDER = "openai"
+LLM_MODEL = "gpt-4o-mini"
+
+# Per-session agent pools, keyed by agent type
+AGENT_POOL_MAX_SIZE = 256
+AGENT_POOL_IDLE_TTL = 3600.0
+# Approximate prompt-history budget per session, oldest turns are evicted first
+AGENT_MEMORY_MAX_TOKENS = 8000
+
+# Connection pool shared by every LLM client in the process
+LLM_MAX_CONNECTIONS = 100
+LLM_MAX_KEEPALIVE_CONNECTIONS = 20
+LLM_KEEPALIVE_EXPIRY = 30.0
+
+# Per-attempt deadline and retries for LLM calls; hedging sends a second request once
+# the first is slower than the observed p95 (roughly doubles cost for the slowest 5%)
+LLM_RESILIENCE = ResiliencePolicy(
+    attempt_timeout=60.0,
+    max_attempts=3,
+    hedge=False,
+    hedge_quantile=0.95,
+)
+
+agent_pools: Dict[str, AgentPool] = {}
+
+# Worker processes (`python server.py`; see gunicorn.conf.py for gunicorn). Several workers need a
+# shared session store so any worker can resume a session: "sqlite" (workers on one machine,
+# SESSION_STORE_OPTIONS = {"path": ...}) or "redis" (any Redis-compatible server, {"url": ...}).
+# None keeps sessions in the worker's own memory. gunicorn.conf.py passes its worker count in the
+# SERVER_WORKERS environment variable. Tracked communities and challenges (leaderboards) are kept
+# per process, so their endpoints answer 503 when there is more than one worker.
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+SESSION_STORE: Optional[str] = None
+SESSION_STORE_OPTIONS: Dict[str, Any] = {"path": "agent_sessions.db"}
+
+session_store: Optional[SessionStore] = None
+
+# /api/chat routing: "hybrid" (keyword scan, TF-IDF for the messages it misses), "keyword" (first-match
+# keyword scan) or "tfidf" (trained on ROUTE_EXAMPLES and the agent descriptions).
+# TF-IDF predictions below MESSAGE_ROUTER_MIN_CONFIDENCE go to the goal agent
+MESSAGE_ROUTER = "hybrid"
+MESSAGE_ROUTER_MIN_CONFIDENCE = 0.4
+
+message_router: BaseRouter = KeywordRouter()
+
+# Response cache for stateless endpoints; set RESPONSE_CACHE_SEMANTIC to also match near-duplicate prompts
+RESPONSE_CACHE_TTL = 600.0
+RESPONSE_CACHE_MAX_ENTRIES = 2048
+RESPONSE_CACHE_SEMANTIC = False
+RESPONSE_CACHE_SIMILARITY = 0.95
+
+# Concurrent requests to these endpoints whose key fields are equal (strings normalized as for
+# the response cache) wait on one in-flight run and share its result; remove an endpoint to disable
+SINGLE_FLIGHT_KEYS: Dict[str, Tuple[str, ...]] = {
+    "community_insights": ("message", "community_id", "community_data"),
+    "community_motivation": ("message", "community_id", "community_data"),
+    "set_goals": ("user_input", "polish"),
+    "injury_prevention": ("user_profile", "question", "activity", "polish"),
+    "injury_recovery": ("user_profile", "question", "injury_details", "polish"),
+}
+
+single_flight = SingleFlight()
+
+# Endpoints that imply their tool run it directly; polishing adds one LLM pass over the tool output
+DIRECT_TOOL_POLISH = False
+
+# Bulk nutrition imports are parsed locally (no LLM), this many entries per extraction pass
+NUTRITION_IMPORT_BATCH_SIZE = 500
+NUTRITION_IMPORT_CHUNK_SIZE = 64 * 1024
+
+# Per-user nutrition logs; /api/nutrition/analyze reads the last NUTRITION_ANALYSIS_WINDOW_DAYS days
+# of daily totals when the request carries a user_id instead of nutrition_logs
+NUTRITION_STORE_PATH = "nutrition_logs.db"
+NUTRITION_ANALYSIS_WINDOW_DAYS = 30
+
+nutrition_store: Optional[NutritionLogStore] = None
+nutrition_logging_tool = NutritionLoggingTool()
+injury_prevention_tool = InjuryPreventionTool()
+
+response_cache = ResponseCache(
+    ttl=RESPONSE_CACHE_TTL,
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    embed=openai_embedder() if RESPONSE_CACHE_SEMANTIC else None,
+    similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+)
+
+def check_worker_config() -> None:
+    """Refuse to start several workers that would each keep their own sessions"""
+    if SERVER_WORKERS > 1 and SESSION_STORE is None:
+        raise RuntimeError("SERVER_WORKERS > 1 needs a shared SESSION_STORE, or sessions would be split across workers")
 
 async def initialize_agents():
-    """Initialize all bot agents"""
-    global goal_agent, nutrition_agent, injury_agent, community_agent
-    
-    llm = ChatBot(llm_provider="openai", model_name="gpt-4o-mini")
-    
-    goal_agent = GoalSettingAgent(llm=llm)
-    nutrition_agent = NutritionAgent(llm=llm)
-    injury_agent = InjuryAgent(llm=llm)
-    community_agent = CommunityAgent(llm=llm)
+    """Initialize the agent pools, all sharing one LLM client"""
+    global message_router, session_store
+    check_worker_config()
+    if SESSION_STORE is not None:
+        session_store = get_session_store(SESSION_STORE, **SESSION_STORE_OPTIONS)
+    llm = ChatBot(llm_provider=LLM_PROVIDER, model_name=LLM_MODEL, resilience_policy=LLM_RESILIENCE)
+    route_examples = {route: list(texts) for route, texts in ROUTE_EXAMPLES.items()}
+
+    for agent_type, agent_class in [
+        ("goal", GoalSettingAgent),
+        ("nutrition", NutritionAgent),
+        ("injury", InjuryAgent),
+        ("community", CommunityAgent),
+    ]:
+        agent_pools[agent_type] = AgentPool(
+            lambda agent_class=agent_class: agent_class(llm=llm, memory=Memory(max_tokens=AGENT_MEMORY_MAX_TOKENS)),
+            max_size=AGENT_POOL_MAX_SIZE,
+            idle_ttl=AGENT_POOL_IDLE_TTL,
+            store=session_store,
+            namespace=agent_type,
+        )
+        route_examples[agent_type].append(agent_class.model_fields["description"].default)
+
+    if MESSAGE_ROUTER in ("tfidf", "hybrid"):
+        message_router = get_router(MESSAGE_ROUTER, examples=route_examples, min_confidence=MESSAGE_ROUTER_MIN_CONFIDENCE)
+    else:
+        message_router = get_router(MESSAGE_ROUTER)
+
+def get_nutrition_store() -> NutritionLogStore:
+    if nutrition_store is None:
+        raise HTTPException(status_code=500, detail="Nutrition log store not initialized")
+    return nutrition_store
+
+def get_pool(agent_type: str) -> AgentPool:
+    pool = agent_pools.get(agent_type)
+    if pool is None:
+        raise HTTPException(status_code=500, detail=f"{agent_type.title()} agent not initialized")
+    return pool
+
+async def run_stateless(agent_type: str, message: str, cache: bool = True) -> str:
+    """Run a one-shot request on a scratch agent, serving repeats from the response cache"""
+    async def compute() -> str:
+        async with get_pool(agent_type).checkout() as agent:
+            return await agent.run(message)
+
+    if not cache:
+        return await compute()
+    return await response_cache.get_or_compute(agent_type, LLM_MODEL, message, compute)
+
+async def run_direct(agent_type: str, tool_name: str, tool_input: Dict[str, Any], request: str, polish: Optional[bool] = None,
+                     cache: bool = True, tool_output: Optional[str] = None) -> str:
+    """Run the tool an endpoint implies on a scratch agent; only a polished reply costs an LLM call (and is cached)
+
+    A ``tool_output`` the endpoint already computed is used instead of running the tool again.
+    """
+    polish = DIRECT_TOOL_POLISH if polish is None else polish
+
+    async def compute() -> str:
+        async with get_pool(agent_type).checkout() as agent:
+            if tool_output is not None:
+                return await agent.reply_with_tool_output(tool_name, tool_output, request=request, polish=polish)
+            return await agent.run_tool_directly(tool_name, tool_input, request=request, polish=polish)
+
+    if not (polish and cache):
+        return await compute()
+    prompt = json.dumps({"tool": tool_name, **tool_input}, sort_keys=True, default=str)
+    return await response_cache.get_or_compute(agent_type, LLM_MODEL, prompt, compute)
+
+async def coalesced(endpoint: str, request: BaseModel, compute: Callable[[], Awaitable[str]]) -> str:
+    """Run ``compute`` once for concurrent requests that share the endpoint's SINGLE_FLIGHT_KEYS fields"""
+    fields = SINGLE_FLIGHT_KEYS.get(endpoint)
+    if fields is None:
+        return await compute()
+    return await single_flight.do(make_flight_key(endpoint, fields, request.model_dump()), compute)
+
+def sse_event(data: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def stream_agent_chat(pool_name: str, agent_type: str, message: str, session_id: Optional[str]) -> AsyncIterator[str]:
+    """Run an agent and relay its output queue (tokens, tool calls, tool results) as Server-Sent Events"""
+    async with get_pool(pool_name).checkout(session_id) as agent:
+        agent.task_done = asyncio.Event()
+
+        run_task = asyncio.create_task(agent.run(message))
+        run_task.add_done_callback(lambda _: agent.task_done.set())
+        try:
+            async for event in agent.stream():
+                yield sse_event(event)
+            response = await run_task
+        except Exception as e:
+            yield sse_event({"type": "error", "detail": str(e)})
+            return
+        finally:
+            # Client went away mid-run: stop the agent before returning it to the pool
+            if not run_task.done():
+                run_task.cancel()
+                try:
+                    await run_task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+        yield sse_event({
+            "type": "done",
+            **ChatResponse(
+                response=response,
+                agent_type=agent_type,
+                timestamp=datetime.now().isoformat(),
+                session_id=session_id
+            ).model_dump()
+        })
+
+def streaming_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    LLMClientRegistry.configure(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+    global nutrition_store, session_store
+    nutrition_store = NutritionLogStore(NUTRITION_STORE_PATH)
     await initialize_agents()
     yield
-    # Shutdown (cleanup if needed)
-    pass
+    # Shutdown
+    agent_pools.clear()
+    if session_store is not None:
+        await session_store.close()
+        session_store = None
+    response_cache.clear()
+    nutrition_store.close()
+    nutrition_store = None
+    await LLMClientRegistry.aclose()
 
 # Initialize FastAPI app with lifespan
 app = FastAPI(
@@ -68,20 +285,28 @@ class ChatResponse(BaseModel):
     timestamp: str
     session_id: Optional[str] = None
 
+class RouteRequest(BaseModel):
+    messages: List[str]
+
 class GoalRequest(BaseModel):
     user_input: str
     user_id: Optional[str] = None
+    polish: Optional[bool] = None
 
 class NutritionAnalysisRequest(BaseModel):
     nutrition_goal: Optional[Dict[str, Any]] = None
-    nutrition_logs: List[Dict[str, Any]]
+    nutrition_logs: Optional[List[Dict[str, Any]]] = None  # defaults to the stored logs of user_id
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
     question: str = "How am I doing with my nutrition?"
     user_id: Optional[str] = None
+    polish: Optional[bool] = None
 
 class NutritionLogRequest(BaseModel):
     user_input: str
     date: Optional[str] = None
     user_id: Optional[str] = None
+    polish: Optional[bool] = None
 
 class InjuryRequest(BaseModel):
     user_profile: Dict[str, Any]
@@ -90,13 +315,43 @@ class InjuryRequest(BaseModel):
     activity: Optional[str] = "general"
     injury_details: Optional[Dict[str, Any]] = None
     user_id: Optional[str] = None
+    polish: Optional[bool] = None
+
+class InjuryRiskRequest(BaseModel):
+    profiles: List[Dict[str, Any]]  # UserHealthProfile-shaped dicts
 
 class CommunityRequest(BaseModel):
     message: str
+    community_id: Optional[str] = None  # tracked community; replaces shipping community_data
     community_data: Optional[Dict[str, Any]] = None
     request_type: str  # "insights", "motivation", "challenge"
     user_id: Optional[str] = None
 
+class CommunityInfoRequest(BaseModel):
+    name: Optional[str] = None
+    activity_type: Optional[str] = None
+    description: Optional[str] = None
+    common_injuries: Optional[List[str]] = None
+    community_goals: Optional[List[str]] = None
+
+class ActivityRequest(BaseModel):
+    user_id: str
+    name: Optional[str] = None
+    metrics: Dict[str, float] = {}  # e.g. {"distance": 5.2, "time": 28}
+    date: Optional[str] = None
+
+class ChallengeRequest(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    target_metric: str = WORKOUTS
+    target_value: Optional[float] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+class ChallengeJoinRequest(BaseModel):
+    user_id: str
+    name: Optional[str] = None
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
@@ -107,11 +362,10 @@ async def health_check():
 async def set_goals(request: GoalRequest):
     """Parse natural language goal descriptions into structured fitness goals"""
     try:
-        if not goal_agent:
-            raise HTTPException(status_code=500, detail="Goal agent not initialized")
-        
-        goal_agent.clear()  # Reset conversation state
-        response = await goal_agent.run(request.user_input)
+        response = await coalesced("set_goals", request, lambda: run_direct(
+            "goal", "goal_setting", {"user_input": request.user_input},
+            request=request.user_input, polish=request.polish
+        ))
         
         return ChatResponse(
             response=response,
@@ -126,10 +380,8 @@ async def set_goals(request: GoalRequest):
 async def chat_goals(request: ChatRequest):
     """General chat about goal setting"""
     try:
-        if not goal_agent:
-            raise HTTPException(status_code=500, detail="Goal agent not initialized")
-        
-        response = await goal_agent.run(request.message)
+        async with get_pool("goal").checkout(request.session_id or request.user_id) as agent:
+            response = await agent.run(request.message)
         
         return ChatResponse(
             response=response,
@@ -140,19 +392,32 @@ async def chat_goals(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in goal chat: {str(e)}")
 
+@app.post("/api/goals/chat/stream")
+async def chat_goals_stream(request: ChatRequest):
+    """Streaming (Server-Sent Events) variant of /api/goals/chat"""
+    return streaming_response(stream_agent_chat("goal", "goal_setting", request.message, request.session_id or request.user_id))
+
 # Nutrition Endpoints
 @app.post("/api/nutrition/analyze", response_model=ChatResponse)
 async def analyze_nutrition(request: NutritionAnalysisRequest):
     """Analyze nutrition logs against goals and provide feedback"""
+    if request.nutrition_logs is None and not request.user_id:
+        raise HTTPException(status_code=400, detail="Provide nutrition_logs or the user_id of stored logs")
     try:
-        if not nutrition_agent:
-            raise HTTPException(status_code=500, detail="Nutrition agent not initialized")
-        
-        nutrition_agent.clear()  # Reset conversation state
-        
-        # Construct the message for the nutrition agent
-        message = f"Please analyze my nutrition data. Question: {request.question}"
-        response = await nutrition_agent.run(message)
+        logs = request.nutrition_logs
+        if logs is None:
+            # Only the requested window of per-day totals is read, however long the history is
+            store = get_nutrition_store()
+            if request.start_date:
+                logs = await asyncio.to_thread(store.daily, request.user_id, request.start_date, request.end_date)
+            else:
+                logs = await asyncio.to_thread(store.recent_daily, request.user_id, NUTRITION_ANALYSIS_WINDOW_DAYS, request.end_date)
+
+        response = await run_direct(
+            "nutrition", "nutrition_analysis",
+            {"nutrition_goal": request.nutrition_goal, "nutrition_logs": logs, "question": request.question},
+            request=request.question, polish=request.polish, cache=False
+        )
         
         return ChatResponse(
             response=response,
@@ -167,17 +432,16 @@ async def analyze_nutrition(request: NutritionAnalysisRequest):
 async def log_nutrition(request: NutritionLogRequest):
     """Log daily nutrition intake"""
     try:
-        if not nutrition_agent:
-            raise HTTPException(status_code=500, detail="Nutrition agent not initialized")
-        
-        nutrition_agent.clear()  # Reset conversation state
-        
-        # Construct the message for logging
-        message = f"Please log this nutrition data: {request.user_input}"
-        if request.date:
-            message += f" for date {request.date}"
-            
-        response = await nutrition_agent.run(message)
+        # Parsed once; the reply describes the entry that was stored
+        log = nutrition_logging_tool.create_log(request.user_input, request.date)
+        if request.user_id:
+            await asyncio.to_thread(get_nutrition_store().add, request.user_id, log)
+
+        response = await run_direct(
+            "nutrition", "nutrition_logging", {"user_input": request.user_input, "date": request.date},
+            request=request.user_input, polish=request.polish, cache=False,
+            tool_output=nutrition_logging_tool.format_log(log),
+        )
         
         return ChatResponse(
             response=response,
@@ -188,14 +452,40 @@ async def log_nutrition(request: NutritionLogRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error logging nutrition: {str(e)}")
 
+@app.post("/api/nutrition/import")
+async def import_nutrition(file: UploadFile = File(...), format: Optional[str] = None, user_id: Optional[str] = None):
+    """Bulk-import nutrition entries from an NDJSON or CSV upload, streaming one NDJSON result per line
+
+    With a user_id, parsed entries are also saved to the nutrition log store.
+    """
+    fmt = format or detect_format(file.content_type, file.filename)
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported import format '{fmt}', expected one of {', '.join(IMPORT_FORMATS)}")
+    store = get_nutrition_store() if user_id else None
+
+    async def save(logs: List[Dict[str, Any]]) -> None:
+        await asyncio.to_thread(store.add_many, user_id, logs)
+
+    async def chunks() -> AsyncIterator[bytes]:
+        while chunk := await file.read(NUTRITION_IMPORT_CHUNK_SIZE):
+            yield chunk
+
+    async def results() -> AsyncIterator[str]:
+        try:
+            async for result in import_nutrition_logs(iter_lines(chunks()), fmt, batch_size=NUTRITION_IMPORT_BATCH_SIZE,
+                                                      on_batch=save if store else None):
+                yield json.dumps(result) + "\n"
+        finally:
+            await file.close()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
+
 @app.post("/api/nutrition/chat", response_model=ChatResponse)
 async def chat_nutrition(request: ChatRequest):
     """General nutrition consultation"""
     try:
-        if not nutrition_agent:
-            raise HTTPException(status_code=500, detail="Nutrition agent not initialized")
-        
-        response = await nutrition_agent.run(request.message)
+        async with get_pool("nutrition").checkout(request.session_id or request.user_id) as agent:
+            response = await agent.run(request.message)
         
         return ChatResponse(
             response=response,
@@ -206,18 +496,21 @@ async def chat_nutrition(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in nutrition chat: {str(e)}")
 
+@app.post("/api/nutrition/chat/stream")
+async def chat_nutrition_stream(request: ChatRequest):
+    """Streaming (Server-Sent Events) variant of /api/nutrition/chat"""
+    return streaming_response(stream_agent_chat("nutrition", "nutrition", request.message, request.session_id or request.user_id))
+
 # Injury Prevention & Recovery Endpoints
 @app.post("/api/injury/prevention", response_model=ChatResponse)
 async def injury_prevention(request: InjuryRequest):
     """Get personalized injury prevention advice"""
     try:
-        if not injury_agent:
-            raise HTTPException(status_code=500, detail="Injury agent not initialized")
-        
-        injury_agent.clear()  # Reset conversation state
-        
-        message = f"I need injury prevention advice. My question: {request.question}"
-        response = await injury_agent.run(message)
+        response = await coalesced("injury_prevention", request, lambda: run_direct(
+            "injury", "injury_prevention",
+            {"user_profile": request.user_profile, "question": request.question, "activity": request.activity or "general"},
+            request=request.question, polish=request.polish
+        ))
         
         return ChatResponse(
             response=response,
@@ -232,13 +525,11 @@ async def injury_prevention(request: InjuryRequest):
 async def injury_recovery(request: InjuryRequest):
     """Get personalized injury recovery advice"""
     try:
-        if not injury_agent:
-            raise HTTPException(status_code=500, detail="Injury agent not initialized")
-        
-        injury_agent.clear()  # Reset conversation state
-        
-        message = f"I need recovery advice. My question: {request.question}"
-        response = await injury_agent.run(message)
+        response = await coalesced("injury_recovery", request, lambda: run_direct(
+            "injury", "injury_recovery",
+            {"user_profile": request.user_profile, "question": request.question, "injury_details": request.injury_details},
+            request=request.question, polish=request.polish
+        ))
         
         return ChatResponse(
             response=response,
@@ -249,14 +540,20 @@ async def injury_recovery(request: InjuryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting recovery advice: {str(e)}")
 
+@app.post("/api/injury/risks", response_model=List[Dict[str, List[str]]])
+async def injury_risks(request: InjuryRiskRequest):
+    """Risk analysis (high-risk areas and risk factors) of many profiles, without calling the LLM"""
+    try:
+        return injury_prevention_tool.analyze_risks_batch(request.profiles)
+    except (AttributeError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid profile: {str(e)}")
+
 @app.post("/api/injury/chat", response_model=ChatResponse)
 async def chat_injury(request: ChatRequest):
     """General injury consultation"""
     try:
-        if not injury_agent:
-            raise HTTPException(status_code=500, detail="Injury agent not initialized")
-        
-        response = await injury_agent.run(request.message)
+        async with get_pool("injury").checkout(request.session_id or request.user_id) as agent:
+            response = await agent.run(request.message)
         
         return ChatResponse(
             response=response,
@@ -267,16 +564,28 @@ async def chat_injury(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in injury chat: {str(e)}")
 
+@app.post("/api/injury/chat/stream")
+async def chat_injury_stream(request: ChatRequest):
+    """Streaming (Server-Sent Events) variant of /api/injury/chat"""
+    return streaming_response(stream_agent_chat("injury", "injury", request.message, request.session_id or request.user_id))
+
 # Community Endpoints
+def community_message(request: CommunityRequest) -> str:
+    """Request message plus the community it is about, for the community agent"""
+    if request.community_id:
+        return f"{request.message}\n\nCommunity ID: {request.community_id}"
+    if request.community_data:
+        return f"{request.message}\n\nCommunity data: {json.dumps(request.community_data, default=str)}"
+    return request.message
+
 @app.post("/api/community/insights", response_model=ChatResponse)
 async def community_insights(request: CommunityRequest):
     """Get community insights and highlights"""
     try:
-        if not community_agent:
-            raise HTTPException(status_code=500, detail="Community agent not initialized")
-        
-        community_agent.clear()  # Reset conversation state
-        response = await community_agent.run(request.message)
+        # Insights on a tracked community read live leaderboards, so they are not cached
+        response = await coalesced("community_insights", request, lambda: run_stateless(
+            "community", community_message(request), cache=request.community_id is None
+        ))
         
         return ChatResponse(
             response=response,
@@ -291,11 +600,10 @@ async def community_insights(request: CommunityRequest):
 async def community_motivation(request: CommunityRequest):
     """Get motivational content and encouragement"""
     try:
-        if not community_agent:
-            raise HTTPException(status_code=500, detail="Community agent not initialized")
-        
-        community_agent.clear()  # Reset conversation state
-        response = await community_agent.run(request.message)
+        # Motivation for a tracked community cites its live standings, so it is not cached
+        response = await coalesced("community_motivation", request, lambda: run_stateless(
+            "community", community_message(request), cache=request.community_id is None
+        ))
         
         return ChatResponse(
             response=response,
@@ -310,11 +618,8 @@ async def community_motivation(request: CommunityRequest):
 async def community_challenges(request: CommunityRequest):
     """Manage community challenges"""
     try:
-        if not community_agent:
-            raise HTTPException(status_code=500, detail="Community agent not initialized")
-        
-        community_agent.clear()  # Reset conversation state
-        response = await community_agent.run(request.message)
+        # Challenge actions are not cached
+        response = await run_stateless("community", community_message(request), cache=False)
         
         return ChatResponse(
             response=response,
@@ -325,14 +630,86 @@ async def community_challenges(request: CommunityRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error managing challenges: {str(e)}")
 
+def tracked_communities():
+    """The leaderboard registry, unless several workers would each hold a different copy of it"""
+    if SERVER_WORKERS > 1:
+        raise HTTPException(
+            status_code=503,
+            detail="Tracked communities and challenges are only available with a single server worker",
+        )
+    return community_leaderboards
+
+@app.put("/api/community/{community_id}")
+async def register_community(community_id: str, request: CommunityInfoRequest):
+    """Create a tracked community or update its details"""
+    boards = tracked_communities().register_community(community_id, **request.model_dump())
+    return {"community_id": community_id, **boards.info, "member_count": len(boards.members)}
+
+@app.post("/api/community/{community_id}/activities")
+async def log_community_activity(community_id: str, request: ActivityRequest):
+    """Log a member's activity; updates the community's leaderboards and those of the challenges they joined"""
+    try:
+        ranks = tracked_communities().record_activity(community_id, request.user_id, request.metrics, request.name, request.date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid activity: {str(e)}")
+    return {"community_id": community_id, "user_id": request.user_id, "ranks": ranks}
+
+def leaderboard_page(group, metric: str, k: int, offset: int, user_id: Optional[str]) -> Dict[str, Any]:
+    board = group.board(metric)
+    return {
+        "metric": metric,
+        "total": len(board),
+        "entries": [
+            {"rank": offset + i, "user_id": member.member_id, "name": member.name, "score": score}
+            for i, (member, score) in enumerate(group.top(metric, k, offset), 1)
+        ],
+        "user_rank": board.rank(user_id) if user_id else None,
+    }
+
+@app.get("/api/community/{community_id}/leaderboard")
+async def get_community_leaderboard(community_id: str, metric: str = WORKOUTS, k: int = 10, offset: int = 0, user_id: Optional[str] = None):
+    """Top-k members of a tracked community by a metric, plus the rank of user_id"""
+    boards = tracked_communities().community(community_id)
+    if boards is None:
+        raise HTTPException(status_code=404, detail=f"Unknown community '{community_id}'")
+    return {"community_id": community_id, **leaderboard_page(boards, metric, k, offset, user_id)}
+
+@app.put("/api/community/{community_id}/challenges/{challenge_id}")
+async def create_challenge(community_id: str, challenge_id: str, request: ChallengeRequest):
+    """Create a tracked challenge (or update its settings) in a community"""
+    # Only the fields the client sent, so an update keeps the settings it leaves out
+    challenge = tracked_communities().create_challenge(challenge_id, community_id, **request.model_dump(exclude_unset=True))
+    return {"challenge_id": challenge_id, "community_id": community_id, **challenge.info,
+            "target_metric": challenge.target_metric, "target_value": challenge.target_value,
+            "start_date": challenge.start_date, "end_date": challenge.end_date}
+
+@app.post("/api/community/challenges/{challenge_id}/join")
+async def join_challenge(challenge_id: str, request: ChallengeJoinRequest):
+    """Join a tracked challenge; the member's later activities in its date range count towards it"""
+    registry = tracked_communities()
+    try:
+        challenge = registry.join_challenge(challenge_id, request.user_id, request.name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown challenge '{challenge_id}'")
+    return {"challenge_id": challenge_id, "user_id": request.user_id, "rank": challenge.rank(request.user_id, challenge.target_metric)}
+
+@app.get("/api/community/challenges/{challenge_id}/leaderboard")
+async def get_challenge_leaderboard(challenge_id: str, k: int = 10, offset: int = 0, user_id: Optional[str] = None):
+    """Standings of a tracked challenge by its target metric"""
+    challenge = tracked_communities().challenges.get(challenge_id)
+    if challenge is None:
+        raise HTTPException(status_code=404, detail=f"Unknown challenge '{challenge_id}'")
+    page = leaderboard_page(challenge, challenge.target_metric, k, offset, user_id)
+    for entry in page["entries"]:
+        entry["progress"] = challenge.progress(entry["score"])
+    return {"challenge_id": challenge_id, "name": challenge.info["name"], "target_value": challenge.target_value, **page}
+
 @app.post("/api/community/chat", response_model=ChatResponse)
 async def chat_community(request: ChatRequest):
     """General community interaction"""
     try:
-        if not community_agent:
-            raise HTTPException(status_code=500, detail="Community agent not initialized")
-        
-        response = await community_agent.run(request.message)
+        async with get_pool("community").checkout(request.session_id or request.user_id) as agent:
+            response = await agent.run(request.message)
         
         return ChatResponse(
             response=response,
@@ -343,6 +720,21 @@ async def chat_community(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in community chat: {str(e)}")
 
+@app.post("/api/community/chat/stream")
+async def chat_community_stream(request: ChatRequest):
+    """Streaming (Server-Sent Events) variant of /api/community/chat"""
+    return streaming_response(stream_agent_chat("community", "community", request.message, request.session_id or request.user_id))
+
+def route_message(message: str) -> Tuple[str, str]:
+    """Pick the agent pool and response agent_type for a free-form message"""
+    decision = message_router.classify(message)
+    return decision.route, decision.agent_type
+
+@app.post("/api/chat/route", response_model=List[RouteDecision])
+async def route_messages(request: RouteRequest):
+    """Classify messages without running an agent (batch-capable)"""
+    return message_router.classify_batch(request.messages)
+
 # Universal Chat Endpoint
 @app.post("/api/chat", response_model=ChatResponse)
 async def universal_chat(request: ChatRequest):
@@ -351,30 +743,10 @@ async def universal_chat(request: ChatRequest):
     based on message content analysis
     """
     try:
-        message_lower = request.message.lower()
-        
-        # Simple keyword-based routing
-        if any(word in message_lower for word in ['goal', 'target', 'aim', 'plan', 'objective']):
-            agent = goal_agent
-            agent_type = "goal_setting"
-        elif any(word in message_lower for word in ['nutrition', 'food', 'eat', 'calories', 'protein', 'diet']):
-            agent = nutrition_agent
-            agent_type = "nutrition"
-        elif any(word in message_lower for word in ['injury', 'pain', 'hurt', 'recovery', 'prevention', 'heal']):
-            agent = injury_agent
-            agent_type = "injury"
-        elif any(word in message_lower for word in ['community', 'challenge', 'motivation', 'encourage', 'leaderboard']):
-            agent = community_agent
-            agent_type = "community"
-        else:
-            # Default to goal setting for general fitness queries
-            agent = goal_agent
-            agent_type = "goal_setting"
+        pool_name, agent_type = route_message(request.message)
         
-        if not agent:
-            raise HTTPException(status_code=500, detail="Selected agent not initialized")
-        
-        response = await agent.run(request.message)
+        async with get_pool(pool_name).checkout(request.session_id or request.user_id) as agent:
+            response = await agent.run(request.message)
         
         return ChatResponse(
             response=response,
@@ -385,39 +757,59 @@ async def universal_chat(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in universal chat: {str(e)}")
 
+@app.post("/api/chat/stream")
+async def universal_chat_stream(request: ChatRequest):
+    """Streaming (Server-Sent Events) variant of /api/chat"""
+    pool_name, agent_type = route_message(request.message)
+    return streaming_response(stream_agent_chat(pool_name, agent_type, request.message, request.session_id or request.user_id))
+
 # Agent Status Endpoint
 @app.get("/api/agents/status")
 async def get_agents_status():
-    """Get the status of all agents"""
-    return {
-        "goal_agent": "initialized" if goal_agent else "not_initialized",
-        "nutrition_agent": "initialized" if nutrition_agent else "not_initialized",
-        "injury_agent": "initialized" if injury_agent else "not_initialized",
-        "community_agent": "initialized" if community_agent else "not_initialized",
-        "timestamp": datetime.now().isoformat()
-    }
+    """Get the status of all agent pools"""
+    status = {}
+    for agent_type in ["goal", "nutrition", "injury", "community"]:
+        pool = agent_pools.get(agent_type)
+        status[f"{agent_type}_agent"] = "initialized" if pool else "not_initialized"
+        if pool:
+            status[f"{agent_type}_pool"] = pool.stats()
+    status["timestamp"] = datetime.now().isoformat()
+    return status
+
+# Response Cache Endpoints
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters of the response cache, and how many requests were coalesced"""
+    return {**response_cache.stats(), "single_flight": single_flight.stats(), "timestamp": datetime.now().isoformat()}
+
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """Per-attempt LLM call counters and latency percentiles"""
+    return {"operations": llm_metrics.stats(), "timestamp": datetime.now().isoformat()}
+
+@app.post("/api/cache/clear")
+async def clear_cache():
+    """Drop every cached response"""
+    response_cache.clear()
+    return {"status": "success", "message": "response cache cleared"}
 
 # Reset Agent Session Endpoint
 @app.post("/api/agents/{agent_type}/reset")
-async def reset_agent_session(agent_type: str):
-    """Reset the conversation state for a specific agent"""
+async def reset_agent_session(agent_type: str, session_id: Optional[str] = None):
+    """Reset the conversation state of one session, or of every session when none is given"""
     try:
-        if agent_type == "goal":
-            if goal_agent:
-                goal_agent.clear()
-        elif agent_type == "nutrition":
-            if nutrition_agent:
-                nutrition_agent.clear()
-        elif agent_type == "injury":
-            if injury_agent:
-                injury_agent.clear()
-        elif agent_type == "community":
-            if community_agent:
-                community_agent.clear()
-        else:
+        if agent_type not in ["goal", "nutrition", "injury", "community"]:
             raise HTTPException(status_code=400, detail="Invalid agent type")
         
-        return {"status": "success", "message": f"{agent_type} agent session reset"}
+        pool = agent_pools.get(agent_type)
+        if pool:
+            if session_id:
+                await pool.discard(session_id)
+            else:
+                await pool.clear()
+        
+        target = f"session {session_id}" if session_id else "sessions"
+        return {"status": "success", "message": f"{agent_type} agent {target} reset"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error resetting agent: {str(e)}")
 
@@ -452,4 +844,10 @@ async def test_agent(agent_type: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Checked again in each worker's startup (gunicorn never runs this block); failing here avoids spawning them
+    try:
+        check_worker_config()
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    # Workers import the app by name; a single worker can share this process's module
+    uvicorn.run("server:app" if SERVER_WORKERS > 1 else app, host="0.0.0.0", port=8000, workers=SERVER_WORKERS)
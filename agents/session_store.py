@@ -0,0 +1,279 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Type
+
+from spoon_ai.schema import Message
+
+# (version, messages); messages is None when the caller already holds that version
+SessionState = Tuple[str, Optional[List[Message]]]
+
+# Version of a session that does not exist
+NO_VERSION = ""
+
+
+def dump_messages(messages: List[Message]) -> str:
+    return json.dumps([message.model_dump(exclude_none=True) for message in messages])
+
+
+def load_messages(data: str) -> List[Message]:
+    return [Message.model_validate(message) for message in json.loads(data)]
+
+
+class SessionLockTimeout(TimeoutError):
+    """Another worker held a session for longer than the lock wait allows"""
+
+
+class SessionStore(ABC):
+    """Agent conversation memory shared by every worker process.
+
+    Sessions are namespaced by agent type. Each save gives the session a new,
+    never repeated version token, so a worker that still holds the latest
+    version in its own pool skips reloading the messages (and a session that
+    was deleted and started over is never mistaken for the old one). Requests for one session are serialized
+    across workers with a lease lock; a lease outlives a crashed worker by at
+    most ``lock_ttl`` seconds.
+    """
+
+    def __init__(self, lock_ttl: float = 300.0, lock_wait: float = 300.0):
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+
+    @abstractmethod
+    async def load(self, namespace: str, key: str, known_version: str = NO_VERSION) -> SessionState:
+        """Stored version of a session (NO_VERSION if missing), with its messages unless it is ``known_version``"""
+
+    @abstractmethod
+    async def save(self, namespace: str, key: str, messages: List[Message], ttl: Optional[float]) -> str:
+        """Replace a session's messages, expiring it after ``ttl`` idle seconds; returns the new version"""
+
+    @abstractmethod
+    async def delete(self, namespace: str, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def clear(self, namespace: str) -> None:
+        """Delete every session of a namespace"""
+
+    @abstractmethod
+    async def _acquire(self, lock_key: str, owner: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def _release(self, lock_key: str, owner: str) -> None:
+        ...
+
+    @asynccontextmanager
+    async def lock(self, namespace: str, key: str) -> AsyncIterator[None]:
+        """Hold a session exclusively across workers, polling with backoff until it is free"""
+        lock_key = f"{namespace}:{key}"
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_wait
+        delay = 0.01
+        while not await self._acquire(lock_key, owner):
+            if time.monotonic() > deadline:
+                raise SessionLockTimeout(f"Session '{key}' is busy in another worker")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.25)
+        try:
+            yield
+        finally:
+            await self._release(lock_key, owner)
+
+    async def close(self) -> None:
+        pass
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_sessions (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    version TEXT NOT NULL,
+    messages TEXT NOT NULL,
+    expires_at REAL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS agent_session_locks (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store in a local SQLite file (WAL mode), for workers on one machine"""
+
+    # Expired sessions are purged every this many saves
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str = "agent_sessions.db", **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SQLITE_SCHEMA)
+        self._saves = 0
+
+    def _run(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _load(self, namespace: str, key: str, known_version: str) -> SessionState:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, expires_at FROM agent_sessions WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] < time.time()):
+                return NO_VERSION, []
+            if row[0] == known_version:
+                return known_version, None
+            data = self._conn.execute(
+                "SELECT messages FROM agent_sessions WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()[0]
+        return row[0], load_messages(data)
+
+    def _save(self, namespace: str, key: str, data: str, ttl: Optional[float]) -> str:
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        version = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO agent_sessions (namespace, key, version, messages, expires_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET version = excluded.version, messages = excluded.messages, "
+                "expires_at = excluded.expires_at",
+                (namespace, key, version, data, expires_at),
+            )
+            self._saves += 1
+            if self._saves % self.PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM agent_sessions WHERE expires_at < ?", (now,))
+        return version
+
+    def _acquire_lock(self, lock_key: str, owner: str) -> bool:
+        now = time.time()
+        cursor = self._run(
+            "INSERT INTO agent_session_locks (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE agent_session_locks.expires_at < ?",
+            (lock_key, owner, now + self.lock_ttl, now),
+        )
+        return cursor.rowcount == 1
+
+    async def load(self, namespace: str, key: str, known_version: str = NO_VERSION) -> SessionState:
+        return await asyncio.to_thread(self._load, namespace, key, known_version)
+
+    async def save(self, namespace: str, key: str, messages: List[Message], ttl: Optional[float]) -> str:
+        return await asyncio.to_thread(self._save, namespace, key, dump_messages(messages), ttl)
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        cursor = await asyncio.to_thread(self._run, "DELETE FROM agent_sessions WHERE namespace = ? AND key = ?", (namespace, key))
+        return cursor.rowcount > 0
+
+    async def clear(self, namespace: str) -> None:
+        await asyncio.to_thread(self._run, "DELETE FROM agent_sessions WHERE namespace = ?", (namespace,))
+
+    async def _acquire(self, lock_key: str, owner: str) -> bool:
+        return await asyncio.to_thread(self._acquire_lock, lock_key, owner)
+
+    async def _release(self, lock_key: str, owner: str) -> None:
+        await asyncio.to_thread(self._run, "DELETE FROM agent_session_locks WHERE key = ? AND owner = ?", (lock_key, owner))
+
+    async def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    """Session store on a Redis-compatible server (Redis, Valkey, KeyDB, ...), for workers on several machines
+
+    Only plain commands and MULTI/EXEC transactions are used (no Lua scripts), so
+    in-process stand-ins such as ``fakeredis`` work too; pass one as ``client``.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "athl3te:", client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            try:
+                from redis.asyncio import Redis
+            except ImportError:
+                raise ImportError("Redis client is not installed. Please install it with 'pip install redis'.")
+            client = Redis.from_url(url)
+        self.redis = client
+        self.prefix = prefix
+
+    def _key(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}session:{namespace}:{key}"
+
+    async def load(self, namespace: str, key: str, known_version: str = NO_VERSION) -> SessionState:
+        name = self._key(namespace, key)
+        version = await self.redis.hget(name, "version")
+        if version is None:
+            return NO_VERSION, []
+        version = version.decode("utf-8") if isinstance(version, bytes) else version
+        if version == known_version:
+            return version, None
+        data = await self.redis.hget(name, "messages")
+        if data is None:
+            return NO_VERSION, []
+        return version, load_messages(data.decode("utf-8") if isinstance(data, bytes) else data)
+
+    async def save(self, namespace: str, key: str, messages: List[Message], ttl: Optional[float]) -> str:
+        name = self._key(namespace, key)
+        version = uuid.uuid4().hex
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(name, mapping={"messages": dump_messages(messages), "version": version})
+            if ttl is not None:
+                pipe.expire(name, max(int(ttl), 1))
+            else:
+                pipe.persist(name)
+            await pipe.execute()
+        return version
+
+    async def delete(self, namespace: str, key: str) -> bool:
+        return bool(await self.redis.delete(self._key(namespace, key)))
+
+    async def clear(self, namespace: str) -> None:
+        keys = [key async for key in self.redis.scan_iter(match=self._key(namespace, "*"), count=500)]
+        for start in range(0, len(keys), 500):
+            await self.redis.delete(*keys[start:start + 500])
+
+    async def _acquire(self, lock_key: str, owner: str) -> bool:
+        return bool(await self.redis.set(f"{self.prefix}lock:{lock_key}", owner, nx=True, px=int(self.lock_ttl * 1000)))
+
+    async def _release(self, lock_key: str, owner: str) -> None:
+        name = f"{self.prefix}lock:{lock_key}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(name)
+                current = await pipe.get(name)
+                if current is not None and (current.decode("utf-8") if isinstance(current, bytes) else current) == owner:
+                    pipe.multi()
+                    pipe.delete(name)
+                    await pipe.execute()
+                else:
+                    await pipe.unwatch()
+            except Exception:
+                # Lost the race with the lease expiring (WatchError) or the server; the lease times out anyway
+                pass
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+SESSION_STORES: Dict[str, Type[SessionStore]] = {
+    "sqlite": SQLiteSessionStore,
+    "redis": RedisSessionStore,
+}
+
+
+def get_session_store(backend: str = "sqlite", **kwargs) -> SessionStore:
+    if backend not in SESSION_STORES:
+        raise ValueError(f"Session store backend '{backend}' is not available.")
+    return SESSION_STORES[backend](**kwargs)
@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Iterable, Mapping, TypeVar
+
+from response_cache import normalize_prompt
+
+T = TypeVar("T")
+
+
+def make_flight_key(namespace: str, fields: Iterable[str], values: Mapping[str, Any]) -> str:
+    """Key of a request from the chosen fields; strings are normalized like cache prompts"""
+    payload = {}
+    for field in fields:
+        value = values.get(field)
+        payload[field] = normalize_prompt(value) if isinstance(value, str) else value
+    raw = f"{namespace}\x00{json.dumps(payload, sort_keys=True, default=str)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one in-flight computation.
+
+    The first caller for a key starts ``compute`` as a task; callers arriving
+    while it runs await the same task and get its result (or exception).
+    Nothing is kept once the task finishes, so unlike a cache there is no
+    staleness: the next request after completion computes afresh.
+
+    A caller that is cancelled (e.g. its client disconnected) only stops
+    waiting; the computation is cancelled when its last waiter leaves.
+    """
+
+    def __init__(self):
+        # key -> (task, number of callers waiting on it)
+        self._inflight: Dict[str, list] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, compute: Callable[[], Awaitable[T]]) -> T:
+        flight = self._inflight.get(key)
+        if flight is None:
+            task = asyncio.ensure_future(compute())
+            flight = self._inflight[key] = [task, 0]
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.followers += 1
+
+        flight[1] += 1
+        try:
+            return await asyncio.shield(flight[0])
+        finally:
+            flight[1] -= 1
+            if flight[1] == 0 and not flight[0].done():
+                flight[0].cancel()
+
+    def _finish(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        # Every waiter may have left; don't let an unobserved failure log a warning
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {"in_flight": len(self._inflight), "leaders": self.leaders, "coalesced": self.followers}
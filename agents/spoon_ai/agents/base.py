@@ -1,4 +1,5 @@
 import asyncio
+import itertools
 import logging
 import uuid
 import json
@@ -119,16 +120,17 @@ class BaseAgent(BaseModel, ABC):
         raise NotImplementedError("Subclasses must implement this method")
     
     def is_stuck(self) -> bool:
-        if len(self.memory.get_messages()) < 2:
+        messages = self.memory.messages
+        if len(messages) < 2:
             return False
         
-        last_message = self.memory.get_messages()[-1]
+        last_message = messages[-1]
         if not last_message.content:
             return False
         
         duplicate_count = sum(
             1
-            for msg in reversed(self.memory.get_messages()[:-1])
+            for msg in itertools.islice(reversed(messages), 1, None)
             if msg.role == Role.ASSISTANT and msg.content == last_message.content
         )
         return duplicate_count >= 2
@@ -177,21 +179,22 @@ class BaseAgent(BaseModel, ABC):
             debug_log(f"Error saving chat history: {e}")
 
     async def stream(self):
-        while not (self.task_done.is_set() or self.output_queue.empty()):
+        while not (self.task_done.is_set() and self.output_queue.empty()):
             queue_task = asyncio.create_task(self.output_queue.get())
             task_done_task = asyncio.create_task(self.task_done.wait())
 
-            done, pending = await asyncio.wait(queue_task, task_done_task, return_when=asyncio.FIRST_COMPLETED)
+            try:
+                done, _ = await asyncio.wait({queue_task, task_done_task}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                queue_task.cancel()
+                task_done_task.cancel()
 
-            if pending:
-                pending.pop().cancel()
-            
-            token_or_done = cast(Union[str, Literal[True]], done.pop().result())
-            if token_or_done is True:
+            if queue_task in done:
+                yield queue_task.result()
+            else:
                 while not self.output_queue.empty():
-                    yield await self.output_queue.get()
+                    yield self.output_queue.get_nowait()
                 break
-            yield token_or_done
 
     async def process_mcp_message(self, content: Any, sender: str, message: Dict[str, Any], agent_id: str):
         """
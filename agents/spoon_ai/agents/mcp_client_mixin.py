@@ -2,6 +2,7 @@ from typing import Union, Dict, Any, Optional, List, AsyncIterator, AsyncContext
 import asyncio
 import uuid
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 
 from fastmcp.client.transports import (FastMCPTransport, PythonStdioTransport,
                                        SSETransport, WSTransport)
@@ -10,6 +11,9 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# (owner, session) opened by the current task; child tasks inherit it and reuse the session
+_active_session: ContextVar = ContextVar("mcp_active_session", default=None)
+
 class MCPClientMixin:
     def __init__(self, mcp_transport: Union[str, WSTransport, SSETransport, PythonStdioTransport, FastMCPTransport]):
         self.mcp_transport = mcp_transport
@@ -34,6 +38,12 @@ class MCPClientMixin:
         Yields:
             An active client session
         """
+        # Reuse a session opened by a parent task (e.g. concurrent tool calls)
+        active = _active_session.get()
+        if active is not None and active[0] is self:
+            yield active[1]
+            return
+
         # Generate a unique task ID using UUID
         task_id = id(asyncio.current_task())
         
@@ -50,10 +60,12 @@ class MCPClientMixin:
             # Create a new session for the current task
             session = await self._client.__aenter__()
             self._task_sessions[task_id] = session
+            token = _active_session.set((self, session))
             
             try:
                 yield session
             finally:
+                _active_session.reset(token)
                 # Clean up the session
                 try:
                     await self._client.__aexit__(None, None, None)
@@ -1,7 +1,10 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import List, Optional, Dict, Any
 
 from logging import getLogger
 from spoon_ai.retrieval import get_retrieval_client
+from spoon_ai.retrieval.bm25 import BM25Index, reciprocal_rank_fusion
 
 logger = getLogger(__name__)
 
@@ -11,11 +14,31 @@ def debug_log(message):
     if DEBUG:
         logger.debug(message)
 
+# Rank constant of reciprocal-rank fusion; larger values flatten the weight of top ranks
+RRF_K = 60
+
+# Vector queries run here so the lexical search can proceed alongside them
+_vector_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vector-retrieval")
+
 class RetrievalMixin:
-    """Mixin class for retrieval-augmented generation functionality"""
+    """Mixin class for retrieval-augmented generation functionality
+
+    Documents are indexed both by the vector backend and by a local BM25
+    index, which catches exact terms (injury and supplement names, tickers)
+    embeddings tend to blur. Queries run both and fuse them with
+    reciprocal-rank fusion; ``mode='lexical'`` skips the embeddings API
+    entirely, and a vector query that fails or exceeds ``vector_timeout``
+    falls back to the lexical results.
+    """
     
+    def initialize_lexical_index(self):
+        """Load the BM25 index persisted under config_dir if it isn't loaded yet"""
+        if getattr(self, 'lexical_index', None) is None:
+            self.lexical_index = BM25Index(os.path.join(str(self.config_dir), "spoon_ai.bm25.jsonl"))
+
     def initialize_retrieval_client(self, backend: str = 'chroma', **kwargs):
-        """Initialize the retrieval client if it doesn't exist"""
+        """Initialize the retrieval client and lexical index if they don't exist"""
+        self.initialize_lexical_index()
         if not hasattr(self, 'retrieval_client') or self.retrieval_client is None:
             debug_log(f"Initializing retrieval client with backend: {backend}")
             self.retrieval_client = get_retrieval_client(backend, config_dir=str(self.config_dir), **kwargs)
@@ -24,18 +47,48 @@ class RetrievalMixin:
         """Add documents to the retrieval system"""
         self.initialize_retrieval_client(backend, **kwargs)
         self.retrieval_client.add_documents(documents)
+        self.lexical_index.add_documents(documents)
         debug_log(f"Added {len(documents)} documents to retrieval system for agent {self.name}")
 
-    def retrieve_relevant_documents(self, query, k=5, backend: str = 'chroma', **kwargs):
-        """Retrieve relevant documents for a query"""
-        self.initialize_retrieval_client(backend, **kwargs)
-        try:
-            docs = self.retrieval_client.query(query, k=k)
-            debug_log(f"Retrieved {len(docs)} documents for query: {query}...")
+    def retrieve_relevant_documents(self, query, k=5, backend: str = 'chroma', mode: str = 'hybrid',
+                                    rrf_k: int = RRF_K, vector_timeout: Optional[float] = None, **kwargs):
+        """Retrieve relevant documents for a query
+
+        ``mode`` is 'hybrid' (vector and BM25, fused), 'vector' or 'lexical'.
+        """
+        if mode not in ('hybrid', 'vector', 'lexical'):
+            raise ValueError(f"Unknown retrieval mode '{mode}'")
+        if mode == 'lexical':
+            self.initialize_lexical_index()
+            docs = self.lexical_index.query(query, k=k)
+            debug_log(f"Retrieved {len(docs)} documents lexically for query: {query}...")
             return docs
+
+        try:
+            self.initialize_retrieval_client(backend, **kwargs)
+        except Exception as e:
+            debug_log(f"Error initializing retrieval client: {e}")
+            return self.lexical_index.query(query, k=k) if mode == 'hybrid' else []
+
+        # Each retriever contributes k candidates; fusion keeps the best k overall
+        vector_future = _vector_executor.submit(self.retrieval_client.query, query, k=k)
+        lexical_docs = self.lexical_index.query(query, k=k) if mode == 'hybrid' else []
+        try:
+            vector_docs = vector_future.result(timeout=vector_timeout)
+        except FutureTimeoutError:
+            vector_future.cancel()
+            debug_log(f"Vector retrieval exceeded {vector_timeout}s, using lexical results only")
+            return lexical_docs
         except Exception as e:
             debug_log(f"Error retrieving documents: {e}")
-            return []
+            return lexical_docs
+
+        if mode == 'vector' or not lexical_docs:
+            docs = vector_docs
+        else:
+            docs = reciprocal_rank_fusion([vector_docs, lexical_docs], k=k, rrf_k=rrf_k)
+        debug_log(f"Retrieved {len(docs)} documents for query: {query}...")
+        return docs
     
     def get_context_from_query(self, query):
         """Get context string from relevant documents for a query"""
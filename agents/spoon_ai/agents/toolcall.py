@@ -12,6 +12,7 @@ from spoon_ai.agents.react import ReActAgent
 from spoon_ai.prompts.toolcall import \
     NEXT_STEP_PROMPT as TOOLCALL_NEXT_STEP_PROMPT
 from spoon_ai.prompts.toolcall import SYSTEM_PROMPT as TOOLCALL_SYSTEM_PROMPT
+from spoon_ai.prompts.toolcall import DIRECT_TOOL_POLISH_PROMPT
 from spoon_ai.schema import TOOL_CHOICE_TYPE, AgentState, ToolCall, ToolChoice, Message, Role
 from spoon_ai.tools import ToolManager
 from mcp.types import Tool as MCPTool
@@ -38,10 +39,22 @@ class ToolCallAgent(ReActAgent):
 
     output_queue: asyncio.Queue = Field(default_factory=asyncio.Queue)
 
+    # Run the tool calls of one turn concurrently instead of one after another
+    parallel_tool_calls: bool = Field(default=False)
+    max_concurrent_tool_calls: int = Field(default=4)
+
     # MCP Tools Caching
     mcp_tools_cache: Optional[List[MCPTool]] = Field(default=None, exclude=True)
     mcp_tools_cache_timestamp: Optional[float] = Field(default=None, exclude=True)
     mcp_tools_cache_ttl: float = Field(default=300.0, exclude=True)  # 5 minutes TTL
+    mcp_tool_params_cache: Optional[List[dict]] = Field(default=None, exclude=True)
+
+    # Merged tool schema list, keyed on (tool manager, its version, MCP cache timestamp)
+    tool_params_cache: Optional[List[dict]] = Field(default=None, exclude=True)
+    tool_params_cache_key: Optional[tuple] = Field(default=None, exclude=True)
+
+    # Prompt for the optional LLM pass over the output of run_tool_directly
+    direct_tool_polish_prompt: str = DIRECT_TOOL_POLISH_PROMPT
 
     async def _get_cached_mcp_tools(self) -> List[MCPTool]:
         """Get MCP tools with caching to avoid repeated server calls."""
@@ -59,41 +72,51 @@ class ToolCallAgent(ReActAgent):
             logger.info(f"🔄 {self.name} fetching MCP tools from server...")
             mcp_tools = await self.list_mcp_tools()
 
-            # Update cache
+            # Update cache, converting the tool schemas once per refresh
             self.mcp_tools_cache = mcp_tools
             self.mcp_tools_cache_timestamp = current_time
+            self.mcp_tool_params_cache = [
+                SpoonMCPTool(
+                    name=tool.name,
+                    description=tool.description,
+                    parameters=tool.inputSchema,
+                ).to_param()
+                for tool in mcp_tools
+            ]
 
             logger.info(f"📋 {self.name} received {len(mcp_tools)} MCP tools (cached)")
             return mcp_tools
 
         return []
 
-    async def think(self) -> bool:
-        if self.next_step_prompt:
-            self.add_message("user", self.next_step_prompt)
-
+    async def _get_tool_params(self) -> List[dict]:
+        """Get the merged local + MCP tool schemas, rebuilt only when either side changes."""
         # Use cached MCP tools to avoid repeated server calls
-        mcp_tools = await self._get_cached_mcp_tools()
+        await self._get_cached_mcp_tools()
 
-        def convert_mcp_tool(tool: MCPTool) -> SpoonMCPTool:
-            return SpoonMCPTool(
-                name=tool.name,
-                description=tool.description,
-                parameters=tool.inputSchema,
-            ).to_param()
+        cache_key = (id(self.avaliable_tools), self.avaliable_tools.version, self.mcp_tools_cache_timestamp)
+        if self.tool_params_cache is not None and self.tool_params_cache_key == cache_key:
+            return self.tool_params_cache
 
-        all_tools = self.avaliable_tools.to_params()
-        mcp_tools_params = [convert_mcp_tool(tool) for tool in mcp_tools]
         unique_tools = {}
-        for tool in all_tools + mcp_tools_params:
+        for tool in self.avaliable_tools.to_params() + (self.mcp_tool_params_cache or []):
             tool_name = tool["function"]["name"]
             unique_tools[tool_name] = tool
-        unique_tools_list = list(unique_tools.values())
+
+        self.tool_params_cache = list(unique_tools.values())
+        self.tool_params_cache_key = cache_key
+        return self.tool_params_cache
+
+    async def think(self) -> bool:
+        if self.next_step_prompt:
+            self.add_message("user", self.next_step_prompt)
+
+        tools = await self._get_tool_params()
 
         response = await self.llm.ask_tool(
             messages=self.memory.messages,
             system_msg=self.system_prompt,
-            tools=unique_tools_list,
+            tools=tools,
             tool_choice=self.tool_choices,
             output_queue=self.output_queue,
         )
@@ -195,6 +218,34 @@ class ToolCallAgent(ReActAgent):
                 self.state = AgentState.IDLE
                 self.current_step = 0
 
+    async def run_tool_directly(self, name: str, tool_input: Optional[dict] = None, request: Optional[str] = None, polish: bool = False) -> str:
+        """Run one local tool with structured arguments, skipping the think/act loop.
+
+        For callers that already know which tool answers a request. Without
+        ``polish`` no LLM call is made and the tool output is returned as-is;
+        with ``polish`` a single ``ask`` turns it into the final reply. When
+        ``request`` is given, it and the reply are recorded in memory.
+        """
+        if name not in self.avaliable_tools.tool_map:
+            raise ValueError(f"Tool {name} not found")
+
+        result = await self.avaliable_tools.execute(name=name, tool_input=tool_input or {})
+        tool_output = str(result) if result else f"cmd {name} execution without any output"
+        logger.info(f"Tool {name} executed directly with result: {tool_output}")
+        return await self.reply_with_tool_output(name, tool_output, request=request, polish=polish)
+
+    async def reply_with_tool_output(self, name: str, tool_output: str, request: Optional[str] = None, polish: bool = False) -> str:
+        """Second half of ``run_tool_directly``, for a tool output the caller already has"""
+        response = tool_output
+        if polish:
+            prompt = self.direct_tool_polish_prompt.format(tool_name=name, request=request or "", tool_output=tool_output)
+            response = await self.llm.ask([Message(role=Role.USER, content=prompt)], system_msg=self.system_prompt)
+
+        if request is not None:
+            self.add_message("user", request)
+            self.add_message("assistant", response)
+        return response
+
     async def step(self) -> str:
         """Override the step method to handle finish_reason termination properly."""
         should_act = await self.think()
@@ -216,14 +267,51 @@ class ToolCallAgent(ReActAgent):
                 raise ValueError("No tools to call")
             return self.memory.messages[-1].content or "No response from assistant"
 
+        if self.parallel_tool_calls and len(self.tool_calls) > 1:
+            outcomes = await self._execute_tools_concurrently(self.tool_calls)
+        else:
+            outcomes = [await self.execute_tool(tool_call) for tool_call in self.tool_calls]
+
         results = []
-        for tool_call in self.tool_calls:
-            result = await self.execute_tool(tool_call)
+        for tool_call, result in zip(self.tool_calls, outcomes):
             logger.info(f"Tool {tool_call.function.name} executed with result: {result}")
             self.add_message("tool", result, tool_call_id=tool_call.id)
+            if self.output_queue:
+                self.output_queue.put_nowait({"type": "tool_result", "tool_call_id": tool_call.id, "name": tool_call.function.name, "content": result})
             results.append(result)
         return "\n\n".join(results)
 
+    async def _execute_tools_concurrently(self, tool_calls: List[ToolCall]) -> List[str]:
+        """Execute tool calls concurrently, keeping results in call order.
+
+        A failing tool does not cancel its siblings; its exception is reported
+        as that call's result so every tool call still gets a tool message.
+        """
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrent_tool_calls))
+
+        async def run_one(tool_call: ToolCall) -> str:
+            async with semaphore:
+                return await self.execute_tool(tool_call)
+
+        async def run_all() -> List[Any]:
+            return await asyncio.gather(*(run_one(tool_call) for tool_call in tool_calls), return_exceptions=True)
+
+        # Share one MCP session between the concurrent calls instead of one session per task
+        uses_mcp = any(tool_call.function.name not in self.avaliable_tools.tool_map for tool_call in tool_calls)
+        if uses_mcp and hasattr(self, "get_session"):
+            async with self.get_session():
+                outcomes = await run_all()
+        else:
+            outcomes = await run_all()
+
+        results = []
+        for tool_call, outcome in zip(tool_calls, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Tool {tool_call.function.name} failed: {outcome}")
+                outcome = f"Error: Tool {tool_call.function.name} failed: {outcome}"
+            results.append(outcome)
+        return results
+
     async def execute_tool(self, tool_call: ToolCall) -> str:
         def parse_tool_arguments(arguments):
             if isinstance(arguments, str):
@@ -296,6 +384,9 @@ class ToolCallAgent(ReActAgent):
         self.tool_calls = []
         self.state = AgentState.IDLE
         self.current_step = 0
+        while not self.output_queue.empty():
+            self.output_queue.get_nowait()
         # Clear MCP tools cache when agent is reset
         self.mcp_tools_cache = None
-        self.mcp_tools_cache_timestamp = None
\ No newline at end of file
+        self.mcp_tools_cache_timestamp = None
+        self.mcp_tool_params_cache = None
\ No newline at end of file
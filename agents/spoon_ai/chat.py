@@ -1,36 +1,86 @@
 import os
+from collections import deque
 from logging import getLogger
-from typing import List, Optional, Union
+from typing import Deque, List, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
 import json
 
-from spoon_ai.schema import Message, LLMResponse, ToolCall
+from spoon_ai.schema import Message, LLMResponse, Role, ToolCall
 from spoon_ai.utils.config_manager import ConfigManager
+from spoon_ai.llm.client_registry import LLMClientRegistry
+from spoon_ai.llm.resilience import ResiliencePolicy, ResilientCaller
 
-from openai import AsyncOpenAI
-from anthropic import AsyncAnthropic
-from httpx import AsyncClient
-from pydantic import BaseModel, Field
-from tenacity import retry, stop_after_attempt, wait_random_exponential
+from pydantic import BaseModel, Field, PrivateAttr
 import asyncio
 
 logger = getLogger(__name__)
 
+def estimate_tokens(message: Message) -> int:
+    """Cheap token estimate (~4 characters per token plus per-message overhead)"""
+    chars = len(message.content or "")
+    for tool_call in message.tool_calls or []:
+        chars += len(tool_call.function.name) + len(tool_call.function.arguments or "")
+    return 4 + chars // 4
+
+
 class Memory(BaseModel):
-    messages: List[Message] = Field(default_factory=list)
+    """Conversation memory bounded by message count and, optionally, a token budget.
+
+    Messages are evicted oldest first. An assistant message that made tool
+    calls is always evicted together with its tool results, so the history
+    never starts with orphaned tool messages.
+    """
+    messages: Deque[Message] = Field(default_factory=deque)
     max_messages: int = 100
+    max_tokens: Optional[int] = None
+    total_tokens: int = 0
+
+    _token_counts: Deque[int] = PrivateAttr(default_factory=deque)
+
+    def model_post_init(self, __context) -> None:
+        self._token_counts = deque(estimate_tokens(message) for message in self.messages)
+        self.total_tokens = sum(self._token_counts)
+        self._evict()
 
     def add_message(self, message:  Message) -> None:
+        tokens = estimate_tokens(message)
         self.messages.append(message)
+        self._token_counts.append(tokens)
+        self.total_tokens += tokens
+        self._evict()
+
+    def _over_budget(self) -> bool:
         if len(self.messages) > self.max_messages:
-            self.messages.pop(0)
+            return True
+        return self.max_tokens is not None and self.total_tokens > self.max_tokens
+
+    def _evict(self) -> None:
+        while self._over_budget():
+            # The oldest message plus any tool results that answer it
+            group_size = 1
+            while group_size < len(self.messages) and self.messages[group_size].role == Role.TOOL:
+                group_size += 1
+            if group_size >= len(self.messages):
+                # Never evict the most recent exchange
+                break
+            for _ in range(group_size):
+                self.messages.popleft()
+                self.total_tokens -= self._token_counts.popleft()
 
     def get_messages(self) -> List[Message]:
-        return self.messages
+        return list(self.messages)
 
     def clear(self) -> None:
         self.messages.clear()
+        self._token_counts.clear()
+        self.total_tokens = 0
 
 def to_dict(message: Message) -> dict:
+    """OpenAI wire format of a message, built once per message and cached on it"""
+    cached = message._wire_cache.get("openai")
+    if cached is not None:
+        return cached
+
     messages = {"role": message.role}
     if message.content:
         messages["content"] = message.content
@@ -40,11 +90,89 @@ def to_dict(message: Message) -> dict:
         messages["name"] = message.name
     if message.tool_call_id:
         messages["tool_call_id"] = message.tool_call_id
+    message._wire_cache["openai"] = messages
     return messages
 
+def _to_anthropic_message(message: dict) -> Optional[dict]:
+    """Convert an OpenAI-format message dict to Anthropic format (None for system messages)"""
+    role = message.get("role")
+
+    # Anthropic only supports user and assistant roles
+    if role == "tool":
+        # Tool messages are converted to user messages, content contains tool_result
+        return {
+            "role": "user",
+            "content": [{
+                "type": "tool_result",
+                "tool_use_id": message.get("tool_call_id"),
+                "content": message.get("content")
+            }]
+        }
+    elif role == "assistant":
+        content = None
+        if message.get("tool_calls"):
+            content = []
+            for tool_call in message.get("tool_calls", []):
+                tool_fn = tool_call.get("function", {})
+                try:
+                    arguments = json.loads(tool_fn.get("arguments", "{}"))
+                except:
+                    arguments = {}
+
+                content.append({
+                    "type": "tool_use",
+                    "id": tool_call.get("id"),
+                    "name": tool_fn.get("name"),
+                    "input": arguments
+                })
+        else:
+            content = message.get("content")
+
+        return {
+            "role": "assistant",
+            "content": content
+        }
+    elif role == "user":
+        return {
+            "role": "user",
+            "content": message.get("content")
+        }
+    # System messages are passed separately
+    return None
+
+def to_anthropic_dict(message: Message) -> Optional[dict]:
+    """Anthropic wire format of a message, built once per message and cached on it"""
+    if "anthropic" not in message._wire_cache:
+        message._wire_cache["anthropic"] = _to_anthropic_message(to_dict(message))
+    return message._wire_cache["anthropic"]
+
+def format_messages(messages: List[Union[dict, Message]], system_msg: Optional[str] = None) -> List[dict]:
+    formatted_messages = [] if system_msg is None else [{"role": "system", "content": system_msg}]
+    for message in messages:
+        if isinstance(message, dict):
+            formatted_messages.append(message)
+        elif isinstance(message, Message):
+            formatted_messages.append(to_dict(message))
+        else:
+            raise ValueError(f"Invalid message type: {type(message)}")
+    return formatted_messages
+
+def format_anthropic_messages(messages: List[Union[dict, Message]]) -> List[dict]:
+    anthropic_messages = []
+    for message in messages:
+        if isinstance(message, dict):
+            converted = _to_anthropic_message(message)
+        elif isinstance(message, Message):
+            converted = to_anthropic_dict(message)
+        else:
+            raise ValueError(f"Invalid message type: {type(message)}")
+        if converted is not None:
+            anthropic_messages.append(converted)
+    return anthropic_messages
+
 class ChatBot:
     # def __init__(self, model_name: str = "gpt-4.5-preview", llm_config: dict = None, llm_provider: str = "openai", api_key: str = None):
-    def __init__(self, model_name: str = None, llm_config: dict = None, llm_provider: str = None, api_key: str = None, base_url: str = None):
+    def __init__(self, model_name: str = None, llm_config: dict = None, llm_provider: str = None, api_key: str = None, base_url: str = None, resilience_policy: Optional[ResiliencePolicy] = None):
         # Initialize configuration manager
         config_manager = ConfigManager()
 
@@ -54,7 +182,9 @@ class ChatBot:
         self.base_url = base_url or config_manager.get_base_url() or os.getenv("BASE_URL")
         self.api_key = api_key
         self.llm_config = llm_config
-        self.output_index = 0
+        # Next content block index of each output queue; the bot is shared by every pooled agent,
+        # so the count is kept per consumer rather than on the bot
+        self._output_indices: "WeakKeyDictionary[asyncio.Queue, int]" = WeakKeyDictionary()
 
         # If llm_provider is still not specified, determine it from environment variables
         if self.llm_provider is None:
@@ -92,38 +222,38 @@ class ChatBot:
         # Determine API logic to use based on base_url and provider
         # If base_url is specified (like OpenRouter), use OpenAI-compatible API regardless of model name
         # Only use native Anthropic API when using official Anthropic endpoint
+        # Clients are shared process-wide so ChatBot instances reuse one connection pool per upstream
         if self.base_url or self.llm_provider == "openai":
             # Use OpenAI-compatible API (works for OpenAI, OpenRouter, and other compatible providers)
             self.api_logic = "openai"
-            self.llm = AsyncOpenAI(
+            self.llm = LLMClientRegistry.get(
+                "openai",
                 api_key=self.api_key or os.getenv("OPENAI_API_KEY"),
                 base_url=self.base_url
             )
         elif self.llm_provider == "anthropic" and not self.base_url:
             # Use native Anthropic API only when no custom base_url is specified
             self.api_logic = "anthropic"
-            http_client = AsyncClient(follow_redirects=True)
-            self.llm = AsyncAnthropic(
-                api_key=self.api_key or os.getenv("ANTHROPIC_API_KEY"),
-                http_client=http_client
+            self.llm = LLMClientRegistry.get(
+                "anthropic",
+                api_key=self.api_key or os.getenv("ANTHROPIC_API_KEY")
             )
         else:
             raise ValueError(f"Invalid LLM provider: {llm_provider}")
 
+        # Deadlines, retries and hedging for ask/ask_tool
+        self.resilience = ResilientCaller(resilience_policy, model=self.model_name)
+
     async def ask(self, messages: List[Union[dict, Message]], system_msg: Optional[str] = None, output_queue: Optional[asyncio.Queue] = None) -> str:
-        formatted_messages = [] if system_msg is None else [{"role": "system", "content": system_msg}]
-        for message in messages:
-            if isinstance(message, dict):
-                formatted_messages.append(message)
-            elif isinstance(message, Message):
-                formatted_messages.append(to_dict(message))
-            else:
-                raise ValueError(f"Invalid message type: {type(message)}")
+        return await self.resilience.call("ask", lambda _: self._ask_once(messages, system_msg))
 
+    async def _ask_once(self, messages: List[Union[dict, Message]], system_msg: Optional[str] = None) -> str:
         if self.api_logic == "openai":
+            formatted_messages = format_messages(messages, system_msg)
             response = await self.llm.chat.completions.create(messages=formatted_messages, model=self.model_name, max_tokens=4096, temperature=0.3, stream=False)
             return response.choices[0].message.content
         elif self.api_logic == "anthropic":
+            formatted_messages = format_messages(messages)
             response = await self.llm.messages.create(
                 model=self.model_name,
                 max_tokens=4096,
@@ -133,209 +263,217 @@ class ChatBot:
             )
             return response.content[0].text
 
-    # @retry(stop=stop_after_attempt(3), wait=wait_random_exponential(min=1, max=60))
     async def ask_tool(self,messages: List[Union[dict, Message]], system_msg: Optional[str] = None, tools: Optional[List[dict]] = None, tool_choice: Optional[str] = None, output_queue: Optional[asyncio.Queue] = None, **kwargs):
         if tool_choice not in ["auto", "none", "required"]:
             tool_choice = "auto"
 
-        formatted_messages = [] if system_msg is None else [{"role": "system", "content": system_msg}]
-        for message in messages:
-            if isinstance(message, dict):
-                formatted_messages.append(message)
-            elif isinstance(message, Message):
-                formatted_messages.append(to_dict(message))
-            else:
-                raise ValueError(f"Invalid message type: {type(message)}")
-
+        # Attempts (retries and hedges) each number their content blocks from the same starting index
+        output_index = self._output_indices.get(output_queue, 0) if output_queue is not None else 0
         try:
-            if self.api_logic == "openai":
-                response = await self.llm.chat.completions.create(
-                    messages=formatted_messages,
-                    model=self.model_name,
-                    max_tokens=4096,
-                    temperature=0.3,
-                    stream=False,
-                    tools=tools,
-                    tool_choice=tool_choice,
-                    **kwargs
-                )
+            response, next_index = await self.resilience.call(
+                "ask_tool",
+                lambda queue: self._ask_tool_once(messages, system_msg, tools, tool_choice, queue, output_index, **kwargs),
+                output_queue=output_queue,
+            )
+            if output_queue is not None:
+                self._output_indices[output_queue] = next_index
+            return response
+        except Exception as e:
+            logger.error(f"Error during tool call: {e}")
+            raise e
 
-                # Extract message and finish_reason from OpenAI response
-                message = response.choices[0].message
-                finish_reason = response.choices[0].finish_reason
-
-                # Convert OpenAI tool calls to our ToolCall format
-                tool_calls = []
-                if message.tool_calls:
-                    from spoon_ai.schema import Function
-                    for tool_call in message.tool_calls:
-                        tool_calls.append(ToolCall(
-                            id=tool_call.id,
-                            type=tool_call.type,
-                            function=Function(
-                                name=tool_call.function.name,
-                                arguments=tool_call.function.arguments
-                            )
-                        ))
-
-                # Map OpenAI finish reasons to standardized values
-                standardized_finish_reason = finish_reason
-                if finish_reason == "stop":
-                    standardized_finish_reason = "stop"
-                elif finish_reason == "length":
-                    standardized_finish_reason = "length"
-                elif finish_reason == "tool_calls":
-                    standardized_finish_reason = "tool_calls"
-                elif finish_reason == "content_filter":
-                    standardized_finish_reason = "content_filter"
-
-                # Return consistent LLMResponse object
-                return LLMResponse(
-                    content=message.content or "",
-                    tool_calls=tool_calls,
-                    finish_reason=standardized_finish_reason,
-                    native_finish_reason=finish_reason
+    async def _ask_tool_once(self, messages: List[Union[dict, Message]], system_msg: Optional[str], tools: Optional[List[dict]], tool_choice: str, output_queue, output_index: int, **kwargs) -> Tuple[LLMResponse, int]:
+        """Single streamed ask_tool attempt; returns the response and the next output index"""
+        if self.api_logic == "openai":
+            formatted_messages = format_messages(messages, system_msg)
+            from spoon_ai.schema import Function
+
+            content = ""
+            text_started = False
+            tool_buffers = {}
+            current_tool_index = None
+            finish_reason = None
+
+            def close_text_block():
+                nonlocal text_started, output_index
+                if not text_started:
+                    return
+                text_started = False
+                if output_queue:
+                    output_queue.put_nowait({"type": "stop", "content_block": {"type": "text", "text": content}, "index": output_index})
+                output_index += 1
+
+            def close_tool_block(tool_index):
+                nonlocal output_index
+                tool = tool_buffers[tool_index]
+                if output_queue:
+                    try:
+                        tool_input = json.loads(tool["arguments"] or "{}")
+                    except json.JSONDecodeError:
+                        tool_input = {}
+                    output_queue.put_nowait({"type": "stop", "content_block": {"type": "tool_use", "id": tool["id"], "name": tool["name"], "input": tool_input}, "index": output_index})
+                output_index += 1
+
+            stream = await self.llm.chat.completions.create(
+                messages=formatted_messages,
+                model=self.model_name,
+                max_tokens=4096,
+                temperature=0.3,
+                stream=True,
+                tools=tools,
+                tool_choice=tool_choice,
+                **kwargs
+            )
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta
+
+                if delta and delta.content:
+                    if not text_started:
+                        text_started = True
+                        if output_queue:
+                            output_queue.put_nowait({"type": "start", "content_block": {"type": "text", "text": ""}, "index": output_index})
+                    content += delta.content
+                    if output_queue:
+                        output_queue.put_nowait({"type": "text_delta", "delta": delta.content, "index": output_index})
+
+                # Tool call arguments arrive as partial JSON strings keyed by tool call index
+                for tool_delta in (delta.tool_calls or []) if delta else []:
+                    if tool_delta.index not in tool_buffers:
+                        close_text_block()
+                        if current_tool_index is not None:
+                            close_tool_block(current_tool_index)
+                        current_tool_index = tool_delta.index
+                        tool_buffers[tool_delta.index] = {"id": tool_delta.id, "type": tool_delta.type or "function", "name": "", "arguments": ""}
+                        if output_queue:
+                            name = tool_delta.function.name if tool_delta.function else None
+                            output_queue.put_nowait({"type": "start", "content_block": {"type": "tool_use", "id": tool_delta.id, "name": name or "", "input": {}}, "index": output_index})
+                    tool = tool_buffers[tool_delta.index]
+                    if tool_delta.id:
+                        tool["id"] = tool_delta.id
+                    if tool_delta.function and tool_delta.function.name:
+                        tool["name"] += tool_delta.function.name
+                    if tool_delta.function and tool_delta.function.arguments:
+                        tool["arguments"] += tool_delta.function.arguments
+                        if output_queue:
+                            output_queue.put_nowait({"type": "input_json_delta", "delta": tool_delta.function.arguments, "index": output_index})
+
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+
+            close_text_block()
+            if current_tool_index is not None:
+                close_tool_block(current_tool_index)
+
+            # Convert assembled OpenAI tool calls to our ToolCall format
+            tool_calls = [
+                ToolCall(
+                    id=tool["id"],
+                    type=tool["type"],
+                    function=Function(name=tool["name"], arguments=tool["arguments"])
                 )
-            elif self.api_logic == "anthropic":
-                def to_anthropic_tools(tools: List[dict]) -> List[dict]:
-                    return [{"name": tool["function"]["name"], "description": tool["function"]["description"], "input_schema": tool["function"]["parameters"]} for tool in tools]
-
-                # Convert message format to Anthropic format
-                anthropic_messages = []
-                system_content = system_msg or ""
-
-                for message in formatted_messages:
-                    role = message.get("role")
-
-                    # Anthropic only supports user and assistant roles
-                    if role == "system":
-                        # System messages are handled above, skip here
+                for _, tool in sorted(tool_buffers.items())
+            ]
+
+            # OpenAI finish reasons (stop, length, tool_calls, content_filter) are already standardized
+            return LLMResponse(
+                content=content,
+                tool_calls=tool_calls,
+                finish_reason=finish_reason,
+                native_finish_reason=finish_reason
+            ), output_index
+        elif self.api_logic == "anthropic":
+            def to_anthropic_tools(tools: List[dict]) -> List[dict]:
+                return [{"name": tool["function"]["name"], "description": tool["function"]["description"], "input_schema": tool["function"]["parameters"]} for tool in tools]
+
+            # Convert message format to Anthropic format (cached per Message)
+            anthropic_messages = format_anthropic_messages(messages)
+            system_content = system_msg or ""
+
+            content = ""
+            buffer = ""
+            buffer_type = ""
+            current_tool = None
+            tool_calls = []
+            finish_reason = None
+            native_finish_reason = None
+
+            async with self.llm.messages.stream(
+                model=self.model_name,
+                max_tokens=4096,
+                temperature=0.3,
+                system=system_content,
+                messages=anthropic_messages,
+                tools=to_anthropic_tools(tools),
+                **kwargs
+            ) as stream:
+                async for chunk in stream:
+                    if chunk.type == "message_start":
                         continue
-                    elif role == "tool":
-                        # Tool messages are converted to user messages, content contains tool_result
-                        anthropic_messages.append({
-                            "role": "user",
-                            "content": [{
-                                "type": "tool_result",
-                                "tool_use_id": message.get("tool_call_id"),
-                                "content": message.get("content")
-                            }]
-                        })
-                    elif role == "assistant":
-                        content = None
-                        if message.get("tool_calls"):
-                            content = []
-                            for tool_call in message.get("tool_calls", []):
-                                tool_fn = tool_call.get("function", {})
-                                try:
-                                    arguments = json.loads(tool_fn.get("arguments", "{}"))
-                                except:
-                                    arguments = {}
-
-                                content.append({
-                                    "type": "tool_use",
-                                    "id": tool_call.get("id"),
-                                    "name": tool_fn.get("name"),
-                                    "input": arguments
-                                })
-                        else:
-                            content = message.get("content")
-
-                        anthropic_messages.append({
-                            "role": "assistant",
-                            "content": content
-                        })
-                    elif role == "user":
-                        anthropic_messages.append({
-                            "role": "user",
-                            "content": message.get("content")
-                        })
-
-                content = ""
-                buffer = ""
-                buffer_type = ""
-                current_tool = None
-                tool_calls = []
-                finish_reason = None
-                native_finish_reason = None
-
-                async with self.llm.messages.stream(
-                    model=self.model_name,
-                    max_tokens=4096,
-                    temperature=0.3,
-                    system=system_content,
-                    messages=anthropic_messages,
-                    tools=to_anthropic_tools(tools),
-                    **kwargs
-                ) as stream:
-                    async for chunk in stream:
-                        if chunk.type == "message_start":
-                            continue
-                        elif chunk.type == "message_delta":
-                            # Extract finish_reason from message delta
-                            if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'stop_reason'):
-                                finish_reason = chunk.delta.stop_reason
-                                native_finish_reason = chunk.delta.stop_reason
-                            continue
-                        elif chunk.type == "message_stop":
-                            # Extract finish_reason from message stop
-                            if hasattr(chunk, 'message') and hasattr(chunk.message, 'stop_reason'):
-                                finish_reason = chunk.message.stop_reason
-                                native_finish_reason = chunk.message.stop_reason
-                            continue
-                        elif chunk.type in ["text", "input_json"]:
-                            continue
-                        elif chunk.type == "content_block_start":
-                            buffer_type = chunk.content_block.type
-                            if output_queue:
-                                    output_queue.put_nowait({"type": "start", "content_block": chunk.content_block.model_dump(), "index": self.output_index})
-                            if buffer_type == "tool_use":
-                                current_tool = {
-                                    "id": chunk.content_block.id,
-                                    "function": {
-                                        "name": chunk.content_block.name,
-                                        "arguments": {}
-                                    }
+                    elif chunk.type == "message_delta":
+                        # Extract finish_reason from message delta
+                        if hasattr(chunk, 'delta') and hasattr(chunk.delta, 'stop_reason'):
+                            finish_reason = chunk.delta.stop_reason
+                            native_finish_reason = chunk.delta.stop_reason
+                        continue
+                    elif chunk.type == "message_stop":
+                        # Extract finish_reason from message stop
+                        if hasattr(chunk, 'message') and hasattr(chunk.message, 'stop_reason'):
+                            finish_reason = chunk.message.stop_reason
+                            native_finish_reason = chunk.message.stop_reason
+                        continue
+                    elif chunk.type in ["text", "input_json"]:
+                        continue
+                    elif chunk.type == "content_block_start":
+                        buffer_type = chunk.content_block.type
+                        if output_queue:
+                                output_queue.put_nowait({"type": "start", "content_block": chunk.content_block.model_dump(), "index": output_index})
+                        if buffer_type == "tool_use":
+                            current_tool = {
+                                "id": chunk.content_block.id,
+                                "function": {
+                                    "name": chunk.content_block.name,
+                                    "arguments": {}
                                 }
+                            }
 
-                                continue
-                        elif chunk.type == "content_block_delta" and chunk.delta.type == "text_delta":
-                            buffer += chunk.delta.text
-                            if output_queue:
-                                output_queue.put_nowait({"type": "text_delta", "delta": chunk.delta.text, "index": self.output_index})
                             continue
-                        elif chunk.type == "content_block_delta" and chunk.delta.type == "input_json_delta":
-                            buffer += chunk.delta.partial_json
-                            if output_queue:
-                                output_queue.put_nowait({"type": "input_json_delta", "delta": chunk.delta.partial_json, "index": self.output_index})
-
-                        elif chunk.type == "content_block_stop":
-                            content += buffer
-                            if buffer_type == "tool_use":
-                                current_tool["function"]["arguments"] = buffer
-                                current_tool = ToolCall(**current_tool)
-                                tool_calls.append(current_tool)
-                            buffer = ""
-                            buffer_type = ""
-                            current_tool = None
-                            if output_queue:
-                                output_queue.put_nowait({"type": "stop", "content_block": chunk.content_block.model_dump(), "index": self.output_index})
-                            self.output_index += 1
-
-                # Map Anthropic stop reasons to standard finish reasons
-                if finish_reason == "end_turn":
-                    finish_reason = "stop"
-                elif finish_reason == "max_tokens":
-                    finish_reason = "length"
-                elif finish_reason == "tool_use":
-                    finish_reason = "tool_calls"
-
-                return LLMResponse(
-                    content=content,
-                    tool_calls=tool_calls,
-                    finish_reason=finish_reason,
-                    native_finish_reason=native_finish_reason
-                )
-        except Exception as e:
-            logger.error(f"Error during tool call: {e}")
-            raise e
+                    elif chunk.type == "content_block_delta" and chunk.delta.type == "text_delta":
+                        buffer += chunk.delta.text
+                        if output_queue:
+                            output_queue.put_nowait({"type": "text_delta", "delta": chunk.delta.text, "index": output_index})
+                        continue
+                    elif chunk.type == "content_block_delta" and chunk.delta.type == "input_json_delta":
+                        buffer += chunk.delta.partial_json
+                        if output_queue:
+                            output_queue.put_nowait({"type": "input_json_delta", "delta": chunk.delta.partial_json, "index": output_index})
+
+                    elif chunk.type == "content_block_stop":
+                        content += buffer
+                        if buffer_type == "tool_use":
+                            current_tool["function"]["arguments"] = buffer
+                            current_tool = ToolCall(**current_tool)
+                            tool_calls.append(current_tool)
+                        buffer = ""
+                        buffer_type = ""
+                        current_tool = None
+                        if output_queue:
+                            output_queue.put_nowait({"type": "stop", "content_block": chunk.content_block.model_dump(), "index": output_index})
+                        output_index += 1
+
+            # Map Anthropic stop reasons to standard finish reasons
+            if finish_reason == "end_turn":
+                finish_reason = "stop"
+            elif finish_reason == "max_tokens":
+                finish_reason = "length"
+            elif finish_reason == "tool_use":
+                finish_reason = "tool_calls"
+
+            return LLMResponse(
+                content=content,
+                tool_calls=tool_calls,
+                finish_reason=finish_reason,
+                native_finish_reason=native_finish_reason
+            ), output_index
@@ -0,0 +1,91 @@
+import importlib.util
+from logging import getLogger
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient as AnthropicHttpxClient
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient as OpenAIHttpxClient
+
+logger = getLogger(__name__)
+
+
+class LLMClientRegistry:
+    """Process-wide registry of LLM API clients.
+
+    Clients are shared by every ChatBot with the same (api logic, base_url,
+    api_key), so all agents reuse one keep-alive connection pool per upstream
+    instead of opening their own sockets and TLS sessions. SDK-level retries
+    are disabled; ChatBot retries through its ResiliencePolicy instead.
+    """
+
+    _clients: Dict[Tuple[str, Optional[str], Optional[str]], Any] = {}
+    _limits: httpx.Limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+    _http2: bool = True
+
+    @classmethod
+    def configure(cls, max_connections: int = 100, max_keepalive_connections: int = 20,
+                  keepalive_expiry: float = 30.0, http2: bool = True) -> None:
+        """Set connection-pool limits for clients created from now on
+
+        Args:
+            max_connections: Maximum concurrent connections per client
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Use HTTP/2 when the ``h2`` package is installed
+        """
+        cls._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        cls._http2 = http2
+
+    @classmethod
+    def _use_http2(cls) -> bool:
+        if not cls._http2:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            logger.debug("h2 is not installed, LLM clients fall back to HTTP/1.1")
+            return False
+        return True
+
+    @classmethod
+    def get(cls, api_logic: str, api_key: Optional[str], base_url: Optional[str] = None) -> Any:
+        """Get (or create) the shared client for an upstream
+
+        Args:
+            api_logic: "openai" for OpenAI-compatible APIs, "anthropic" for the native Anthropic API
+            api_key: API key for the upstream
+            base_url: Custom endpoint, if any
+
+        Returns:
+            AsyncOpenAI or AsyncAnthropic client
+        """
+        key = (api_logic, base_url, api_key)
+        client = cls._clients.get(key)
+        if client is not None:
+            return client
+
+        if api_logic == "openai":
+            http_client = OpenAIHttpxClient(limits=cls._limits, http2=cls._use_http2())
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client, max_retries=0)
+        elif api_logic == "anthropic":
+            http_client = AnthropicHttpxClient(limits=cls._limits, http2=cls._use_http2())
+            client = AsyncAnthropic(api_key=api_key, http_client=http_client, max_retries=0)
+        else:
+            raise ValueError(f"Invalid API logic: {api_logic}")
+
+        cls._clients[key] = client
+        logger.info(f"Created shared {api_logic} client (base_url: {base_url})")
+        return client
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close every shared client; call once on application shutdown"""
+        clients = list(cls._clients.values())
+        cls._clients.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.error(f"Error closing LLM client: {e}")
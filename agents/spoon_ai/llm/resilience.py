@@ -0,0 +1,281 @@
+import asyncio
+import random
+import time
+from collections import deque
+from logging import getLogger
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+import anthropic
+import openai
+from pydantic import BaseModel
+
+logger = getLogger(__name__)
+
+# HTTP statuses worth retrying: request timeout, conflict, rate limit and server errors
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class ResiliencePolicy(BaseModel):
+    """Deadline, retry and hedging settings for a single LLM call"""
+    attempt_timeout: Optional[float] = 120.0
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_delay: float = 0.5
+    hedge_initial_delay: float = 5.0
+    hedge_min_samples: int = 20
+
+
+class OutputAlreadyStreamedError(Exception):
+    """An attempt failed after its output was forwarded, so it cannot be retried transparently"""
+
+
+class _Superseded(Exception):
+    """Raised inside a hedged attempt that lost the race to produce output"""
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    if isinstance(error, (openai.APIConnectionError, anthropic.APIConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and (status_code in RETRYABLE_STATUS_CODES or status_code >= 500)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMMetrics:
+    """Per-attempt metrics for LLM calls, aggregated per operation"""
+
+    def __init__(self, window: int = 500):
+        self.counters: Dict[str, Dict[str, int]] = {}
+        self.latency: Dict[str, LatencyTracker] = {}
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=window)
+
+    def record(self, record: Dict[str, Any]) -> None:
+        operation = record["operation"]
+        counters = self.counters.setdefault(operation, {})
+        counters["attempts"] = counters.get("attempts", 0) + 1
+        counters[record["outcome"]] = counters.get(record["outcome"], 0) + 1
+        if record["hedge"]:
+            counters["hedges"] = counters.get("hedges", 0) + 1
+        if record["outcome"] == "success":
+            self.latency.setdefault(operation, LatencyTracker()).record(record["latency"])
+        self.recent.append(record)
+        logger.debug(f"LLM attempt: {record}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for operation, counters in self.counters.items():
+            tracker = self.latency.get(operation)
+            result[operation] = {
+                **counters,
+                "p50": tracker.quantile(0.5) if tracker else None,
+                "p95": tracker.quantile(0.95) if tracker else None,
+                "p99": tracker.quantile(0.99) if tracker else None,
+            }
+        return result
+
+
+# Process-wide metrics shared by every ChatBot
+llm_metrics = LLMMetrics()
+
+
+class _OutputRelay:
+    """Stand-in for an attempt's output queue.
+
+    The first attempt of a round to emit an event owns the output stream; its
+    events are forwarded as-is and its competitors are cancelled. A competitor
+    that emits afterwards is stopped with ``_Superseded``.
+    """
+
+    def __init__(self, round_: "_Round"):
+        self.round = round_
+
+    def put_nowait(self, item: Any) -> None:
+        if self.round.owner is None:
+            self.round.commit(self)
+        elif self.round.owner is not self:
+            raise _Superseded()
+        self.round.output_queue.put_nowait(item)
+
+
+class _Round:
+    def __init__(self, output_queue: Optional[asyncio.Queue], on_first_output: Callable[[float], None]):
+        self.output_queue = output_queue
+        self.on_first_output = on_first_output
+        self.started = time.monotonic()
+        self.owner: Optional[_OutputRelay] = None
+        self.tasks: Dict[asyncio.Task, Optional[_OutputRelay]] = {}
+
+    def commit(self, relay: _OutputRelay) -> None:
+        self.owner = relay
+        self.on_first_output(time.monotonic() - self.started)
+        for task, task_relay in self.tasks.items():
+            if task_relay is not relay:
+                task.cancel()
+
+
+class ResilientCaller:
+    """Runs LLM calls under a ResiliencePolicy.
+
+    Every attempt gets its own deadline. Timeouts, connection errors, 429s and
+    5xx responses are retried with exponential backoff and jitter (honouring
+    ``Retry-After``). With hedging enabled, a second attempt is started when the
+    first has produced nothing after the tracked latency quantile, and
+    whichever answers first wins. For streamed calls "answers" means "emits
+    its first event", so consumers never see output from two attempts; once an
+    attempt has streamed output it is not retried.
+    """
+
+    def __init__(self, policy: Optional[ResiliencePolicy] = None, metrics: Optional[LLMMetrics] = None, model: Optional[str] = None):
+        self.policy = policy or ResiliencePolicy()
+        self.metrics = metrics or llm_metrics
+        self.model = model
+        # Hedge delays are derived from time-to-first-output for streamed calls and total latency otherwise
+        self.latency: Dict[Tuple[str, bool], LatencyTracker] = {}
+
+    def _tracker(self, operation: str, streamed: bool) -> LatencyTracker:
+        return self.latency.setdefault((operation, streamed), LatencyTracker())
+
+    def hedge_delay(self, operation: str, streamed: bool) -> float:
+        tracker = self._tracker(operation, streamed)
+        if len(tracker.samples) < self.policy.hedge_min_samples:
+            return self.policy.hedge_initial_delay
+        return max(self.policy.hedge_min_delay, tracker.quantile(self.policy.hedge_quantile))
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.policy.backoff_max)
+        delay = min(self.policy.backoff_max, self.policy.backoff_base * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _attempt(self, operation: str, attempt: int, hedge: bool,
+                       fn: Callable[[Any], Awaitable[Any]], relay: Optional[_OutputRelay]) -> Any:
+        started = time.monotonic()
+        outcome, status_code, error = "success", None, None
+        try:
+            return await asyncio.wait_for(fn(relay), self.policy.attempt_timeout)
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise
+        except _Superseded:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome, status_code, error = "error", getattr(e, "status_code", None), str(e)
+            raise
+        finally:
+            self.metrics.record({
+                "operation": operation,
+                "model": self.model,
+                "attempt": attempt,
+                "hedge": hedge,
+                "outcome": outcome,
+                "latency": time.monotonic() - started,
+                "status_code": status_code,
+                "error": error,
+            })
+
+    async def _run_round(self, operation: str, attempt: int, fn: Callable[[Any], Awaitable[Any]],
+                         output_queue: Optional[asyncio.Queue]) -> Any:
+        streamed = output_queue is not None
+        round_ = _Round(output_queue, self._tracker(operation, True).record)
+
+        def start(hedge: bool) -> None:
+            relay = _OutputRelay(round_) if streamed else None
+            task = asyncio.create_task(self._attempt(operation, attempt, hedge, fn, relay))
+            round_.tasks[task] = relay
+
+        start(hedge=False)
+        hedged = not self.policy.hedge
+        last_error: Optional[BaseException] = None
+        try:
+            while round_.tasks:
+                timeout = None if hedged or round_.owner is not None else self.hedge_delay(operation, streamed)
+                done, _ = await asyncio.wait(set(round_.tasks), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"LLM {operation} slower than {timeout:.2f}s, sending hedged request")
+                    hedged = True
+                    start(hedge=True)
+                    continue
+
+                for task in done:
+                    relay = round_.tasks.pop(task)
+                    if task.cancelled():
+                        continue
+                    error = task.exception()
+                    if error is None:
+                        if round_.owner is None or round_.owner is relay:
+                            if not streamed:
+                                self._tracker(operation, False).record(time.monotonic() - round_.started)
+                            return task.result()
+                        continue
+                    if isinstance(error, _Superseded):
+                        continue
+                    if round_.owner is not None and round_.owner is relay:
+                        raise OutputAlreadyStreamedError(f"LLM {operation} failed mid-stream: {error}") from error
+                    last_error = error
+            raise last_error or asyncio.CancelledError()
+        finally:
+            for task in round_.tasks:
+                task.cancel()
+
+    async def call(self, operation: str, fn: Callable[[Any], Awaitable[Any]],
+                   output_queue: Optional[asyncio.Queue] = None) -> Any:
+        """Call ``fn`` under the policy
+
+        Args:
+            operation: Name used for metrics and latency tracking (e.g. "ask_tool")
+            fn: Starts one attempt; receives the queue the attempt must emit its events to
+                (None when ``output_queue`` is None)
+            output_queue: Consumer queue for streamed events
+
+        Returns:
+            Result of the winning attempt
+        """
+        attempt = 1
+        while True:
+            try:
+                return await self._run_round(operation, attempt, fn, output_queue)
+            except OutputAlreadyStreamedError:
+                raise
+            except Exception as e:
+                if attempt >= self.policy.max_attempts or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                logger.warning(f"LLM {operation} attempt {attempt} failed ({type(e).__name__}: {e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
@@ -3,3 +3,11 @@ SYSTEM_PROMPT = "You are an agent that can execute tool calls"
 NEXT_STEP_PROMPT = (
     "Continue with the next step or provide your final answer when the task is complete."
 )
+
+DIRECT_TOOL_POLISH_PROMPT = (
+    "The {tool_name} tool was run for the user's request and returned the output below. "
+    "Reply to the user based on it. Keep every number and the structured data block unchanged; "
+    "add only brief explanation and encouragement.\n\n"
+    "User request: {request}\n\n"
+    "Tool output:\n{tool_output}"
+)
@@ -1,12 +1,17 @@
 # Retrieval package for SpoonAI 
 from .base import BaseRetrievalClient, Document
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+from .embeddings import EmbeddingPipeline
 from .chroma import ChromaClient
 from .qdrant import QdrantClient
+from .local import LocalVectorClient
+from .bm25 import BM25Index, reciprocal_rank_fusion
 
 # Factory for retrieval client
 RETRIEVAL_CLIENTS = {
     'chroma': ChromaClient,
     'qdrant': QdrantClient,
+    'local': LocalVectorClient,
 }
 
 def get_retrieval_client(backend: str = 'chroma', **kwargs) -> BaseRetrievalClient:
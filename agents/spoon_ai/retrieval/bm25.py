@@ -0,0 +1,184 @@
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .base import Document
+
+# Words, numbers and tickers; "ACL", "vitamin-d3", "$ETH" -> "acl", "vitamin", "d3", "eth"
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def document_key(doc: Document) -> str:
+    """Identity of a document across retrievers: its metadata id, else a hash of its text"""
+    doc_id = doc.metadata.get("id")
+    if doc_id is not None:
+        return str(doc_id)
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+class BM25Index:
+    """In-memory inverted index ranking documents with Okapi BM25.
+
+    Needs no embeddings, so it costs nothing per query and catches the exact
+    terms (injury names, supplements, tickers) vector search tends to blur.
+    With a ``path``, documents are appended to a JSON-lines file and the
+    index is rebuilt from it on load. Adding a document whose key (see
+    ``document_key``) is already indexed replaces it; once replaced rows
+    exceed ``compact_ratio`` of all rows, the postings and the file are
+    rebuilt from the live documents (see ``compact``).
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75, compact_ratio: float = 0.25):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self._lock = threading.Lock()
+        self._reset()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # torn final line of an interrupted append
+                    self._index(Document(record["text"], record["metadata"]))
+            if self._needs_compaction():
+                self._compact()
+
+    def _reset(self) -> None:
+        self.documents: List[Optional[Document]] = []
+        self.rows_by_key: Dict[str, int] = {}
+        self.lengths: List[int] = []
+        # term -> (rows, term frequencies); arrays are built on first query after a change
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._total_length = 0
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def _index(self, doc: Document) -> None:
+        key = document_key(doc)
+        previous = self.rows_by_key.get(key)
+        if previous is not None:
+            # Postings of the old row stay but it scores as removed
+            self.documents[previous] = None
+            self._total_length -= self.lengths[previous]
+            self._live -= 1
+        row = len(self.documents)
+        self.rows_by_key[key] = row
+        self.documents.append(doc)
+        tokens = tokenize(doc.page_content)
+        self.lengths.append(len(tokens))
+        self._total_length += len(tokens)
+        self._live += 1
+        for term, count in Counter(tokens).items():
+            rows, counts = self._postings.setdefault(term, ([], []))
+            rows.append(row)
+            counts.append(count)
+            self._arrays.pop(term, None)
+
+    def add_documents(self, documents: List[Document]) -> None:
+        with self._lock:
+            for doc in documents:
+                self._index(doc)
+            if self._needs_compaction():
+                self._compact()
+            elif self.path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(self._line(doc) for doc in documents)
+
+    @staticmethod
+    def _line(doc: Document) -> str:
+        return json.dumps({"text": doc.page_content, "metadata": doc.metadata}) + "\n"
+
+    def _needs_compaction(self) -> bool:
+        return len(self.documents) - self._live > self.compact_ratio * len(self.documents)
+
+    def _compact(self) -> None:
+        live = [doc for doc in self.documents if doc is not None]
+        self._reset()
+        for doc in live:
+            self._index(doc)
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.writelines(self._line(doc) for doc in live)
+            os.replace(tmp, self.path)
+
+    def compact(self) -> None:
+        """Drop replaced documents from the postings and rewrite the file with only the live ones"""
+        with self._lock:
+            self._compact()
+
+    def _term_arrays(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            postings = self._postings.get(term)
+            if postings is None:
+                return None
+            arrays = self._arrays[term] = (np.asarray(postings[0], dtype=np.int64), np.asarray(postings[1], dtype=np.float32))
+        return arrays
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-k (row, BM25 score) for a query, best first; rows index ``documents``"""
+        with self._lock:
+            if not self._live:
+                return []
+            scores = np.zeros(len(self.documents), dtype=np.float32)
+            lengths = np.asarray(self.lengths, dtype=np.float32)
+            average_length = self._total_length / self._live or 1.0
+            alive = None
+            if self._live < len(self.documents):
+                alive = np.fromiter((doc is not None for doc in self.documents), dtype=bool, count=len(self.documents))
+            for term in set(tokenize(query)):
+                arrays = self._term_arrays(term)
+                if arrays is None:
+                    continue
+                rows, tf = arrays
+                df = len(rows) if alive is None else int(alive[rows].sum())
+                if not df:
+                    continue
+                idf = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * lengths[rows] / average_length)
+                scores[rows] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+            if alive is not None:
+                scores[~alive] = 0
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > k:
+                matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            order = matched[np.argsort(-scores[matched], kind="stable")]
+            return [(int(row), float(scores[row])) for row in order]
+
+    def query(self, query: str, k: int = 10) -> List[Document]:
+        return [self.documents[row] for row, _ in self.search(query, k)]
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 10, rrf_k: int = 60) -> List[Document]:
+    """Fuse ranked lists: each document scores sum(1 / (rrf_k + rank)) over the lists it appears in"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = document_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    # Ties keep first-seen order (the earlier retriever wins)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
@@ -3,9 +3,11 @@ from typing import List, Dict, Any
 import uuid
 import openai
 from .base import BaseRetrievalClient, Document
+from .embedding_cache import get_embedding_cache
+from .embeddings import EmbeddingPipeline
 
 class ChromaClient(BaseRetrievalClient):
-    def __init__(self, config_dir: str):
+    def __init__(self, config_dir: str, embedding_concurrency: int = 4, embedding_cache: bool = True):
         try:
             import chromadb
         except ImportError:
@@ -16,25 +18,24 @@ class ChromaClient(BaseRetrievalClient):
         
         # Initialize OpenAI client
         self.openai_client = openai.OpenAI()
+        self.embedder = EmbeddingPipeline(
+            model="text-embedding-ada-002", client=self.openai_client, max_concurrency=embedding_concurrency,
+            cache=get_embedding_cache() if embedding_cache else None,
+        )
         
     def _get_embedding(self, text: str) -> List[float]:
         """Get embedding for a text using OpenAI's API directly"""
-        response = self.openai_client.embeddings.create(
-            model="text-embedding-ada-002",
-            input=text
-        )
-        return response.data[0].embedding
+        return self.embedder.embed_query(text)
         
     def add_documents(self, documents: List[Document]):
-        """Add documents to the collection"""
-        for doc in documents:
-            # TODO: parallelize this
-            doc_embedding = self._get_embedding(doc.page_content)
+        """Add documents to the collection, one insert per embedding batch as batches complete"""
+        for indices, embeddings in self.embedder.embed_batches([doc.page_content for doc in documents]):
+            batch = [documents[i] for i in indices]
             self.collection.add(
-                ids=[doc.metadata.get("id", str(uuid.uuid4()))],
-                documents=[doc.page_content],
-                metadatas=[doc.metadata],
-                embeddings=[doc_embedding]
+                ids=[doc.metadata.get("id", str(uuid.uuid4())) for doc in batch],
+                documents=[doc.page_content for doc in batch],
+                metadatas=[doc.metadata for doc in batch],
+                embeddings=embeddings
             )
         
     def query(self, query: str, k: int = 10) -> List[Document]:
@@ -1,171 +1,386 @@
-from typing import List, Optional, Dict, Any, Callable, Type, Union
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator, Type, Union
 import os
+import csv
+import json
 import logging
 import glob as glob_module
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from html.parser import HTMLParser
 from spoon_ai.retrieval.chroma import Document
 
 logger = logging.getLogger(__name__)
 
+# Plain text and HTML are read and split this many characters at a time
+TEXT_BLOCK_SIZE = 1 << 20
+_READ_SIZE = 1 << 16
+
 class BasicTextSplitter:
     """Simple text splitter to replace langchain's RecursiveCharacterTextSplitter"""
-    
+
     def __init__(self, chunk_size=1000, chunk_overlap=200):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
-    
+
+    def _chunk_end(self, text: str, start: int) -> int:
+        end = min(start + self.chunk_size, len(text))
+
+        # If not the last chunk, try to split at whitespace
+        if end < len(text):
+            # Try to split at paragraph ends
+            paragraph_end = text.rfind('\n\n', start, end)
+            if paragraph_end > start:
+                end = paragraph_end + 2  # Include two newlines
+            else:
+                # Try to split at sentence ends
+                sentence_end = max(
+                    text.rfind('. ', start, end),
+                    text.rfind('? ', start, end),
+                    text.rfind('! ', start, end),
+                    text.rfind('.\n', start, end),
+                    text.rfind('?\n', start, end),
+                    text.rfind('!\n', start, end)
+                )
+                if sentence_end > start:
+                    end = sentence_end + 2  # Include separator and space
+        return end
+
+    def _next_start(self, start: int, end: int) -> int:
+        # Overlap only when it still moves forward; a short chunk (early paragraph break) gets none
+        return end - self.chunk_overlap if end - self.chunk_overlap > start else end
+
     def split_text(self, text: str) -> List[str]:
         """Split text into chunks"""
         if not text:
             return []
-            
-        chunks = []
+        return list(self.split_stream([text]))
+
+    def split_stream(self, pieces: Iterable[str]) -> Iterator[str]:
+        """Split text arriving in pieces, yielding chunks as soon as they are settled
+
+        Chunks are the same as ``split_text`` on the concatenated pieces, but only
+        about one chunk of text is buffered.
+        """
+        buffer = ""
         start = 0
-        
-        while start < len(text):
-            end = min(start + self.chunk_size, len(text))
-            
-            # If not the last chunk, try to split at whitespace
-            if end < len(text):
-                # Try to split at paragraph ends
-                paragraph_end = text.rfind('\n\n', start, end)
-                if paragraph_end > start:
-                    end = paragraph_end + 2  # Include two newlines
-                else:
-                    # Try to split at sentence ends
-                    sentence_end = max(
-                        text.rfind('. ', start, end),
-                        text.rfind('? ', start, end),
-                        text.rfind('! ', start, end),
-                        text.rfind('.\n', start, end),
-                        text.rfind('?\n', start, end),
-                        text.rfind('!\n', start, end)
-                    )
-                    if sentence_end > start:
-                        end = sentence_end + 2  # Include separator and space
-            
-            chunks.append(text[start:end])
-            start = end - self.chunk_overlap
-            
-        return chunks
-        
-    def split_documents(self, documents: List[Document]) -> List[Document]:
+        for piece in pieces:
+            buffer = buffer[start:] + piece
+            start = 0
+            # A chunk is settled once the text extends past its maximal end
+            while len(buffer) - start > self.chunk_size:
+                end = self._chunk_end(buffer, start)
+                yield buffer[start:end]
+                start = self._next_start(start, end)
+
+        while start < len(buffer):
+            end = self._chunk_end(buffer, start)
+            yield buffer[start:end]
+            if end >= len(buffer):
+                break
+            start = self._next_start(start, end)
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
         """Split document collection into smaller document chunks"""
-        split_docs = []
-        
+        return list(self.iter_split_documents(documents))
+
+    def iter_split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Lazily split documents into chunks"""
         for doc in documents:
-            splits = self.split_text(doc.page_content)
-            
-            for i, split in enumerate(splits):
+            for i, split in enumerate(self.split_text(doc.page_content)):
                 new_doc = Document(
                     page_content=split,
                     metadata=doc.metadata.copy() if doc.metadata else {}
                 )
-                
+
                 # Add split information to metadata
                 if 'chunk' not in new_doc.metadata:
                     new_doc.metadata['chunk'] = i
-                    
-                split_docs.append(new_doc)
-                
-        return split_docs
 
-class DocumentLoader:
+                yield new_doc
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collects the visible text of an HTML page, with line breaks at block elements"""
+
+    SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+    BLOCK_TAGS = {
+        "p", "div", "section", "article", "header", "footer", "main", "aside", "nav", "br", "hr",
+        "h1", "h2", "h3", "h4", "h5", "h6", "li", "ul", "ol", "table", "tr", "blockquote", "pre", "form",
+    }
+
     def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.title = ""
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title":
+            self._in_title = True
+        elif tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n\n" if tag in ("p", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article") else "\n")
+        elif tag in ("td", "th"):
+            self.parts.append("\t")
+
+    def handle_endtag(self, tag):
+        if tag == "title":
+            self._in_title = False
+        elif tag in self.SKIPPED_TAGS:
+            self._skip_depth = max(self._skip_depth - 1, 0)
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+    def take_text(self) -> str:
+        """Text collected since the last call, with runs of blank lines collapsed"""
+        text = "".join(self.parts)
+        self.parts = []
+        lines = [" ".join(line.split()) for line in text.split("\n")]
+        collapsed = []
+        for line in lines:
+            if line or (collapsed and collapsed[-1]):
+                collapsed.append(line)
+        return "\n".join(collapsed)
+
+def _flatten_json(value: Any, prefix: str = "") -> Iterator[str]:
+    """``path: value`` lines of a JSON value, which embed better than raw JSON"""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten_json(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list) and any(isinstance(item, (dict, list)) for item in value):
+        for i, item in enumerate(value):
+            yield from _flatten_json(item, f"{prefix}[{i}]")
+    elif isinstance(value, list):
+        yield f"{prefix}: {', '.join(str(item) for item in value)}" if prefix else ", ".join(str(item) for item in value)
+    else:
+        yield f"{prefix}: {value}" if prefix else str(value)
+
+class DocumentLoader:
+    """Loads files into chunked documents, parsing each supported format
+
+    ``iter_file`` and ``iter_directory`` yield chunks as files are read, so
+    memory does not grow with the amount of data ingested. With ``workers``,
+    ``iter_directory`` parses files in a process pool. PDF parsing needs the
+    optional ``pypdf`` package.
+    """
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
         self.text_splitter = BasicTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
         )
-        
-        # Simplified loader implementation
-        self.extension_loaders = {
+
+        # Each loader yields documents (pages, row groups, text blocks) which are then split
+        self.extension_loaders: Dict[str, Callable[[str], Iterator[Document]]] = {
             ".txt": self._load_text,
-            ".pdf": self._load_text,  # Simplified implementation, should use PDF parsing library
-            ".csv": self._load_text,
-            ".html": self._load_text,
-            ".htm": self._load_text,
-            ".json": self._load_text
+            ".md": self._load_text,
+            ".pdf": self._load_pdf,
+            ".csv": self._load_csv,
+            ".html": self._load_html,
+            ".htm": self._load_html,
+            ".json": self._load_json,
+            ".jsonl": self._load_jsonl,
         }
-    
-    def _load_text(self, file_path: str) -> List[Document]:
-        """Basic text file loader"""
+
+    @staticmethod
+    def _metadata(file_path: str, **extra) -> Dict[str, Any]:
+        return {"source": file_path, "filename": os.path.basename(file_path), **extra}
+
+    def _load_text(self, file_path: str) -> Iterator[Document]:
+        """Plain text, in blocks of about TEXT_BLOCK_SIZE characters ending at a paragraph break"""
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            buffer = ""
+            for piece in iter(lambda: f.read(_READ_SIZE), ""):
+                buffer += piece
+                if len(buffer) >= TEXT_BLOCK_SIZE:
+                    cut = buffer.rfind('\n\n')
+                    cut = cut + 2 if cut > 0 else len(buffer)
+                    yield Document(page_content=buffer[:cut], metadata=self._metadata(file_path))
+                    buffer = buffer[cut:]
+            if buffer:
+                yield Document(page_content=buffer, metadata=self._metadata(file_path))
+
+    def _load_pdf(self, file_path: str) -> Iterator[Document]:
+        """One document per PDF page, with its extracted text"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-            metadata = {
-                "source": file_path,
-                "filename": os.path.basename(file_path)
-            }
-            
-            return [Document(page_content=content, metadata=metadata)]
-        except Exception as e:
-            logger.error(f"Error loading file {file_path}: {e}")
-            return []
-    
-    def load_directory(self, directory_path: str, glob_pattern: Optional[str] = None) -> List[Document]:
-        """Load documents from a directory"""
-        # Check if the path is a file instead of a directory
-        if os.path.isfile(directory_path):
-            return self.load_file(directory_path)
-            
-        if not os.path.exists(directory_path):
-            raise FileNotFoundError(f"Directory not found: {directory_path}")
-        
-        documents = []
-        
-        # Use glob to match files
-        if glob_pattern:
-            file_paths = glob_module.glob(os.path.join(directory_path, glob_pattern), recursive=True)
-            for file_path in file_paths:
-                if os.path.isfile(file_path):
-                    docs = self.load_file(file_path)
-                    documents.extend(docs)
-        else:
-            # Traverse directory to load all supported files
-            for root, _, files in os.walk(directory_path):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    _, ext = os.path.splitext(file_path)
-                    ext = ext.lower()
-                    
-                    if ext in self.extension_loaders:
-                        try:
-                            docs = self.load_file(file_path)
-                            documents.extend(docs)
-                            logger.info(f"Loaded document: {file_path}")
-                        except Exception as e:
-                            logger.error(f"Error loading {file_path}: {e}")
-        
-        # Split documents
-        split_docs = self.text_splitter.split_documents(documents)
-        logger.info(f"Split into {len(split_docs)} chunks")
-        
-        return split_docs
-    
-    def load_file(self, file_path: str) -> List[Document]:
-        """Load a single file and return the documents"""
+            from pypdf import PdfReader
+        except ImportError:
+            raise ImportError("pypdf is not installed. Please install it with 'pip install pypdf'.")
+
+        reader = PdfReader(file_path)
+        for number, page in enumerate(reader.pages, 1):
+            text = page.extract_text() or ""
+            if text.strip():
+                yield Document(page_content=text, metadata=self._metadata(file_path, page=number))
+
+    def _load_csv(self, file_path: str) -> Iterator[Document]:
+        """Rows rendered as ``column: value`` lines, grouped so chunks hold whole rows"""
+        with open(file_path, 'r', encoding='utf-8-sig', errors='replace', newline='') as f:
+            reader = csv.DictReader(f)
+            lines: List[str] = []
+            size = 0
+            first_row = 1
+            for row_number, row in enumerate(reader, 1):
+                line = "; ".join(f"{column}: {value}" for column, value in row.items()
+                                 if column is not None and value not in (None, ""))
+                if lines and size + len(line) + 1 > self.text_splitter.chunk_size:
+                    yield Document(page_content="\n".join(lines),
+                                   metadata=self._metadata(file_path, row_start=first_row, row_end=row_number - 1))
+                    lines, size, first_row = [], 0, row_number
+                lines.append(line)
+                size += len(line) + 1
+            if lines:
+                yield Document(page_content="\n".join(lines),
+                               metadata=self._metadata(file_path, row_start=first_row, row_end=first_row + len(lines) - 1))
+
+    def _load_html(self, file_path: str) -> Iterator[Document]:
+        """Visible page text, without markup, scripts or styles"""
+        parser = _HTMLTextExtractor()
+        pending = ""
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            for piece in iter(lambda: f.read(_READ_SIZE), ""):
+                parser.feed(piece)
+                if sum(map(len, parser.parts)) >= TEXT_BLOCK_SIZE:
+                    pending += parser.take_text()
+                    yield Document(page_content=pending, metadata=self._metadata(file_path, title=parser.title.strip()))
+                    pending = ""
+        parser.close()
+        pending += parser.take_text()
+        if pending.strip():
+            yield Document(page_content=pending.strip("\n"), metadata=self._metadata(file_path, title=parser.title.strip()))
+
+    def _load_json(self, file_path: str) -> Iterator[Document]:
+        """A top-level array becomes one document per element, anything else a single document"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        records = data if isinstance(data, list) else [data]
+        for index, record in enumerate(records):
+            metadata = self._metadata(file_path, index=index) if isinstance(data, list) else self._metadata(file_path)
+            yield Document(page_content="\n".join(_flatten_json(record)), metadata=metadata)
+
+    def _load_jsonl(self, file_path: str) -> Iterator[Document]:
+        """One document per JSON line, read lazily"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield Document(page_content="\n".join(_flatten_json(record)),
+                               metadata=self._metadata(file_path, line=line_number))
+
+    def _check_file(self, file_path: str) -> str:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
-            
+
         if not os.path.isfile(file_path):
             raise ValueError(f"Path is not a file: {file_path}")
-            
+
         _, ext = os.path.splitext(file_path)
         ext = ext.lower()
-        
+
         if ext not in self.extension_loaders:
             raise ValueError(f"Unsupported file type: {ext}. Supported types are: {', '.join(self.extension_loaders.keys())}")
-        
+        return ext
+
+    def iter_file(self, file_path: str) -> Iterator[Document]:
+        """Yield the chunks of a single file as it is parsed"""
+        ext = self._check_file(file_path)
+        chunk = 0
+        for doc in self.extension_loaders[ext](file_path):
+            for split in self.text_splitter.split_stream([doc.page_content]):
+                metadata = doc.metadata.copy()
+                metadata.setdefault('chunk', chunk)
+                chunk += 1
+                yield Document(page_content=split, metadata=metadata)
+
+    def load_file(self, file_path: str) -> List[Document]:
+        """Load a single file and return the documents"""
+        self._check_file(file_path)
         try:
-            # Call appropriate type loader
-            loader_func = self.extension_loaders[ext]
-            documents = loader_func(file_path)
-            
-            # Split documents
-            split_docs = self.text_splitter.split_documents(documents)
-            logger.info(f"Split {file_path} into {len(split_docs)} chunks")
-            
-            return split_docs
+            split_docs = list(self.iter_file(file_path))
         except Exception as e:
             logger.error(f"Error loading file {file_path}: {e}")
-            raise 
\ No newline at end of file
+            raise
+        logger.info(f"Split {file_path} into {len(split_docs)} chunks")
+        return split_docs
+
+    def _find_files(self, directory_path: str, glob_pattern: Optional[str] = None) -> Iterator[str]:
+        if glob_pattern:
+            for file_path in glob_module.iglob(os.path.join(directory_path, glob_pattern), recursive=True):
+                if os.path.isfile(file_path):
+                    yield file_path
+        else:
+            # Traverse directory to find all supported files
+            for root, _, files in os.walk(directory_path):
+                for file in sorted(files):
+                    if os.path.splitext(file)[1].lower() in self.extension_loaders:
+                        yield os.path.join(root, file)
+
+    def _load_file_or_skip(self, file_path: str) -> List[Document]:
+        try:
+            docs = self.load_file(file_path)
+            logger.info(f"Loaded document: {file_path}")
+            return docs
+        except Exception as e:
+            logger.error(f"Error loading {file_path}: {e}")
+            return []
+
+    def iter_directory(self, directory_path: str, glob_pattern: Optional[str] = None,
+                       workers: Optional[int] = None) -> Iterator[Document]:
+        """Yield the chunks of every supported file in a directory (or of a single file)
+
+        Files that fail to parse are logged and skipped. With ``workers`` > 1 files
+        are parsed in that many processes and yielded per file as they finish; at
+        most ``2 * workers`` parsed files are held at once.
+        """
+        # Check if the path is a file instead of a directory
+        if os.path.isfile(directory_path):
+            yield from self.iter_file(directory_path)
+            return
+
+        if not os.path.exists(directory_path):
+            raise FileNotFoundError(f"Directory not found: {directory_path}")
+
+        file_paths = self._find_files(directory_path, glob_pattern)
+        if not workers or workers <= 1:
+            for file_path in file_paths:
+                try:
+                    for doc in self.iter_file(file_path):
+                        yield doc
+                    logger.info(f"Loaded document: {file_path}")
+                except Exception as e:
+                    logger.error(f"Error loading {file_path}: {e}")
+            return
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: Dict[Future, str] = {}
+            try:
+                for file_path in file_paths:
+                    pending[executor.submit(self._load_file_or_skip, file_path)] = file_path
+                    if len(pending) < 2 * workers:
+                        continue
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.pop(future)
+                        yield from future.result()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.pop(future)
+                        yield from future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def load_directory(self, directory_path: str, glob_pattern: Optional[str] = None,
+                       workers: Optional[int] = None) -> List[Document]:
+        """Load documents from a directory"""
+        split_docs = list(self.iter_directory(directory_path, glob_pattern, workers))
+        logger.info(f"Split into {len(split_docs)} chunks")
+        return split_docs
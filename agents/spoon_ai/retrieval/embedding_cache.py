@@ -0,0 +1,137 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Default location, overridable with SPOON_AI_EMBEDDING_CACHE
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "spoon_ai", "embeddings.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (model, digest)
+) WITHOUT ROWID;
+"""
+
+# SQLite's default limit on bound parameters is 999
+_LOOKUP_CHUNK = 900
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: (model, sha256(text)) -> vector.
+
+    Vectors are stored as float32 in a SQLite file, which loses nothing: the
+    OpenAI client already receives embeddings as base64 float32. Recently
+    used vectors are also kept in an in-process LRU. The cache is thread-safe,
+    so concurrent embedding batches can share it.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_memory_entries: int = 4096):
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._memory: "OrderedDict[Tuple[str, bytes], np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: Tuple[str, bytes], vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached float32 vectors of ``texts``, None where missing"""
+        digests = [text_digest(text) for text in texts]
+        found: List[Optional[np.ndarray]] = [None] * len(texts)
+        with self._lock:
+            missing: Dict[bytes, List[int]] = {}
+            for i, digest in enumerate(digests):
+                vector = self._memory.get((model, digest))
+                if vector is None:
+                    missing.setdefault(digest, []).append(i)
+                else:
+                    self._memory.move_to_end((model, digest))
+                    found[i] = vector
+
+            pending = list(missing)
+            for start in range(0, len(pending), _LOOKUP_CHUNK):
+                chunk = pending[start:start + _LOOKUP_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT digest, vector FROM embeddings WHERE model = ? AND digest IN ({', '.join('?' for _ in chunk)})",
+                    (model, *chunk),
+                ).fetchall()
+                for digest, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    self._remember((model, digest), vector)
+                    for i in missing[digest]:
+                        found[i] = vector
+
+            hits = sum(vector is not None for vector in found)
+            self.hits += hits
+            self.misses += len(texts) - hits
+        return found
+
+    def get(self, model: str, text: str) -> Optional[np.ndarray]:
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                digest = text_digest(text)
+                array = np.asarray(vector, dtype=np.float32)
+                self._remember((model, digest), array)
+                rows.append((model, digest, array.tobytes()))
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO embeddings (model, digest, vector) VALUES (?, ?, ?)", rows)
+
+    def clear(self, model: Optional[str] = None) -> None:
+        with self._lock, self._conn:
+            if model is None:
+                self._memory.clear()
+                self._conn.execute("DELETE FROM embeddings")
+            else:
+                for key in [key for key in self._memory if key[0] == model]:
+                    del self._memory[key]
+                self._conn.execute("DELETE FROM embeddings WHERE model = ?", (model,))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {"stored": stored, "in_memory": len(self._memory), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared_caches: Dict[str, EmbeddingCache] = {}
+_shared_lock = threading.Lock()
+
+
+def get_embedding_cache(path: Optional[str] = None) -> EmbeddingCache:
+    """Process-wide cache for a file (default SPOON_AI_EMBEDDING_CACHE or ~/.cache/spoon_ai/embeddings.db)"""
+    path = path or os.getenv("SPOON_AI_EMBEDDING_CACHE") or DEFAULT_CACHE_PATH
+    with _shared_lock:
+        cache = _shared_caches.get(path)
+        if cache is None:
+            cache = _shared_caches[path] = EmbeddingCache(path)
+        return cache
@@ -0,0 +1,164 @@
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from logging import getLogger
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import openai
+
+from spoon_ai.llm.resilience import _retry_after, is_retryable
+
+from .embedding_cache import EmbeddingCache
+
+logger = getLogger(__name__)
+
+# OpenAI embeddings API limits per request: 2048 inputs and roughly 300k tokens
+MAX_BATCH_INPUTS = 2048
+MAX_BATCH_TOKENS = 250_000
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+class EmbeddingPipeline:
+    """Embeds many texts with few, concurrent requests to the OpenAI embeddings API.
+
+    Texts are grouped into batches of up to ``batch_size`` inputs and
+    ``max_batch_tokens`` (estimated) tokens, and up to ``max_concurrency``
+    batches are in flight at once. Each batch is retried on its own
+    (rate limits, timeouts, 5xx) with exponential backoff, honouring
+    Retry-After. Results are yielded per batch as they complete, so callers
+    can write them to their vector store while later batches are embedded.
+
+    With a ``cache``, texts embedded before (by any backend using the same
+    model) are served from it, repeated texts within a call are embedded
+    once, and new embeddings are added to it.
+    """
+
+    def __init__(self, model: str = "text-embedding-3-small", client: Optional[openai.OpenAI] = None,
+                 batch_size: int = MAX_BATCH_INPUTS, max_batch_tokens: int = MAX_BATCH_TOKENS,
+                 max_concurrency: int = 4, max_attempts: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, timeout: Optional[float] = 60.0,
+                 cache: Optional[EmbeddingCache] = None):
+        self.model = model
+        self.cache = cache
+        self.client = client or openai.OpenAI()
+        self.batch_size = min(batch_size, MAX_BATCH_INPUTS)
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+    def batches(self, texts: Sequence[str]) -> Iterator[Tuple[int, Sequence[str]]]:
+        """(start index, texts) of each request"""
+        start = tokens = 0
+        for i, text in enumerate(texts):
+            text_tokens = _estimate_tokens(text)
+            if i > start and (i - start >= self.batch_size or tokens + text_tokens > self.max_batch_tokens):
+                yield start, texts[start:i]
+                start, tokens = i, 0
+            tokens += text_tokens
+        if start < len(texts):
+            yield start, texts[start:]
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def embed_batch(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed one batch in a single request, retrying transient failures"""
+        # The API rejects empty inputs, which would fail the whole batch
+        inputs = [text if text.strip() else " " for text in texts]
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.client.embeddings.create(model=self.model, input=inputs, timeout=self.timeout)
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except Exception as e:
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(f"Embedding batch of {len(inputs)} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def embed_batches(self, texts: Sequence[str]) -> Iterator[Tuple[List[int], List[List[float]]]]:
+        """Yield (indices into ``texts``, embeddings) per batch: cached texts first, then as requests complete
+
+        At most ``2 * max_concurrency`` batches are submitted ahead, so memory stays
+        bounded however many texts are passed. A batch that still fails after its
+        retries raises here; batches yielded before it are unaffected (and cached).
+        """
+        # Distinct uncached texts -> their positions in ``texts``
+        uncached: Dict[str, List[int]] = {}
+        for chunk_start in range(0, len(texts), self.batch_size):
+            chunk = texts[chunk_start:chunk_start + self.batch_size]
+            cached = self.cache.get_many(self.model, chunk) if self.cache is not None else [None] * len(chunk)
+            indices, vectors = [], []
+            for i, (text, vector) in enumerate(zip(chunk, cached), chunk_start):
+                if vector is None:
+                    uncached.setdefault(text, []).append(i)
+                else:
+                    indices.append(i)
+                    vectors.append(vector.tolist())
+            if indices:
+                yield indices, vectors
+
+        unique_texts = list(uncached)
+        for start, vectors in self._embed_uncached(unique_texts):
+            batch = unique_texts[start:start + len(vectors)]
+            if self.cache is not None:
+                self.cache.put_many(self.model, batch, vectors)
+            yield (
+                [i for text in batch for i in uncached[text]],
+                [vector for text, vector in zip(batch, vectors) for _ in uncached[text]],
+            )
+
+    def _embed_uncached(self, texts: Sequence[str]) -> Iterator[Tuple[int, List[List[float]]]]:
+        """(start index, embeddings) per request, in completion order"""
+        batches = list(self.batches(texts))
+        if len(batches) <= 1 or self.max_concurrency <= 1:
+            # Nothing to overlap
+            for start, batch in batches:
+                yield start, self.embed_batch(batch)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending: Dict[Future, int] = {}
+            try:
+                for start, batch in batches:
+                    pending[executor.submit(self.embed_batch, batch)] = start
+                    if len(pending) < 2 * self.max_concurrency:
+                        continue
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embeddings of ``texts``, in order"""
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for indices, vectors in self.embed_batches(texts):
+            for i, vector in zip(indices, vectors):
+                embeddings[i] = vector
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        if self.cache is not None:
+            cached = self.cache.get(self.model, text)
+            if cached is not None:
+                return cached.tolist()
+        vector = self.embed_batch([text])[0]
+        if self.cache is not None:
+            self.cache.put_many(self.model, [text], [vector])
+        return vector
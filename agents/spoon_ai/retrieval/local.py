@@ -0,0 +1,398 @@
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .base import BaseRetrievalClient, Document
+from .embedding_cache import get_embedding_cache
+from .embeddings import EmbeddingPipeline
+
+# Metadata filter: {key: value} or {key: [allowed values]}; all keys must match
+MetadataFilter = Dict[str, Any]
+
+# Rows scored per matrix product, bounding the temporary score matrix
+_SEARCH_CHUNK_ROWS = 65536
+# int8 quantization scale for unit vectors
+_INT8_SCALE = 127.0
+
+
+def _filter_key(value: Any) -> Optional[str]:
+    """Hashable form of a filterable metadata value (scalars only)"""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return json.dumps(value)
+    return None
+
+
+class LocalVectorClient(BaseRetrievalClient):
+    """In-process vector index persisted under ``config_dir``, with no external service.
+
+    Unit-normalized embeddings are appended to a float32 matrix file that is
+    memory-mapped for search, so the OS pages vectors in as needed. With
+    ``quantize=True`` they are stored as int8 instead: a quarter of the disk
+    and page cache, at the cost of approximate scores. Document texts stay on disk and are
+    read only for the hits returned; metadata is kept in memory together with
+    an inverted index for equality filters.
+
+    Search is exact (flat) by default. With ``nlist`` set, an IVF index of
+    ``nlist`` spherical k-means centroids is trained once the collection has
+    enough vectors, and queries scan only the ``nprobe`` closest lists. New
+    documents are assigned to their nearest list as they are appended.
+
+    Re-adding an id appends the new version and marks the old row deleted.
+    Once deleted rows exceed ``compact_ratio`` of the collection, the files
+    are rewritten without them (see ``compact``).
+    """
+
+    def __init__(self, config_dir: str, collection_name: str = "spoon_ai", model: str = "text-embedding-3-small",
+                 quantize: bool = False, nlist: Optional[int] = None, nprobe: int = 8,
+                 embedding_concurrency: int = 4, embedding_cache: bool = True, embedder: Optional[EmbeddingPipeline] = None,
+                 compact_ratio: float = 0.25):
+        self.path = os.path.join(config_dir, f"{collection_name}.index")
+        self.collection_name = collection_name
+        self.nprobe = nprobe
+        self.compact_ratio = compact_ratio
+        self.embedder = embedder or EmbeddingPipeline(
+            model=model, max_concurrency=embedding_concurrency,
+            cache=get_embedding_cache() if embedding_cache else None,
+        )
+        self._settings = {"model": self.embedder.model, "quantize": quantize, "nlist": nlist}
+        self._load()
+
+    # ------------------------------------------------------------------ storage
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @property
+    def _dtype(self) -> type:
+        return np.int8 if self.meta["quantize"] else np.float32
+
+    def _load(self) -> None:
+        self._recover_compaction()
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json")) as f:
+                self.meta = json.load(f)
+        else:
+            self.meta = {**self._settings, "dim": None, "count": 0, "deleted": []}
+
+        self.ids: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.text_offsets: List[int] = []
+        self.rows_by_id: Dict[str, int] = {}
+        self.deleted: Set[int] = set(self.meta["deleted"])
+        self._postings: Dict[str, Dict[str, List[int]]] = {}
+        if os.path.exists(self._file("docs.jsonl")):
+            with open(self._file("docs.jsonl"), "rb") as f:
+                offset = 0
+                for line in f:
+                    if len(self.ids) == self.meta["count"]:
+                        break  # ignore a tail written after the last saved meta (interrupted append)
+                    record = json.loads(line)
+                    self._index_row(record["id"], record["metadata"], offset)
+                    offset += len(line)
+            self._truncate("docs.jsonl", offset)
+
+        self.vectors: Optional[np.ndarray] = None
+        self._map_vectors()
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: Optional[np.ndarray] = None
+        self._list_rows: Optional[List[np.ndarray]] = None
+        if os.path.exists(self._file("ivf.npz")):
+            ivf = np.load(self._file("ivf.npz"))
+            self.centroids, self.lists = ivf["centroids"], ivf["lists"][:self.meta["count"]]
+
+    def _truncate(self, name: str, size: int) -> None:
+        if os.path.exists(self._file(name)) and os.path.getsize(self._file(name)) > size:
+            with open(self._file(name), "r+b") as f:
+                f.truncate(size)
+
+    def _map_vectors(self) -> None:
+        count, dim = self.meta["count"], self.meta["dim"]
+        self._truncate("vectors.bin", count * (dim or 0) * np.dtype(self._dtype).itemsize)
+        if not count:
+            self.vectors = None
+            return
+        self.vectors = np.memmap(self._file("vectors.bin"), dtype=self._dtype, mode="r", shape=(count, dim))
+
+    def _save_meta(self) -> None:
+        self.meta["deleted"] = sorted(self.deleted)
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.meta, f)
+        os.replace(tmp, self._file("meta.json"))
+
+    def _index_row(self, doc_id: str, metadata: Dict[str, Any], offset: int) -> None:
+        row = len(self.ids)
+        previous = self.rows_by_id.get(doc_id)
+        if previous is not None:
+            # Re-adding an id replaces the document
+            self.deleted.add(previous)
+        self.rows_by_id[doc_id] = row
+        self.ids.append(doc_id)
+        self.metadatas.append(metadata)
+        self.text_offsets.append(offset)
+        for key, value in metadata.items():
+            value_key = _filter_key(value)
+            if value_key is not None:
+                self._postings.setdefault(key, {}).setdefault(value_key, []).append(row)
+
+    # ------------------------------------------------------------------ writes
+
+    def add_documents(self, documents: List[Document]):
+        """Embed and append documents; an existing id is replaced"""
+        for indices, embeddings in self.embedder.embed_batches([doc.page_content for doc in documents]):
+            self.add_embeddings([documents[i] for i in indices], embeddings)
+
+    def add_embeddings(self, documents: Sequence[Document], embeddings: Sequence[Sequence[float]]) -> None:
+        """Append documents with precomputed embeddings"""
+        if not documents:
+            return
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+        if self.meta["dim"] is None:
+            self.meta["dim"] = matrix.shape[1]
+        elif matrix.shape[1] != self.meta["dim"]:
+            raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match the index ({self.meta['dim']})")
+        stored = np.clip(np.rint(matrix * _INT8_SCALE), -127, 127).astype(np.int8) if self.meta["quantize"] else matrix
+
+        # Vectors and texts first; meta.json (with the new count) commits the append
+        with open(self._file("vectors.bin"), "ab") as f:
+            f.write(np.ascontiguousarray(stored).tobytes())
+        docs_path = self._file("docs.jsonl")
+        offset = os.path.getsize(docs_path) if os.path.exists(docs_path) else 0
+        lines = []
+        for doc in documents:
+            doc_id = str(doc.metadata.get("id", "")) or os.urandom(16).hex()
+            line = (json.dumps({"id": doc_id, "text": doc.page_content, "metadata": doc.metadata}) + "\n").encode("utf-8")
+            self._index_row(doc_id, doc.metadata, offset)
+            offset += len(line)
+            lines.append(line)
+        with open(docs_path, "ab") as f:
+            f.writelines(lines)
+
+        self.meta["count"] += len(documents)
+        self._map_vectors()
+        if self.centroids is not None:
+            self.lists = np.concatenate([self.lists, self._assign(matrix)])
+            self._save_ivf()
+        self._save_meta()
+        if self.meta["nlist"] and self.centroids is None and self.meta["count"] >= 39 * self.meta["nlist"]:
+            self.build_ivf()
+        if len(self.deleted) > self.compact_ratio * self.meta["count"]:
+            self.compact()
+
+    # ------------------------------------------------------------------ compaction
+
+    def _recover_compaction(self) -> None:
+        """Finish or discard a compaction interrupted by a crash"""
+        compacted, old = f"{self.path}.compact", f"{self.path}.old"
+        if not os.path.exists(self.path) and os.path.exists(compacted):
+            # The rewrite completed and the old files were already moved aside
+            os.replace(compacted, self.path)
+        shutil.rmtree(compacted, ignore_errors=True)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def compact(self) -> None:
+        """Rewrite the vectors, texts and IVF lists without deleted rows
+
+        The new files are written to a sibling directory, which then replaces
+        the index directory, so a crash leaves either the old or the new index.
+        """
+        if not self.deleted:
+            return
+        live = np.fromiter((row for row in range(self.meta["count"]) if row not in self.deleted), dtype=np.int64)
+        compacted, old = f"{self.path}.compact", f"{self.path}.old"
+        shutil.rmtree(compacted, ignore_errors=True)
+        os.makedirs(compacted)
+
+        with open(os.path.join(compacted, "vectors.bin"), "wb") as f:
+            for start in range(0, len(live), _SEARCH_CHUNK_ROWS):
+                f.write(np.ascontiguousarray(self.vectors[live[start:start + _SEARCH_CHUNK_ROWS]]).tobytes())
+        keep = set(live.tolist())
+        with open(self._file("docs.jsonl"), "rb") as source, open(os.path.join(compacted, "docs.jsonl"), "wb") as target:
+            for row, line in enumerate(source):
+                if row >= self.meta["count"]:
+                    break
+                if row in keep:
+                    target.write(line)
+        if self.centroids is not None:
+            np.savez(os.path.join(compacted, "ivf.npz"), centroids=self.centroids, lists=self.lists[live])
+        with open(os.path.join(compacted, "meta.json"), "w") as f:
+            json.dump({**self.meta, "count": len(live), "deleted": []}, f)
+
+        self.vectors = None  # release the memory map before the swap
+        shutil.rmtree(old, ignore_errors=True)
+        os.replace(self.path, old)
+        os.replace(compacted, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+        self._load()
+
+    # ------------------------------------------------------------------ IVF
+
+    def _assign(self, matrix: np.ndarray) -> np.ndarray:
+        return np.argmax(matrix @ self.centroids.T, axis=1).astype(np.int32)
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        """Sorted rows of each IVF list, rebuilt after appends"""
+        if self._list_rows is None:
+            order = np.argsort(self.lists, kind="stable")
+            bounds = np.searchsorted(self.lists[order], np.arange(len(self.centroids) + 1))
+            self._list_rows = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._list_rows
+
+    def _save_ivf(self) -> None:
+        self._list_rows = None
+        np.savez(self._file("ivf.npz"), centroids=self.centroids, lists=self.lists)
+
+    def _float_rows(self, start: int, stop: int) -> np.ndarray:
+        rows = np.asarray(self.vectors[start:stop], dtype=np.float32)
+        return rows / _INT8_SCALE if self.meta["quantize"] else rows
+
+    def build_ivf(self, nlist: Optional[int] = None, iterations: int = 10, sample_size: int = 50000, seed: int = 0) -> None:
+        """Train (or retrain) the IVF centroids with spherical k-means on a sample, then assign every vector"""
+        nlist = nlist or self.meta["nlist"]
+        count = self.meta["count"]
+        if not nlist or count < nlist:
+            return
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+        sample = np.asarray(self.vectors[sample_rows], dtype=np.float32)
+        sample /= np.maximum(np.linalg.norm(sample, axis=1, keepdims=True), 1e-12)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        self.centroids = centroids.astype(np.float32)
+        self.lists = np.concatenate([
+            self._assign(self._float_rows(start, min(start + _SEARCH_CHUNK_ROWS, count)))
+            for start in range(0, count, _SEARCH_CHUNK_ROWS)
+        ])
+        self.meta["nlist"] = nlist
+        self._save_ivf()
+        self._save_meta()
+
+    # ------------------------------------------------------------------ search
+
+    def _filter_rows(self, where: Optional[MetadataFilter]) -> Optional[np.ndarray]:
+        """Sorted rows matching every filter key, or None for no filter"""
+        if not where:
+            return None
+        rows: Optional[Set[int]] = None
+        for key, allowed in where.items():
+            values = allowed if isinstance(allowed, (list, tuple, set)) else [allowed]
+            postings = self._postings.get(key, {})
+            matched: Set[int] = set()
+            for value in values:
+                matched.update(postings.get(_filter_key(value), ()))
+            rows = matched if rows is None else rows & matched
+            if not rows:
+                break
+        return np.fromiter(sorted(rows), dtype=np.int64)
+
+    def _gather(self, rows: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(self.vectors[rows], dtype=np.float32)
+        return vectors / _INT8_SCALE if self.meta["quantize"] else vectors
+
+    def _top_k(self, scores: np.ndarray, rows: np.ndarray, k: int) -> List[Tuple[int, float]]:
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            scores, rows = scores[keep], rows[keep]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(rows[i]), float(scores[i])) for i in order]
+
+    def _scan_flat(self, queries: np.ndarray, k: int) -> List[List[Tuple[int, float]]]:
+        """Exact scan of every row in chunks, all queries per matrix product"""
+        best: List[List[Tuple[int, float]]] = [[] for _ in queries]
+        count = self.meta["count"]
+        for start in range(0, count, _SEARCH_CHUNK_ROWS):
+            stop = min(start + _SEARCH_CHUNK_ROWS, count)
+            scores = queries @ self._float_rows(start, stop).T
+            rows = np.arange(start, stop)
+            for i, previous in enumerate(best):
+                best[i] = self._top_k(
+                    np.concatenate([scores[i], np.array([score for _, score in previous], dtype=np.float32)]),
+                    np.concatenate([rows, np.array([row for row, _ in previous], dtype=np.int64)]),
+                    k,
+                )
+        return best
+
+    def _scan_ivf(self, queries: np.ndarray, k: int, filtered: Optional[np.ndarray]) -> List[List[Tuple[int, float]]]:
+        """Score the ``nprobe`` closest lists of each query; each list is read once for all queries probing it"""
+        nprobe = min(self.nprobe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        queries_by_list: Dict[int, List[int]] = {}
+        for i, probe in enumerate(probes):
+            for list_id in probe:
+                queries_by_list.setdefault(int(list_id), []).append(i)
+
+        list_rows = self._inverted_lists()
+        scores: List[List[np.ndarray]] = [[] for _ in queries]
+        rows: List[List[np.ndarray]] = [[] for _ in queries]
+        for list_id, query_ids in queries_by_list.items():
+            candidates = list_rows[list_id]
+            if filtered is not None:
+                candidates = np.intersect1d(candidates, filtered, assume_unique=True)
+            if not len(candidates):
+                continue
+            list_scores = self._gather(candidates) @ queries[query_ids].T
+            for j, i in enumerate(query_ids):
+                scores[i].append(list_scores[:, j])
+                rows[i].append(candidates)
+        return [
+            self._top_k(np.concatenate(query_scores), np.concatenate(query_rows), k) if query_scores else []
+            for query_scores, query_rows in zip(scores, rows)
+        ]
+
+    def search(self, query_embeddings: Sequence[Sequence[float]], k: int = 10,
+               where: Optional[MetadataFilter] = None) -> List[List[Tuple[int, float]]]:
+        """Top-k (row, cosine similarity) per query embedding, best first"""
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if self.vectors is None or not len(queries):
+            return [[] for _ in range(len(queries))]
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        # Replaced documents are skipped after ranking, so fetch enough to cover them
+        fetch = k + len(self.deleted)
+        filtered = self._filter_rows(where)
+
+        if self.centroids is not None:
+            best = self._scan_ivf(queries, fetch, filtered)
+        elif filtered is None:
+            best = self._scan_flat(queries, fetch)
+        elif not len(filtered):
+            best = [[] for _ in queries]
+        else:
+            scores = queries @ self._gather(filtered).T
+            best = [self._top_k(query_scores, filtered, fetch) for query_scores in scores]
+
+        return [[(row, score) for row, score in hits if row not in self.deleted][:k] for hits in best]
+
+    def _document(self, row: int) -> Document:
+        with open(self._file("docs.jsonl"), "rb") as f:
+            f.seek(self.text_offsets[row])
+            record = json.loads(f.readline())
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def query_batch(self, queries: Sequence[str], k: int = 10, where: Optional[MetadataFilter] = None) -> List[List[Document]]:
+        """Top-k documents for several queries, embedded in one request and scored in one pass"""
+        hits = self.search(self.embedder.embed(list(queries)), k, where)
+        return [[self._document(row) for row, _ in query_hits] for query_hits in hits]
+
+    def query(self, query: str, k: int = 10, where: Optional[MetadataFilter] = None) -> List[Document]:
+        return self.query_batch([query], k, where)[0]
+
+    def __len__(self) -> int:
+        return self.meta["count"] - len(self.deleted)
+
+    def delete_collection(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.meta = {**self._settings, "dim": None, "count": 0, "deleted": []}
+        self._load()
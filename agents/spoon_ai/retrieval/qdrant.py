@@ -3,9 +3,14 @@ from typing import List, Dict, Any, Optional
 import uuid
 import openai
 from .base import BaseRetrievalClient, Document
+from .embedding_cache import get_embedding_cache
+from .embeddings import EmbeddingPipeline
 
 
 class QdrantClient(BaseRetrievalClient):
+    # Points per upsert request (1536-dim vectors are ~30 KB each as JSON)
+    UPSERT_BATCH_SIZE = 256
+
     def __init__(
         self,
         collection_name: str = "spoon_ai",
@@ -20,6 +25,8 @@ class QdrantClient(BaseRetrievalClient):
         prefix: Optional[str] = None,
         timeout: Optional[int] = None,
         host: Optional[str] = None,
+        embedding_concurrency: int = 4,
+        embedding_cache: bool = True,
     ):
         try:
             from qdrant_client import QdrantClient as Qdrant
@@ -43,6 +50,10 @@ class QdrantClient(BaseRetrievalClient):
         )
         self.collection_name = collection_name
         self.openai_client = openai.OpenAI()
+        self.embedder = EmbeddingPipeline(
+            model="text-embedding-3-small", client=self.openai_client, max_concurrency=embedding_concurrency,
+            cache=get_embedding_cache() if embedding_cache else None,
+        )
         self._ensure_collection()
 
     def _ensure_collection(self):
@@ -57,26 +68,27 @@ class QdrantClient(BaseRetrievalClient):
             )
 
     def _get_embedding(self, text: str) -> List[float]:
-        response = self.openai_client.embeddings.create(
-            model="text-embedding-3-small", input=text
-        )
-        return response.data[0].embedding
+        return self.embedder.embed_query(text)
 
     def add_documents(self, documents: List[Document]):
+        """Embed documents in concurrent batches, upserting each batch as it completes"""
         from qdrant_client import models
 
-        points = []
-        for doc in documents:
-            doc_embedding = self._get_embedding(doc.page_content)
-            point_id = doc.metadata.get("id", str(uuid.uuid4()))
-            points.append(
+        for indices, embeddings in self.embedder.embed_batches([doc.page_content for doc in documents]):
+            points = [
                 models.PointStruct(
-                    id=point_id,
-                    vector=doc_embedding,
+                    id=doc.metadata.get("id", str(uuid.uuid4())),
+                    vector=embedding,
                     payload={"text": doc.page_content, **doc.metadata},
                 )
-            )
-        self.qdrant.upsert(collection_name=self.collection_name, points=points)
+                for doc, embedding in zip((documents[i] for i in indices), embeddings)
+            ]
+            # Keep each request well under the server's body size limit
+            for offset in range(0, len(points), self.UPSERT_BATCH_SIZE):
+                self.qdrant.upsert(
+                    collection_name=self.collection_name,
+                    points=points[offset:offset + self.UPSERT_BATCH_SIZE],
+                )
 
     def query(self, query: str, k: int = 10) -> List[Document]:
         query_embedding = self._get_embedding(query)
@@ -1,9 +1,11 @@
 import os
-from typing import Any, Dict, Iterator, List
+from typing import Any, Dict, Iterator, List, Optional
 
 from openai import OpenAI
 import pinecone
 
+from spoon_ai.retrieval.embedding_cache import get_embedding_cache
+from spoon_ai.retrieval.embeddings import EmbeddingPipeline
 from spoon_ai.tools.base import BaseTool, ToolFailure, ToolResult
 
 
@@ -12,6 +14,9 @@ class ToolManager:
         self.tools = tools
         self.tool_map = {tool.name: tool for tool in tools}
         self.indexed = False
+        # Bumped whenever the tool set changes; to_params() is rebuilt only then
+        self.version = 0
+        self._params_cache: Optional[List[Dict[str, Any]]] = None
         
     
     def _lazy_init_pinecone(self):
@@ -28,6 +33,10 @@ class ToolManager:
             
             self.index = pinecone.Index(index_name)
             self.embedding_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            # Tool descriptions rarely change, so cold starts re-index from the cache
+            self.embedder = EmbeddingPipeline(
+                model="text-embedding-3-large", client=self.embedding_client, cache=get_embedding_cache()
+            )
         
     def __getitem__(self, name: str) -> BaseTool:
         return self.tool_map[name]
@@ -39,7 +48,18 @@ class ToolManager:
         return len(self.tools)
     
     def to_params(self) -> List[Dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+        """Tool schemas in OpenAI function format, cached until the tool set changes.
+
+        The returned list is shared between callers and must not be mutated.
+        """
+        if self._params_cache is None:
+            self._params_cache = [tool.to_param() for tool in self.tools]
+        return self._params_cache
+
+    def _invalidate(self) -> None:
+        self.version += 1
+        self._params_cache = None
+        self.indexed = False
     
     async def execute(self, * ,name: str, tool_input: Dict[str, Any] =None) -> ToolResult:
         tool = self.tool_map[name]
@@ -61,6 +81,7 @@ class ToolManager:
     def add_tool(self, tool: BaseTool) -> None:
         self.tools.append(tool)
         self.tool_map[tool.name] = tool
+        self._invalidate()
         
     def add_tools(self, *tools: BaseTool) -> None:
         for tool in tools:
@@ -68,20 +89,18 @@ class ToolManager:
             
     def remove_tool(self, name: str) -> None:
         self.tools = [tool for tool in self.tools if tool.name != name]
-        del self.tool_map[name]       
+        del self.tool_map[name]
+        self._invalidate()
 
     def index_tools(self):
         self._lazy_init_pinecone()
         vectors = []
-        for tool in self.tools:
-            embedding_vector = self.embedding_client.embeddings.create(
-                input=tool.description,
-                model="text-embedding-3-large"
-            )
+        embeddings = self.embedder.embed([tool.description for tool in self.tools])
+        for tool, embedding in zip(self.tools, embeddings):
             vectors.append(
                 {
                     "id": tool.name,
-                    "values": embedding_vector.data[0].embedding,
+                    "values": embedding,
                     "metadata": {
                         "name": tool.name,
                         "description": tool.description
@@ -94,16 +113,13 @@ class ToolManager:
     def query_tools(self, query: str, top_k: int = 5, rerank_k: int = 20) -> List[BaseTool]:
         if not self.indexed:
             self.index_tools()
-        embedding_vector = self.embedding_client.embeddings.create(
-            input=query,
-            model="text-embedding-3-large"
-        )
+        query_embedding = self.embedder.embed_query(query)
         results = self.index.query(
             namespace="dex-tools-test",
             top_k=rerank_k,
             include_metadata=True,
             include_values=False,
-            vector=embedding_vector.data[0].embedding
+            vector=query_embedding
         )
         print(results)
         doc_to_tool = {}
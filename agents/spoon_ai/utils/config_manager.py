@@ -1,16 +1,37 @@
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 class ConfigManager:
     """Configuration management class for user settings like API keys"""
 
+    # Loaded configurations shared by all instances: resolved path -> (mtime, config)
+    _cache: Dict[str, Tuple[Optional[float], Dict[str, Any]]] = {}
+
     def __init__(self):
         """Initialize the configuration manager"""
         # Use relative path from current working directory
         self.config_file = Path("config.json")
-        self.config = self._load_config()
+        self.config = self._load_config_cached()
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return self.config_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def _load_config_cached(self) -> Dict[str, Any]:
+        """Load configuration, re-reading the file only when it changed on disk"""
+        cache_key = str(self.config_file.resolve())
+        mtime = self._mtime()
+        cached = ConfigManager._cache.get(cache_key)
+        if cached is not None and mtime is not None and cached[0] == mtime:
+            return cached[1]
+
+        config = self._load_config()
+        ConfigManager._cache[cache_key] = (self._mtime(), config)
+        return config
 
     def _load_config(self) -> Dict[str, Any]:
         """Load configuration file"""
@@ -45,6 +66,7 @@ class ConfigManager:
         try:
             with open(self.config_file, 'w') as f:
                 json.dump(config, f, indent=2)
+            ConfigManager._cache[str(self.config_file.resolve())] = (self._mtime(), config)
         except Exception as e:
             print(f"Error saving config: {e}")
 
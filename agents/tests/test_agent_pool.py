@@ -0,0 +1,36 @@
+import asyncio
+
+from agent_pool import AgentPool
+
+
+class FakeMemory:
+    def __init__(self):
+        self.messages = []
+
+    def clear(self):
+        self.messages = []
+
+    def get_messages(self):
+        return list(self.messages)
+
+
+class FakeAgent:
+    def __init__(self):
+        self.memory = FakeMemory()
+        self.output_queue = asyncio.Queue()
+
+    def clear(self):
+        self.memory.clear()
+
+
+def test_checkout_drops_unconsumed_output():
+    async def scenario():
+        pool = AgentPool(FakeAgent)
+        for key in ("session", None):
+            for _ in range(3):
+                async with pool.checkout(key) as agent:
+                    assert agent.output_queue.empty()
+                    agent.output_queue.put_nowait({"type": "text_delta", "delta": "hi"})
+                assert agent.output_queue.empty()
+
+    asyncio.run(scenario())
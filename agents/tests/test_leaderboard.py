@@ -0,0 +1,12 @@
+from leaderboard import LeaderboardRegistry, WORKOUTS
+
+
+def test_changing_target_metric_keeps_joined_members():
+    registry = LeaderboardRegistry()
+    registry.create_challenge("c1", "club")
+    registry.join_challenge("c1", "alice", "Alice")
+    registry.join_challenge("c1", "bob")
+    challenge = registry.create_challenge("c1", "club", target_metric="distance_km")
+    assert challenge.target_metric == "distance_km"
+    assert sorted((row["member_id"], row["score"]) for row in challenge.standings()) == [("alice", 0.0), ("bob", 0.0)]
+    assert challenge.rank("alice", WORKOUTS) is not None
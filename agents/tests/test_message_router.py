@@ -0,0 +1,62 @@
+from message_router import HybridRouter, KeywordRouter
+
+# Labelled messages that are not in ROUTE_EXAMPLES
+HELD_OUT = [
+    ("goal", "I want to run a sub 25 minute 5k by summer"),
+    ("goal", "help me build up to cycling 200 km a week"),
+    ("goal", "I'd like to swim a mile without stopping by june"),
+    ("goal", "how many days a week should I train for a 10k"),
+    ("goal", "I want to run my first marathon next year"),
+    ("goal", "get me ready for a sprint triathlon in 10 weeks"),
+    ("goal", "increase my weekly running distance to 40 km"),
+    ("goal", "set a target of 12000 steps a day"),
+    ("nutrition", "I had scrambled eggs and toast this morning"),
+    ("nutrition", "is a banana good before a workout"),
+    ("nutrition", "I ate pizza for dinner last night"),
+    ("nutrition", "how much water should I drink on long runs"),
+    ("nutrition", "what snacks help with recovery after training"),
+    ("nutrition", "had a protein shake and a chicken wrap for lunch"),
+    ("nutrition", "my breakfast was yogurt with berries and granola"),
+    ("nutrition", "are carbs important for endurance athletes"),
+    ("injury", "my ankle is swollen after yesterday's run"),
+    ("injury", "sharp pain in my knee when going downstairs"),
+    ("injury", "I strained my calf, how long until I can run"),
+    ("injury", "my shoulder is sore after swimming laps"),
+    ("injury", "tight hamstrings and lower back stiffness"),
+    ("injury", "I think I have tendonitis in my elbow"),
+    ("injury", "shin splints are getting worse"),
+    ("injury", "what stretches help my achilles"),
+    ("community", "who's winning the leaderboard in our club"),
+    ("community", "start a step challenge for the group"),
+    ("community", "I feel like giving up on training"),
+    ("community", "cheer up the team after a tough week"),
+    ("community", "how active are members of the club this month"),
+    ("community", "give me a motivational boost"),
+    ("community", "compare my stats with my friends"),
+    ("community", "organize a group ride competition this weekend"),
+]
+
+
+def accuracy(router) -> float:
+    decisions = router.classify_batch([message for _, message in HELD_OUT])
+    return sum(decision.route == route for decision, (route, _) in zip(decisions, HELD_OUT)) / len(HELD_OUT)
+
+
+def test_hybrid_beats_keyword_on_held_out_messages():
+    keyword = accuracy(KeywordRouter())
+    hybrid = accuracy(HybridRouter(min_confidence=0.4))
+    assert hybrid > keyword
+    assert hybrid >= 0.85
+
+
+def test_keyword_hits_are_kept_with_full_confidence():
+    messages = ["how much protein should I eat for my goal", "my knee hurts", "join the challenge"]
+    keyword = KeywordRouter().classify_batch(messages)
+    hybrid = HybridRouter(min_confidence=0.4).classify_batch(messages)
+    assert [d.route for d in hybrid] == [d.route for d in keyword] == ["goal", "injury", "community"]
+    assert all(d.confidence == 1.0 for d in hybrid)
+
+
+def test_low_confidence_misses_fall_back_to_default_route():
+    decision = HybridRouter(min_confidence=0.99).classify("hello there")
+    assert decision.route == "goal"
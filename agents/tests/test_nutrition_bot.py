@@ -0,0 +1,10 @@
+from nutrition_bot import NutritionAnalysisTool
+
+
+def test_day_shown_at_110_percent_counts_as_on_target():
+    tool = NutritionAnalysisTool()
+    goal = {"protein": 30}
+    logs = [{"date": "2024-01-01", "protein": 33}, {"date": "2024-01-02", "protein": 40}]
+    analysis = tool._analyze_logs(logs, goal)
+    assert tool._calculate_goal_completion(goal, tool._analyze_logs(logs[:1], goal))["protein"] == 110.0
+    assert analysis.days_on_target["protein"] == 50.0
@@ -0,0 +1,41 @@
+import asyncio
+
+from nutrition_import import import_nutrition_logs
+
+
+def run_import(text: str, fmt: str = "csv"):
+    async def lines():
+        for line in text.split("\n"):
+            yield line
+
+    async def collect():
+        return [result async for result in import_nutrition_logs(lines(), fmt)]
+
+    results = asyncio.run(collect())
+    return results[:-1], results[-1]["summary"]
+
+
+def test_stray_quote_in_unquoted_field_is_literal():
+    results, summary = run_import(
+        'user_input,date\n6" sub with chicken,2024-01-01\n2 eggs,2024-01-02\noatmeal,2024-01-03'
+    )
+    assert summary == {"lines": 3, "ok": 3, "errors": 0}
+    assert sorted((result["line"], result["log"]["date"]) for result in results) == [
+        (2, "2024-01-01"), (3, "2024-01-02"), (4, "2024-01-03"),
+    ]
+
+
+def test_multi_line_quoted_field():
+    results, summary = run_import(
+        'date,user_input,calories\n2024-01-01,"eggs, toast\n\nand ""jam""",300\n2024-01-02,salad,120'
+    )
+    assert summary == {"lines": 2, "ok": 2, "errors": 0}
+    by_line = {result["line"]: result["log"] for result in results}
+    assert by_line[2]["date"] == "2024-01-01" and by_line[2]["calories_consumed"] == 300.0
+    assert by_line[5]["date"] == "2024-01-02"
+
+
+def test_unterminated_quoted_field_is_reported():
+    results, summary = run_import('user_input,date\n2 eggs,2024-01-01\n"open,2024-01-02')
+    assert summary == {"lines": 2, "ok": 1, "errors": 1}
+    assert {"line": 3, "status": "error", "error": "unterminated quoted field"} in results